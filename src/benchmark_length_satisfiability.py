@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+
+# file name: benchmark_length_satisfiability.py
+#
+# Script to cross-check and benchmark satisfiability checks of length abstraction formulae.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+import argparse
+import random
+import sys
+import time
+
+from optifa.basic import *
+
+
+# Main script function.
+def main():
+    args = parse_args()  # Parse program arguments.
+    random.seed(args.seed)
+
+    formulae_dicts = [(generate_formulae_dict(args), generate_formulae_dict(args)) for _ in range(args.checks)]
+
+    check_modes = {
+        'arithmetic': lambda fa_a_formulae_dict, fa_b_formulae_dict: check_length_satisfiability(
+            LengthCheckConfig(smt_free=True), fa_a_formulae_dict, fa_b_formulae_dict),
+        'iterative': check_length_satisfiability_iterative,
+        'smt': lambda fa_a_formulae_dict, fa_b_formulae_dict: check_length_satisfiability(
+            LengthCheckConfig(smt_free=False), fa_a_formulae_dict, fa_b_formulae_dict),
+    }
+
+    results = {}
+    times = {}
+    arithmetic_mismatches_cnt = 0
+    for mode, check in check_modes.items():
+        start = time.perf_counter()
+        results[mode] = [check(fa_a_formulae_dict, fa_b_formulae_dict)
+                         for fa_a_formulae_dict, fa_b_formulae_dict in formulae_dicts]
+        times[mode] = time.perf_counter() - start
+
+    # Output format: <mode> <checks> <sat> <total_s> <per_check_us> <mismatches>
+    # Mismatches are counted against the results of SMT solver Z3.
+    for mode in check_modes:
+        mismatches = [check_id for check_id, (result, smt_result) in enumerate(zip(results[mode], results['smt']))
+                      if result != smt_result]
+        print(f"{mode},{args.checks},{sum(results[mode])},{times[mode]:.6f},"
+              f"{times[mode] / args.checks * 1e6:.2f},{len(mismatches)}")
+
+        if mode == 'arithmetic':
+            for check_id in mismatches:
+                fa_a_formulae_dict, fa_b_formulae_dict = formulae_dicts[check_id]
+                print(f"mismatch: {get_only_formulae(fa_a_formulae_dict)} and {get_only_formulae(fa_b_formulae_dict)}",
+                      file=sys.stderr)
+            arithmetic_mismatches_cnt = len(mismatches)
+
+    if arithmetic_mismatches_cnt:
+        print_error(f"{arithmetic_mismatches_cnt} arithmetic results differ from SMT solver Z3")
+
+
+def check_length_satisfiability_iterative(fa_a_formulae_dict, fa_b_formulae_dict):
+    """
+    Check satisfiability for length abstraction formulae by stepping through the loops, one period at a time.
+    """
+    for fa_a_id in get_only_formulae(fa_a_formulae_dict):
+        for fa_b_id in get_only_formulae(fa_b_formulae_dict):
+            # Handle lengths are equal, True without the need to resolve loops.
+            if fa_a_id[0] == fa_b_id[0]:
+                return True
+
+            # Handle lengths are distinct, further checking needed.
+            elif fa_a_id[0] > fa_b_id[0]:  # FA A handle is longer.
+                if solve_for_one_handle_longer(fa_a_id, fa_b_id):
+                    return True
+
+            else:  # FA B handle is longer.
+                if solve_for_one_handle_longer(fa_b_id, fa_a_id):
+                    return True
+
+    return False
+
+
+def generate_formulae_dict(args):
+    """Generate random formulae dictionary of a handle and loop automaton."""
+    formulae_dict = {}
+    for accept_state in range(random.randint(1, args.max_formulae)):
+        loop = random.randint(0, args.max_loop) if random.random() < 0.8 else 0
+        formulae_dict[str(accept_state)] = [str(accept_state), random.randint(0, args.max_handle), loop]
+
+    return formulae_dict
+
+
+class LengthCheckConfig:
+    """Configuration of length abstraction satisfiability checks."""
+
+    def __init__(self, smt_free):
+        self.smt_free = smt_free
+
+
+def parse_args():
+    """Parse arguments using argparse."""
+    arg_parser = argparse.ArgumentParser(description='Cross-check and benchmark satisfiability checks of length '
+                                                     'abstraction formulae against SMT solver Z3.')
+    arg_parser.add_argument('--checks', '-n', type=int, default=2000,
+                            help='Number of random pairs of formulae sets to check.')
+    arg_parser.add_argument('--max-formulae', '-f', type=int, default=40,
+                            help='Maximal number of formulae in a formulae set.')
+    arg_parser.add_argument('--max-handle', type=int, default=200,
+                            help='Maximal handle length.')
+    arg_parser.add_argument('--max-loop', type=int, default=24,
+                            help='Maximal loop length.')
+    arg_parser.add_argument('--seed', '-s', type=int, default=0,
+                            help='Seed for the random formulae generator.')
+
+    return arg_parser.parse_args()
+
+
+if __name__ == "__main__":
+    main()
+
+# End of file.
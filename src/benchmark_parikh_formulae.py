@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+
+# file name: benchmark_parikh_formulae.py
+#
+# Script to benchmark construction of Parikh image formulae for tested pairs of automata.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+import argparse
+import csv
+from pathlib import Path
+import sys
+import time
+
+import z3
+
+import symboliclib
+from lfa import LFA
+from optifa.basic import *
+from optifa.parikh import ParikhVariables
+from optifa.smtlib import add_persistent_formulae_smtlib
+
+
+# Main script function.
+def main():
+    config = parse_args()  # Parse program arguments.
+
+    # Output format: <larger> <smaller> <states> <transitions> <legacy_s> <tables_s> <speedup> <smtlib_s>
+    # Legacy time covers string-formatted persistent formulae with state-specific formulae for a single product
+    # state, tables time covers variables tables with persistent and selector formulae for all product states.
+    # SMT-LIB time covers the same formulae as tables time with persistent formulae loaded from SMT-LIB script.
+    print("larger,smaller,states,transitions,legacy_s,tables_s,speedup,smtlib_s")
+    for larger, smaller in get_automata_pairs(config):
+        larger_path = Path(config.automata_dir) / larger
+        smaller_path = Path(config.automata_dir) / smaller
+        if not larger_path.is_file() or not smaller_path.is_file():
+            print(f"skipping missing automata: {larger}, {smaller}", file=sys.stderr)
+            continue
+
+        fa_a = symboliclib.parse(str(larger_path))
+        fa_b = symboliclib.parse(str(smaller_path))
+
+        start = time.perf_counter()
+        smt = z3.Solver()
+        add_legacy_formulae(smt, fa_a, 'a', config)
+        add_legacy_formulae(smt, fa_b, 'b', config)
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        smt = z3.Solver()
+        fa_a_variables = ParikhVariables(fa_a, 'a')
+        fa_b_variables = ParikhVariables(fa_b, 'b')
+        add_persistent_formulae(smt, fa_a_variables, fa_b_variables, config)
+        add_selector_formulae(smt, fa_a_variables, fa_b_variables, config)
+        tables_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        smt = z3.Solver()
+        fa_a_variables = ParikhVariables(fa_a, 'a')
+        fa_b_variables = ParikhVariables(fa_b, 'b')
+        add_persistent_formulae_smtlib(smt, fa_a_variables, fa_b_variables, config)
+        add_selector_formulae(smt, fa_a_variables, fa_b_variables, config)
+        smtlib_time = time.perf_counter() - start
+
+        print(f"{larger},{smaller},{len(fa_a.states) + len(fa_b.states)},"
+              f"{len(fa_a_variables.y) + len(fa_b_variables.y)},{legacy_time:.6f},{tables_time:.6f},"
+              f"{legacy_time / tables_time if tables_time else 0.0:.2f},{smtlib_time:.6f}")
+
+
+def get_automata_pairs(config):
+    """Get pairs of automata paths from the tested combinations file, at most 'config.limit' pairs."""
+    with open(config.combinations) as combinations_file:
+        reader = csv.reader(combinations_file)
+        next(reader)  # Skip header.
+        pairs = [(row[0], row[1]) for row in reader if len(row) >= 2 and row[0] and row[1]]
+
+    return pairs[:config.limit] if config.limit else pairs
+
+
+def add_legacy_formulae(smt, fa, prefix, config):
+    """
+    Add Parikh image formulae for a single automaton with variables created from formatted strings.
+
+    The formulae are persistent formulae and state-specific formulae for the initial states of the automaton as
+    constructed before variables tables were introduced.
+    """
+    for state in fa.states:
+        smt.add(z3.Int('%s_u_%s' % (prefix, state)) + z3.Sum(
+            [z3.Int('%s_y_%s' % (prefix, transition)) for transition in fa.get_ingoing_transitions_names(state)]) -
+            z3.Sum([z3.Int('%s_y_%s' % (prefix, transition))
+                    for transition in fa.get_outgoing_transitions_names(state)]) == 0)
+
+    smt.add(z3.And([z3.Int('%s_y_%s' % (prefix, transition)) >= 0 for transition in fa.get_transitions_names()]))
+
+    for symbol in fa.alphabet:
+        smt.add(z3.Int('hash_%s' % symbol) == z3.Sum(
+            [z3.Int('%s_y_%s' % (prefix, transition)) for transition in fa.get_transitions_names_with_symbol(symbol)]))
+
+    for state in fa.states:
+        if state in fa.start:
+            smt.add(z3.Int('%s_u_%s' % (prefix, state)) == 1)
+        elif state in fa.final:
+            smt.add(z3.Int('%s_u_%s' % (prefix, state)) == -1)
+        else:
+            smt.add(z3.Int('%s_u_%s' % (prefix, state)) == 0)
+
+    if config.use_z_constraints:
+        direction = -1 if config.reverse_lengths else 1
+        for state in fa.states:
+            if (state in fa.final) if config.reverse_lengths else (state in fa.start):
+                smt.add(z3.Int('%s_z_%s' % (prefix, state)) == 1)
+            elif state not in fa.start:
+                smt.add(z3.Or(z3.And(z3.Int('%s_z_%s' % (prefix, state)) == 0,
+                        z3.And([z3.Int('%s_y_%s' % (prefix, transition)) == 0
+                        for transition in fa.get_ingoing_transitions_names(state)])),
+                        z3.Or([z3.And(z3.Int('%s_y_%s' % (prefix, transition)) > 0,
+                        z3.Int('%s_z_%s' % (prefix, transition.split('_')[0])) > 0,
+                        z3.Int('%s_z_%s' % (prefix, state)) ==
+                        z3.Int('%s_z_%s' % (prefix, transition.split('_')[0])) + direction)
+                        for transition in fa.get_ingoing_transitions_names(state)])))
+
+
+class BenchmarkConfig:
+    """Configuration of Parikh image formulae benchmark."""
+
+    def __init__(self, args):
+        self.combinations = args.combinations
+        self.automata_dir = args.automata_dir
+        self.limit = args.limit
+        self.reverse_lengths = not args.forward_lengths
+        self.use_z_constraints = not args.no_z_constraints
+
+
+def parse_args():
+    """Parse arguments using argparse."""
+    arg_parser = argparse.ArgumentParser(description='Benchmark construction of Parikh image formulae for tested '
+                                                     'pairs of automata.')
+    arg_parser.add_argument('--combinations', '-c', type=str, default='../results/combined_tested_combinations.csv',
+                            help='CSV file with tested pairs of larger and smaller automata.')
+    arg_parser.add_argument('--automata-dir', '-d', type=str, default='.',
+                            help='Directory the automata paths in the combinations file are relative to.')
+    arg_parser.add_argument('--limit', '-n', type=int, default=0,
+                            help='Benchmark at most the first LIMIT pairs, all pairs if 0.')
+    arg_parser.add_argument('--forward-lengths', '-f', action='store_true',
+                            help="Compute forward lengths 'z' for Parikh image.")
+    arg_parser.add_argument('--no-z-constraints', '-z', action='store_true',
+                            help='Compute formulae without constraints for connectivity of automaton.')
+
+    return BenchmarkConfig(arg_parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
+
+# End of file.
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+
+# file name: benchmark_reduction.py
+#
+# Script to measure reduction of automata by bisimulation or simulation and its speedup of the engines.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+import argparse
+import subprocess
+import sys
+import time
+
+import symboliclib
+
+from benchmark_strategies import get_automata_pairs
+from optifa.reduction import REDUCTIONS, reduce_automaton
+
+# Columns of the number of final product states and of the time of Parikh image (SMT) checks in the output of the
+# engines.
+FINAL_COLUMNS = {'parikh_image': 6, 'combined': 12}
+SMT_TIME_COLUMNS = {'parikh_image': 14, 'combined': 24}
+
+
+# Main script function.
+def main():
+    config = parse_args()  # Parse program arguments.
+
+    # Output format: <larger> <smaller> <reduction> <fa_a_ratio> <fa_b_ratio> <time_s> <product_time_s> <smt_time_s>
+    # <product_speedup> <smt_speedup> <non_empty>
+    # Product time is the time of the run without the SMT checks. Speedups are relative to the run without reduction.
+    print("larger,smaller,reduction,fa_a_ratio,fa_b_ratio,time_s,product_time_s,smt_time_s,product_speedup,"
+          "smt_speedup,non_empty")
+    for larger_path, smaller_path in get_automata_pairs(config):
+        if not larger_path.is_file() or not smaller_path.is_file():
+            print(f"skipping missing automata: {larger_path}, {smaller_path}", file=sys.stderr)
+            continue
+
+        base = run_engine(config, larger_path, smaller_path, None)
+        if base is None:
+            print(f"{larger_path},{smaller_path},none,,,,,,,,")
+            continue
+        print(f"{larger_path},{smaller_path},none,1.0000,1.0000,{base[0]:.6f},{base[1]:.6f},{base[2]:.6f},1.00,1.00,"
+              f"{base[3]}")
+
+        for reduction in config.reductions:
+            fa_a_ratio = reduce_automaton(symboliclib.parse(str(larger_path)), reduction)
+            fa_b_ratio = reduce_automaton(symboliclib.parse(str(smaller_path)), reduction)
+            result = run_engine(config, larger_path, smaller_path, reduction)
+            if result is None:
+                print(f"{larger_path},{smaller_path},{reduction},{fa_a_ratio:.4f},{fa_b_ratio:.4f},,,,,,")
+                continue
+
+            print(f"{larger_path},{smaller_path},{reduction},{fa_a_ratio:.4f},{fa_b_ratio:.4f},{result[0]:.6f},"
+                  f"{result[1]:.6f},{result[2]:.6f},{get_speedup(base[1], result[1])},"
+                  f"{get_speedup(base[2], result[2])},{result[3]}")
+
+
+def run_engine(config, larger_path, smaller_path, reduction):
+    """
+    Run emptiness test by the engine with the given reduction of the automata, none if None.
+
+    Returns:
+        tuple: Wall time, product time and SMT time of the run in seconds with non-emptiness of the product, None if
+            the run failed.
+    """
+    command = ["python3", f"resolve_satisfiability_{config.engine}.py", "-p", "-a", str(larger_path), "-b",
+               str(smaller_path), "--break-when-final"]
+    if reduction:
+        command.extend(["--reduction", reduction])
+
+    start = time.perf_counter()
+    try:
+        out = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+                             timeout=config.timeout)
+    except subprocess.TimeoutExpired:
+        return None
+    run_time = time.perf_counter() - start
+
+    if out.returncode:
+        return None
+
+    counters = out.stdout.strip().split(',')
+    smt_time = float(counters[SMT_TIME_COLUMNS[config.engine]])
+    return run_time, run_time - smt_time, smt_time, int(counters[FINAL_COLUMNS[config.engine]]) > 0
+
+
+def get_speedup(base_time, time_s):
+    """Get speedup of the time against the base time, empty if not measurable."""
+    if not time_s:
+        return ""
+    return f"{base_time / time_s:.2f}"
+
+
+class BenchmarkConfig:
+    """Configuration of reduction benchmark."""
+
+    def __init__(self, args):
+        self.basic_dir = args.basic_dir
+        self.combinations = args.combinations
+        self.automata_dir = args.automata_dir
+        self.limit = args.limit
+        self.engine = args.engine
+        self.reductions = args.reductions.split(',')
+        self.timeout = args.timeout
+
+        for reduction in self.reductions:
+            if reduction not in REDUCTIONS:
+                raise ValueError(f"unknown reduction '{reduction}'")
+
+
+def parse_args():
+    """Parse arguments using argparse."""
+    arg_parser = argparse.ArgumentParser(description='Measure reduction of automata by bisimulation or simulation '
+                                                     'and its speedup of the product and SMT phases.')
+    arg_parser.add_argument('--basic-dir', type=str, default='../basicDFAs',
+                            help='Directory with basic automata to test in all pairs, none if empty.')
+    arg_parser.add_argument('--combinations', '-c', type=str, default='../results/combined_tested_combinations.csv',
+                            help='CSV file with tested pairs of larger and smaller (ARMC) automata, none if empty.')
+    arg_parser.add_argument('--automata-dir', '-d', type=str, default='.',
+                            help='Directory the automata paths in the combinations file are relative to.')
+    arg_parser.add_argument('--limit', '-n', type=int, default=0,
+                            help='Benchmark at most the first LIMIT pairs of each source, all pairs if 0.')
+    arg_parser.add_argument('--engine', '-e', choices=tuple(FINAL_COLUMNS), default='parikh_image',
+                            help='Engine to run.')
+    arg_parser.add_argument('--reductions', '-r', type=str, default=','.join(REDUCTIONS),
+                            help='Comma-separated reductions to compare with the run without reduction.')
+    arg_parser.add_argument('--timeout', '-t', type=int, default=300,
+                            help='Timeout of a single run in seconds.')
+
+    return BenchmarkConfig(arg_parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
+
+# End of file.
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+
+# file name: benchmark_strategies.py
+#
+# Script to compare exploration strategies of product states in emptiness test.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+import argparse
+import csv
+import itertools
+from pathlib import Path
+import subprocess
+import sys
+import time
+
+from optifa.work_set import PairWorkSet
+
+# Columns of the number of final product states in the output of the engines.
+FINAL_COLUMNS = {'length_abstraction': 8, 'parikh_image': 6, 'combined': 12}
+
+
+# Main script function.
+def main():
+    config = parse_args()  # Parse program arguments.
+
+    # Output format: <larger> <smaller> <strategy> <time_s> <checked> <processed> <non_empty>
+    # Non-empty tells whether the run found a final product state.
+    print("larger,smaller,strategy,time_s,checked,processed,non_empty")
+    for larger_path, smaller_path in get_automata_pairs(config):
+        if not larger_path.is_file() or not smaller_path.is_file():
+            print(f"skipping missing automata: {larger_path}, {smaller_path}", file=sys.stderr)
+            continue
+
+        for strategy in config.strategies:
+            run_time, result = run_engine(config, larger_path, smaller_path, strategy)
+            if result is None:
+                print(f"{larger_path},{smaller_path},{strategy},,,,")
+                continue
+
+            print(f"{larger_path},{smaller_path},{strategy},{run_time:.6f},{','.join(result)}")
+
+
+def run_engine(config, larger_path, smaller_path, strategy):
+    """
+    Run emptiness test by the engine with the given exploration strategy.
+
+    Returns:
+        tuple: Wall time of the run in seconds and checked and processed product states with non-emptiness of the
+            product, None if the run failed.
+    """
+    command = ["python3", f"resolve_satisfiability_{config.engine}.py", "-p", "-a", str(larger_path), "-b",
+               str(smaller_path), "--break-when-final", "--strategy", strategy]
+
+    start = time.perf_counter()
+    try:
+        out = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+                             timeout=config.timeout)
+    except subprocess.TimeoutExpired:
+        return None, None
+    run_time = time.perf_counter() - start
+
+    if out.returncode:
+        return None, None
+
+    counters = out.stdout.strip().split(',')
+    return run_time, [counters[0], counters[1], str(int(counters[FINAL_COLUMNS[config.engine]]) > 0)]
+
+
+def get_automata_pairs(config):
+    """
+    Get pairs of automata paths: all pairs of automata in the basic automata directory followed by the pairs from the
+    tested combinations file, at most 'config.limit' pairs of each.
+    """
+    pairs = []
+    if config.basic_dir:
+        basic_automata = sorted(path for path in Path(config.basic_dir).iterdir()
+                                if path.is_file() and not path.suffix)
+        basic_pairs = list(itertools.combinations(basic_automata, 2))
+        pairs.extend(basic_pairs[:config.limit] if config.limit else basic_pairs)
+
+    if config.combinations:
+        with open(config.combinations) as combinations_file:
+            reader = csv.reader(combinations_file)
+            next(reader)  # Skip header.
+            combination_pairs = [(Path(config.automata_dir) / row[0], Path(config.automata_dir) / row[1])
+                                 for row in reader if len(row) >= 2 and row[0] and row[1]]
+        pairs.extend(combination_pairs[:config.limit] if config.limit else combination_pairs)
+
+    return pairs
+
+
+class BenchmarkConfig:
+    """Configuration of exploration strategies benchmark."""
+
+    def __init__(self, args):
+        self.basic_dir = args.basic_dir
+        self.combinations = args.combinations
+        self.automata_dir = args.automata_dir
+        self.limit = args.limit
+        self.engine = args.engine
+        self.strategies = args.strategies.split(',')
+        self.timeout = args.timeout
+
+        for strategy in self.strategies:
+            if strategy not in PairWorkSet.STRATEGIES:
+                raise ValueError(f"unknown exploration strategy '{strategy}'")
+
+
+def parse_args():
+    """Parse arguments using argparse."""
+    arg_parser = argparse.ArgumentParser(description='Compare exploration strategies of product states in emptiness '
+                                                     'test.')
+    arg_parser.add_argument('--basic-dir', type=str, default='../basicDFAs',
+                            help='Directory with basic automata to test in all pairs, none if empty.')
+    arg_parser.add_argument('--combinations', '-c', type=str, default='../results/combined_tested_combinations.csv',
+                            help='CSV file with tested pairs of larger and smaller (ARMC) automata, none if empty.')
+    arg_parser.add_argument('--automata-dir', '-d', type=str, default='.',
+                            help='Directory the automata paths in the combinations file are relative to.')
+    arg_parser.add_argument('--limit', '-n', type=int, default=0,
+                            help='Benchmark at most the first LIMIT pairs of each source, all pairs if 0.')
+    arg_parser.add_argument('--engine', '-e', choices=tuple(FINAL_COLUMNS), default='parikh_image',
+                            help='Engine to run.')
+    arg_parser.add_argument('--strategies', '-s', type=str, default=','.join(PairWorkSet.STRATEGIES),
+                            help='Comma-separated exploration strategies to run the engine with.')
+    arg_parser.add_argument('--timeout', '-t', type=int, default=300,
+                            help='Timeout of a single run in seconds.')
+
+    return BenchmarkConfig(arg_parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
+
+# End of file.
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+
+# file name: benchmark_workers.py
+#
+# Script to report speedup of product construction by the number of worker processes checking satisfiability.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+import argparse
+import csv
+from pathlib import Path
+import subprocess
+import sys
+import time
+
+
+# Main script function.
+def main():
+    config = parse_args()  # Parse program arguments.
+
+    # Output format: <larger> <smaller> <workers> <time_s> <speedup> <matches>
+    # Speedup is relative to the run with the first number of workers, matches tells whether the run constructed
+    # the same product as the run with the first number of workers.
+    print("larger,smaller,workers,time_s,speedup,matches")
+    for larger, smaller in get_automata_pairs(config):
+        larger_path = Path(config.automata_dir) / larger
+        smaller_path = Path(config.automata_dir) / smaller
+        if not larger_path.is_file() or not smaller_path.is_file():
+            print(f"skipping missing automata: {larger}, {smaller}", file=sys.stderr)
+            continue
+
+        base_time = None
+        base_result = None
+        for workers in config.workers:
+            run_time, result = run_engine(config, larger_path, smaller_path, workers)
+            if result is None:
+                print(f"{larger},{smaller},{workers},,,")
+                continue
+
+            if base_time is None:
+                base_time = run_time
+                base_result = result
+
+            print(f"{larger},{smaller},{workers},{run_time:.6f},{base_time / run_time if run_time else 0.0:.2f},"
+                  f"{result == base_result}")
+
+
+def run_engine(config, larger_path, smaller_path, workers):
+    """
+    Run the engine with the given number of worker processes.
+
+    Returns:
+        tuple: Wall time of the run in seconds and counters of the product construction, None if the run failed.
+    """
+    command = ["python3", f"resolve_satisfiability_{config.engine}.py", "-p", "-a", str(larger_path), "-b",
+               str(smaller_path), "--workers", str(workers)]
+    if config.break_when_final:
+        command.append("--break-when-final")
+
+    start = time.perf_counter()
+    try:
+        out = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+                             timeout=config.timeout)
+    except subprocess.TimeoutExpired:
+        return None, None
+    run_time = time.perf_counter() - start
+
+    if out.returncode:
+        return None, None
+
+    # Checked, processed, satisfiable, unsatisfiable and skipped product states.
+    return run_time, out.stdout.strip().split(',')[:5]
+
+
+def get_automata_pairs(config):
+    """Get pairs of automata paths from the tested combinations file, at most 'config.limit' pairs."""
+    with open(config.combinations) as combinations_file:
+        reader = csv.reader(combinations_file)
+        next(reader)  # Skip header.
+        pairs = [(row[0], row[1]) for row in reader if len(row) >= 2 and row[0] and row[1]]
+
+    return pairs[:config.limit] if config.limit else pairs
+
+
+class BenchmarkConfig:
+    """Configuration of worker processes benchmark."""
+
+    def __init__(self, args):
+        self.combinations = args.combinations
+        self.automata_dir = args.automata_dir
+        self.limit = args.limit
+        self.engine = args.engine
+        self.workers = [int(workers) for workers in args.workers.split(',')]
+        self.break_when_final = args.break_when_final
+        self.timeout = args.timeout
+
+
+def parse_args():
+    """Parse arguments using argparse."""
+    arg_parser = argparse.ArgumentParser(description='Report speedup of product construction by the number of worker '
+                                                     'processes checking satisfiability of product states.')
+    arg_parser.add_argument('--combinations', '-c', type=str, default='../results/combined_tested_combinations.csv',
+                            help='CSV file with tested pairs of larger and smaller automata.')
+    arg_parser.add_argument('--automata-dir', '-d', type=str, default='.',
+                            help='Directory the automata paths in the combinations file are relative to.')
+    arg_parser.add_argument('--limit', '-n', type=int, default=0,
+                            help='Benchmark at most the first LIMIT pairs, all pairs if 0.')
+    arg_parser.add_argument('--engine', '-e', choices=('parikh_image', 'combined'), default='parikh_image',
+                            help='Engine to run.')
+    arg_parser.add_argument('--workers', '-w', type=str, default='1,2,4,8',
+                            help='Comma-separated numbers of worker processes to run the engine with.')
+    arg_parser.add_argument('--break-when-final', '-r', action='store_true',
+                            help='Run emptiness test instead of full product construction.')
+    arg_parser.add_argument('--timeout', '-t', type=int, default=300,
+                            help='Timeout of a single run in seconds.')
+
+    return BenchmarkConfig(arg_parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
+
+# End of file.
@@ -20,16 +20,35 @@ import pickle
 import symboliclib
 from lfa import LFA
 from optifa.basic import *
+from optifa.bidirectional import BidirectionalSearch
+from optifa.compact import CompactAutomaton
+from optifa.partition import PartitionedExploration
 from optifa.program_config import ProductConstructionConfig, ProductConstructionArgumentsParser
 
 
 # Main script function
 def main():
-    config = ArgumentsParser.get_config(ProductConstructionConfig)  # Parse program arguments.
+    config = ArgumentsParser.get_config(Config)  # Parse program arguments.
 
     # Run for emptiness test with break_when_final == True or
     # for full product construction with break_when_final == False.
-    intersection = config.fa_a_orig.intersection_count(config.fa_b_orig, config.break_when_final)
+    if config.bidirectional:
+        # Emptiness is tested by searching forward from the initial and backward from the final product states.
+        fa_a_compact, fa_b_compact = CompactAutomaton.from_lfa_pair(config.fa_a_orig, config.fa_b_orig)
+        search = BidirectionalSearch(fa_a_compact, fa_b_compact)
+        search.run()
+        intersection = search.product.to_lfa()
+        intersection.start = {a_state + ',' + b_state for a_state in config.fa_a_orig.start
+                              for b_state in config.fa_b_orig.start}
+    elif config.partitions > 1:
+        # Product states are explored by worker processes owning hash partitions of the product.
+        fa_a_compact, fa_b_compact = CompactAutomaton.from_lfa_pair(config.fa_a_orig, config.fa_b_orig)
+        exploration = PartitionedExploration(fa_a_compact, fa_b_compact, config.partitions, config.break_when_final)
+        intersection = exploration.run().to_lfa()
+        intersection.start = {a_state + ',' + b_state for a_state in config.fa_a_orig.start
+                              for b_state in config.fa_b_orig.start}
+    else:
+        intersection = config.fa_a_orig.intersection_count(config.fa_b_orig, config.break_when_final)
     print_csv(len(intersection.states))
     print_csv(len(intersection.final))
 
@@ -45,6 +64,24 @@ class ArgumentsParser(ProductConstructionArgumentsParser):
         self.arg_parser.description = 'Construct product (intersection) of two finite automata using basic naive ' \
                                       'product construction algorithm. '
 
+        # Define script-specific arguments.
+        self.arg_parser.add_argument('--bidirectional', action='store_true',
+                                     help='Test emptiness by searching the product forward from the initial and '
+                                          'backward from the final product states.')
+        self.arg_parser.add_argument('--partitions', metavar='PARTITIONS', type=int, default=1,
+                                     help='Explore the product by PARTITIONS worker processes owning hash partitions '
+                                          'of the product states.')
+
+
+class Config(ProductConstructionConfig):
+    """Class for storing program configurations passed as command line arguments."""
+
+    def __init__(self, args):
+        super().__init__(args)
+
+        self.partitions = args.partitions
+        self.bidirectional = args.bidirectional
+
 
 if __name__ == "__main__":
     main()
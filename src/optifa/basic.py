@@ -11,13 +11,19 @@
 from pathlib import Path
 import sys
 from collections import deque
+import functools
 import itertools
 import math
+import time
 
 import z3
 
 import symboliclib
 
+from optifa.compact import CompactAutomaton
+from optifa.parikh import ParikhVariables
+from optifa.length_satisfiability import check_length_formulae, get_length_formulae, solve_length_formulae
+
 
 def print_csv(message):
     """
@@ -37,7 +43,27 @@ def print_error(message, err_code=1):
     sys.exit(err_code)
 
 
-def make_pairs(fa_a_orig, fa_b_orig, q_pair_states, q_checked_pairs, intersect, curr_state, single_pair=False):
+def make_pairs(fa_a_orig, fa_b_orig, q_pair_states, q_checked_pairs, intersect, curr_state, single_pair=False,
+               antichain=None):
+    """
+    Generate successors of the current product state and push the unchecked ones to the work set.
+
+    Parameters:
+        fa_a_orig (symboliclib.LFA): First finite automaton.
+        fa_b_orig (symboliclib.LFA): Second finite automaton.
+        q_pair_states (optifa.work_set.PairWorkSet): Work set of product states to be processed.
+        q_checked_pairs (dict): Product states already pushed to the work set.
+        intersect (symboliclib.LFA): Product automaton to add the transitions to.
+        curr_state (list): Current product state as a work set entry.
+        single_pair (bool): Mark all generated product states as skippable.
+        antichain (optifa.simulation.ProductAntichain): Antichain of explored product states of compact automata to
+            skip the subsumed product states, None to push all unchecked product states.
+    """
+    if isinstance(fa_a_orig, CompactAutomaton):
+        make_compact_pairs(fa_a_orig, fa_b_orig, q_pair_states, q_checked_pairs, intersect, curr_state, single_pair,
+                           antichain)
+        return
+
     a_state = curr_state[0]
     b_state = curr_state[1]
     product_state_name = a_state + ',' + b_state
@@ -67,18 +93,76 @@ def make_pairs(fa_a_orig, fa_b_orig, q_pair_states, q_checked_pairs, intersect,
     if new_pairs_cnt == 1:
         single_pair = True
 
-    # Append new product states to work set, optionally update the work set elements.
+    # Push new product states to work set, optionally upgrade the skip flag of already pending product states.
     for new_pair in new_pairs:
         # Add state to checked states.
         q_checked_pairs[new_pair[0] + ',' + new_pair[1]] = True
 
-        if [new_pair[0], new_pair[1], True] in q_pair_states:
-            pass
-        elif [new_pair[0], new_pair[1], False] in q_pair_states and single_pair:
-            id = q_pair_states.index([new_pair[0], new_pair[1], False])
-            q_pair_states[id][2] = True
-        else:
-            q_pair_states.append([new_pair[0], new_pair[1], single_pair])
+        q_pair_states.push(new_pair[0], new_pair[1], single_pair)
+
+
+def make_compact_pairs(fa_a, fa_b, q_pair_states, q_checked_pairs, intersect, curr_state, single_pair=False,
+                       antichain=None):
+    """
+    Generate successors of the current product state of compact automata and push the unchecked ones to the work set.
+
+    Parameters:
+        fa_a (optifa.compact.CompactAutomaton): First finite automaton.
+        fa_b (optifa.compact.CompactAutomaton): Second finite automaton sharing the symbol table with 'fa_a'.
+        q_pair_states (optifa.work_set.PairWorkSet): Work set of product states to be processed.
+        q_checked_pairs (dict): Product states (as integers) already reached, True if pushed to the work set, False if
+            skipped as subsumed.
+        intersect (optifa.compact.CompactProduct): Product automaton to add the transitions to.
+        curr_state (list): Current product state as a work set entry.
+        single_pair (bool): Mark all generated product states as skippable.
+        antichain (optifa.simulation.ProductAntichain): Antichain of explored product states to skip the subsumed
+            product states, None to push all unchecked product states.
+    """
+    a_state = curr_state[0]
+    b_state = curr_state[1]
+    b_states_cnt = intersect.b_states_cnt
+    product_transitions = intersect.transitions[a_state * b_states_cnt + b_state]
+
+    new_pairs = []
+    new_pairs_cnt = 0
+
+    for a_entry in range(fa_a.rows[a_state], fa_a.rows[a_state + 1]):
+        label = fa_a.row_symbols[a_entry]
+        b_entry = fa_b.find_entry(b_state, label)
+        if b_entry < 0:
+            continue
+
+        b_targets = fa_b.get_targets(b_entry)
+        for a_target in fa_a.get_targets(a_entry):
+            a_target_offset = a_target * b_states_cnt
+            for b_target in b_targets:
+                endstate = a_target_offset + b_target
+                product_transitions.append(label)
+                product_transitions.append(endstate)
+
+                new_pairs_cnt += 1
+                if endstate not in q_checked_pairs:
+                    new_pairs.append((a_target, b_target, endstate))
+
+    # If only a single new product state was generated, set this state as skippable.
+    if new_pairs_cnt == 1:
+        single_pair = True
+
+    # Push new product states to work set, optionally upgrade the skip flag of already pending product states.
+    for a_target, b_target, endstate in new_pairs:
+        if antichain is not None:
+            if endstate in q_checked_pairs:
+                continue
+            if antichain.is_subsumed(a_target, b_target):
+                # Subsumed product states stay subsumed, hence they are not tested again.
+                q_checked_pairs[endstate] = False
+                continue
+            antichain.add(a_target, b_target)
+
+        # Add state to checked states.
+        q_checked_pairs[endstate] = True
+
+        q_pair_states.push(a_target, b_target, single_pair)
 
 
 def enqueue_next_states(q_states, fa_orig, curr_state):
@@ -90,191 +174,258 @@ def enqueue_next_states(q_states, fa_orig, curr_state):
                 q_states.append(state)
 
 
-def add_persistent_formulae(smt, fa_a_orig, fa_b_orig, config):
+def add_persistent_formulae(smt, fa_a_variables, fa_b_variables, config):
     """
     Add persistent formulae valid for every product state.
 
     Parameters:
         smt (smt.Solver): Smt solver to solve Parikh image satisfiability.
-        fa_a_orig (symboliclib.LFA): First finite automaton.
-        fa_b_orig (symboliclib.LFA): Second finite automaton.
+        fa_a_variables (optifa.ParikhVariables): Parikh image variables of the first finite automaton.
+        fa_b_variables (optifa.ParikhVariables): Parikh image variables of the second finite automaton.
         config (optifa.ProgramConfig): Configuration of Parikh image computation.
     """
+    add_automaton_persistent_formulae(smt, fa_a_variables, config)
+    add_automaton_persistent_formulae(smt, fa_b_variables, config)
 
-    # FA A: First conjunct.
-    for state in fa_a_orig.states:
-        smt.add(z3.Int('a_u_%s' % state) + z3.Sum(
-            [z3.Int('a_y_%s' % transition) for transition in fa_a_orig.get_ingoing_transitions_names(state)]) - z3.Sum(
-            [z3.Int('a_y_%s' % transition) for transition in fa_a_orig.get_outgoing_transitions_names(state)]) == 0)
+    # End of SMT formulae initialization.
 
-    # FA B: First conjunct.
-    for state in fa_b_orig.states:
-        smt.add(z3.Int('b_u_%s' % state) + z3.Sum(
-            [z3.Int('b_y_%s' % transition) for transition in fa_b_orig.get_ingoing_transitions_names(state)]) - z3.Sum(
-            [z3.Int('b_y_%s' % transition) for transition in fa_b_orig.get_outgoing_transitions_names(state)]) == 0)
 
-    # FA A: Second conjunct.
-    smt.add(z3.And([z3.Int('a_y_%s' % transition) >= 0 for transition in fa_a_orig.get_transitions_names()]))
+def add_automaton_persistent_formulae(smt, variables, config):
+    """
+    Add persistent formulae for a single automaton.
 
-    # FA B: Second conjunct.
-    smt.add(z3.And([z3.Int('b_y_%s' % transition) >= 0 for transition in fa_b_orig.get_transitions_names()]))
+    See 'add_persistent_formulae()' for details.
+    """
+    y = variables.y
+    z = variables.z
 
-    # FA A: Third conjunct.
-    for symbol in fa_a_orig.alphabet:
-        smt.add(z3.Int('hash_%s' % symbol) == z3.Sum(
-            [z3.Int('a_y_%s' % transition) for transition in fa_a_orig.get_transitions_names_with_symbol(symbol)]))
+    # First conjunct.
+    for state in range(len(variables.states)):
+        smt.add(variables.u[state] + z3.Sum(variables.get_ingoing_y(state))
+                - z3.Sum(variables.get_outgoing_y(state)) == 0)
 
-    # FA B: Third conjunct.
-    for symbol in fa_b_orig.alphabet:
-        smt.add(z3.Int('hash_%s' % symbol) == z3.Sum(
-            [z3.Int('b_y_%s' % transition) for transition in fa_b_orig.get_transitions_names_with_symbol(symbol)]))
+    # Second conjunct.
+    smt.add(z3.And([y_transition >= 0 for y_transition in y]))
+
+    # Third conjunct.
+    for symbol in variables.alphabet:
+        smt.add(variables.hash[symbol] == z3.Sum([y[transition] for transition in variables.with_symbol[symbol]]))
 
     if config.reverse_lengths:
         if config.use_z_constraints:
-            # FA A: Fourth conjunct.
-            for state in fa_a_orig.states:
-                if state in fa_a_orig.final:
-                    smt.add(z3.Int('a_z_%s' % state) == 1)
-                    smt.add(z3.And([z3.Int('a_y_%s' % transition) >= 0 for transition in
-                                 fa_a_orig.get_outgoing_transitions_names(state)]))
-
-                if state not in fa_a_orig.start and state not in fa_a_orig.final:
-                    smt.add(z3.Or(z3.And(z3.And(z3.Int('a_z_%s' % state) == 0),
-                                  z3.And([z3.Int('a_y_%s' % transition) == 0
-                                  for transition in fa_a_orig.get_ingoing_transitions_names(state)])),
-                                  z3.Or([z3.And(z3.Int('a_y_%s' % transition) >= 0,
-                                  z3.Int('a_z_%s' % transition.split('_')[0]) > 0,
-                                  z3.Int('a_z_%s' % state) == z3.Int('a_z_%s' % transition.split('_')[0]) - 1)
-                                  for transition in fa_a_orig.get_ingoing_transitions_names(state)])))
-
-            # FA B: Fourth conjunct.
-            for state in fa_b_orig.states:
-                if state in fa_b_orig.final:
-                    smt.add(z3.Int('b_z_%s' % state) == 1)
-                    smt.add(z3.And([z3.Int('b_y_%s' % transition) >= 0 for transition in
-                                 fa_b_orig.get_outgoing_transitions_names(state)]))
-
-                if state not in fa_b_orig.start and state not in fa_a_orig.final:
-                    smt.add(z3.Or(z3.And(z3.And(z3.Int('b_z_%s' % state) == 0),
-                            z3.And([z3.Int('b_y_%s' % transition) == 0
-                            for transition in fa_b_orig.get_ingoing_transitions_names(state)])),
-                            z3.Or([z3.And(z3.Int('b_y_%s' % transition) >= 0,
-                            z3.Int('b_z_%s' % transition.split('_')[0]) > 0,
-                            z3.Int('b_z_%s' % state) == z3.Int('b_z_%s' % transition.split('_')[0]) - 1)
-                            for transition in fa_b_orig.get_ingoing_transitions_names(state)])))
+            # Fourth conjunct.
+            for state in range(len(variables.states)):
+                if state in variables.final:
+                    smt.add(z[state] == 1)
+                    smt.add(z3.And([y_transition >= 0 for y_transition in variables.get_outgoing_y(state)]))
+
+                if state not in variables.start and state not in variables.final:
+                    smt.add(z3.Or(z3.And(z3.And(z[state] == 0),
+                                         z3.And([y[transition] == 0 for transition in variables.ingoing[state]])),
+                                  z3.Or([z3.And(y[transition] >= 0,
+                                                z[variables.sources[transition]] > 0,
+                                                z[state] == z[variables.sources[transition]] - 1)
+                                         for transition in variables.ingoing[state]])))
+
+
+def add_selector_formulae(smt, fa_a_variables, fa_b_variables, config):
+    """
+    Add formulae for the initial states chosen by pre-asserted selector literals.
 
-    # End of SMT formulae initialization.
+    Every state 'q' of FA A (FA B) has a selector literal 'a_s_q' ('b_s_q') choosing it as the initial state of the
+    run, at most one selector per automaton may be true. The state-specific formulae are asserted once for all states
+    guarded by the selectors, hence checking a product state is a single 'smt.check()' with the two selectors of its
+    states passed as assumptions (see 'ParikhVariables.get_selector()').
 
+    Parameters:
+        smt (smt.Solver): Smt solver to solve Parikh image satisfiability.
+        fa_a_variables (optifa.ParikhVariables): Parikh image variables of the first finite automaton.
+        fa_b_variables (optifa.ParikhVariables): Parikh image variables of the second finite automaton.
+        config (optifa.ProgramConfig): Configuration of Parikh image computation.
+    """
+    add_automaton_selector_formulae(smt, fa_a_variables, config)
+    add_automaton_selector_formulae(smt, fa_b_variables, config)
 
-def add_state_specific_formulae(smt, fa_a, fa_b, config):
+
+def add_automaton_selector_formulae(smt, variables, config):
     """
-    Add formulae specific for the current states (initial, final and the rest) in the original automata.
+    Add selector formulae for a single automaton.
+
+    See 'add_selector_formulae()' for details.
     """
+    y = variables.y
+    z = variables.z
+    selectors = variables.selectors
+    smt.add(z3.AtMost(*selectors, 1))
+
     # Constraints for 'u_q'.
-    for state in fa_a.states:
-        if state in fa_a.start:
-            smt.add(z3.Int('a_u_%s' % state) == 1)
-        elif state in fa_a.final:
-            # smt.add(z3.Or( a_u_q[i] == -1, a_u_q[i] == 0))
-            smt.add(z3.Int('a_u_%s' % state) == -1)
-        else:
-            smt.add(z3.Int('a_u_%s' % state) == 0)
-
-    for state in fa_b.states:
-        if state in fa_b.start:
-            smt.add(z3.Int('b_u_%s' % state) == 1)
-        elif state in fa_b.final:
-            # smt.add(z3.Or( b_u_q[i] == -1, b_u_q[i] == 0))
-            smt.add(z3.Int('b_u_%s' % state) == -1)
-        else:
-            smt.add(z3.Int('b_u_%s' % state) == 0)
+    for state in range(len(variables.states)):
+        smt.add(variables.u[state] == z3.If(selectors[state], 1, -1 if state in variables.final else 0))
 
     if not config.reverse_lengths:
         if config.use_z_constraints:
-            # FA A: Fourth conjunct.
-            for state in fa_a.states:
-                if state in fa_a.start:
-                    smt.add(z3.Int('a_z_%s' % state) == 1)
-                    smt.add(z3.And([z3.Int('a_y_%s' % transition) >= 0
-                            for transition in fa_a.get_ingoing_transitions_names(state)]))
-                else:
-                    smt.add(z3.Or(z3.And(z3.And(z3.Int('a_z_%s' % state) == 0),
-                            z3.And([z3.Int('a_y_%s' % transition) == 0
-                            for transition in fa_a.get_ingoing_transitions_names(state)])),
-                            z3.Or([z3.And(z3.Int('a_y_%s' % transition) > 0,
-                            z3.Int('a_z_%s' % transition.split('_')[0]) > 0,
-                            z3.Int('a_z_%s' % state) == z3.Int('a_z_%s' % transition.split('_')[0]) + 1)
-                            for transition in fa_a.get_ingoing_transitions_names(state)])))
-
-            # FA B: Fourth conjunct.
-            for state in fa_b.states:
-                if state in fa_b.start:
-                    smt.add(z3.Int('b_z_%s' % state) == 1)
-                    smt.add(z3.And([z3.Int('b_y_%s' % transition) >= 0 for transition in
-                                 fa_b.get_ingoing_transitions_names(state)]))
-                else:
-                    smt.add(z3.Or(z3.And(z3.And(z3.Int('b_z_%s' % state) == 0),
-                            z3.And([z3.Int('b_y_%s' % transition) == 0
-                            for transition in fa_b.get_ingoing_transitions_names(state)])),
-                            z3.Or([z3.And(z3.Int('b_y_%s' % transition) > 0,
-                            z3.Int('b_z_%s' % transition.split('_')[0]) > 0,
-                            z3.Int('b_z_%s' % state) == z3.Int('b_z_%s' % transition.split('_')[0]) + 1)
-                            for transition in fa_b.get_ingoing_transitions_names(state)])))
-
-    # Allow multiple final states.
-    # FA A: At least one of the final state is reached.
-    # smt.add( z3.Or( [ z3.Or( z3.Int('a_u_%s' % state) == -1 , z3.Int('a_u_%s' % state) == 0 ) for state in fa_a.final ] ) )
-    # smt.add( z3.Or( [ z3.Int('a_u_%s' % state) == -1 for state in fa_b.final ] ) )
-    # FA B: At least one of the final state is reached.
-    # smt.add( z3.Or( [ z3.Or( z3.Int('b_u_%s' % state) == -1 , z3.Int('b_u_%s' % state) == 0 ) for state in fa_b.final ] ) )
-    # smt.add( z3.Or( [ z3.Int('b_u_%s' % state) == -1 for state in fa_b.final ] ) )
-
-    # Allow multiple inital states.
-    # FA A: Choose only one inital state for a run.
-    # smt.add( z3.Or( [ z3.And( z3.Int('a_u_%s' % state) == 1, z3.Int('a_z_%s' % state) == 1, z3.And( [ z3.And( z3.Int('a_u_%s' % other_state) == 0, z3.Int('a_z_%s' % other_state) == 0 ) for other_state in fa_a.start if other_state != state ] ) ) for state in fa_a.start ] ) )
-
-    # FA B: Choose only one inital state for a run.
-    # smt.add( z3.Or( [ z3.And( z3.Int('b_u_%s' % state) == 1, z3.Int('b_z_%s' % state) == 1, z3.And( [ z3.And( z3.Int('b_u_%s' % other_state) == 0, z3.Int('b_z_%s' % other_state) == 0 ) for other_state in fa_b.start if other_state != state ] ) ) for state in fa_b.start ] ) )
-
-
-def check_length_satisfiability(config, fa_a_formulae_dict, fa_b_formulae_dict):
+            # Fourth conjunct.
+            for state in range(len(variables.states)):
+                smt.add(z3.Implies(selectors[state], z[state] == 1))
+                smt.add(z3.Implies(z3.Not(selectors[state]),
+                                   z3.Or(z3.And(z[state] == 0,
+                                                z3.And([y[transition] == 0
+                                                        for transition in variables.ingoing[state]])),
+                                         z3.Or([z3.And(y[transition] > 0,
+                                                       z[variables.sources[transition]] > 0,
+                                                       z[state] == z[variables.sources[transition]] + 1)
+                                                for transition in variables.ingoing[state]]))))
+
+
+def add_scc_formulae(smt, fa_a_variables, fa_b_variables):
+    """
+    Add connectivity formulae for strongly connected components instead of 'z' formulae for states.
+
+    A strongly connected component without the initial state of the run can be used only when a transition entering
+    the component from another component is used. As the condensation of components is acyclic, every used component
+    is connected to the initial state at the level of components. Connectivity inside a component is not constrained,
+    hence the formulae over-approximate the 'z' formulae; lazy connectivity cuts make them exact.
+
+    Parameters:
+        smt (smt.Solver): Smt solver to solve Parikh image satisfiability.
+        fa_a_variables (optifa.ParikhVariables): Parikh image variables of the first finite automaton.
+        fa_b_variables (optifa.ParikhVariables): Parikh image variables of the second finite automaton.
+    """
+    for variables in (fa_a_variables, fa_b_variables):
+        for scc in variables.get_sccs():
+            if any(variables.outgoing[state] for state in scc):
+                smt.add(variables.get_cut_formula(scc))
+
+
+def check_parikh_image_satisfiability(smt, fa_a_variables, fa_b_variables, a_state, b_state, config, model_pool=None,
+                                      portfolio=None, budget=None):
+    """
+    Check satisfiability of Parikh image formulae for the product state with the given initial states.
+
+    With lazy connectivity constraints, the formulae are solved without 'z' constraints first. While the support of
+    the model is not connected to the initial states, cuts excluding the disconnected components are asserted and the
+    formulae are solved again, which ends with the precision of the full encoding.
+
+    With a model pool, the solver is called only when no recent satisfying model fits the product state, satisfying
+    models are added to the pool.
+
+    When the formulae are unsatisfiable, the unsat core over the selectors of the initial states tells whether the
+    state of one automaton alone makes the formulae unsatisfiable. Such a state is recorded as dead and every following
+    product state with the state is rejected without calling the solver.
+
+    With a portfolio, the formulae the solver did not decide, e.g., after a timeout, are decided by the portfolio.
+
+    With a budget, time of every solver check is recorded in the budget, time of the portfolio is only spent from it.
+    A portfolio query gets at most the remaining budget and it is not run when the budget is spent.
+
+    Parameters:
+        smt (smt.Solver): Smt solver with persistent and selector formulae.
+        fa_a_variables (optifa.ParikhVariables): Parikh image variables of the first finite automaton.
+        fa_b_variables (optifa.ParikhVariables): Parikh image variables of the second finite automaton.
+        a_state (str): State of the first automaton to start the run in.
+        b_state (str): State of the second automaton to start the run in.
+        config (optifa.ProgramConfig): Configuration of Parikh image computation.
+        model_pool (optifa.ParikhModelPool): Pool of recent satisfying models.
+        portfolio (optifa.ParikhPortfolio): Portfolio of solver configurations for undecided formulae.
+        budget (optifa.SmtBudget): Budget of time for checks of integer formulae.
+
+    Returns:
+        z3.CheckSatResult: Result of the SMT solver.
+    """
+    if a_state in fa_a_variables.dead_states:
+        fa_a_variables.dead_hits += 1
+        return z3.unsat
+    if b_state in fa_b_variables.dead_states:
+        fa_b_variables.dead_hits += 1
+        return z3.unsat
+
+    if model_pool is not None and model_pool.find(a_state, b_state):
+        return z3.sat
+
+    check = smt.check if budget is None else functools.partial(budget.check, smt)
+    assumptions = (fa_a_variables.get_selector(a_state), fa_b_variables.get_selector(b_state))
+    res = check(*assumptions)
+
+    if config.lazy_z_constraints:
+        while res == z3.sat:
+            model = smt.model()
+            cuts = fa_a_variables.get_connectivity_cuts(model, a_state) + \
+                fa_b_variables.get_connectivity_cuts(model, b_state)
+            if not cuts:
+                break
+
+            smt.add(cuts)
+            res = check(*assumptions)
+
+    if res == z3.unknown and portfolio is not None:
+        # The portfolio gives neither a model nor an unsat core.
+        if budget is None:
+            return portfolio.check(a_state, b_state)
+
+        timeout = int(budget.get_remaining())
+        if timeout < 1:
+            return res
+        start = time.perf_counter()
+        res = portfolio.check(a_state, b_state, timeout)
+        budget.spend((time.perf_counter() - start) * 1000)
+        return res
+
+    if model_pool is not None and res == z3.sat:
+        model_pool.add(smt.model(), a_state, b_state)
+    elif res == z3.unsat:
+        # Cuts asserted later only strengthen the formulae, hence the dead states stay dead.
+        core = smt.unsat_core()
+        if not any(assumptions[1].eq(literal) for literal in core):
+            fa_a_variables.dead_states.add(a_state)
+        if not any(assumptions[0].eq(literal) for literal in core):
+            fa_b_variables.dead_states.add(b_state)
+
+    return res
+
+
+def check_length_satisfiability(config, fa_a_formulae_dict, fa_b_formulae_dict, cache=None):
     """
     Check satisfiability for length abstraction formulae using SMT solver Z3.
     :param fa_a_formulae_dict: Dictionary with formulae for FA A.
     :param fa_b_formulae_dict: Dictionary with formulae for FA B.
+    :param cache: Optional 'LengthSatisfiabilityCache' with results for already checked formulae sets.
     :return: True if satisfiable; False if not satisfiable.
     """
-    if not config.smt_free:
-        smt = z3.Solver()
-        fa_a_var = z3.Int('fa_a_var')
-        fa_b_var = z3.Int('fa_b_var')
-        smt.add(fa_a_var >= 0, fa_b_var >= 0)
+    if config.smt_free:  # Without using SMT solver, decide all formulae combinations arithmetically.
+        check_formulae = check_length_formulae
+    else:
+        check_formulae = check_length_formulae_smt
 
-    # Check for every formulae combination.
-    for fa_a_id in get_only_formulae(fa_a_formulae_dict):
-        for fa_b_id in get_only_formulae(fa_b_formulae_dict):
-            if config.smt_free:  # Without using SMT solver.
-                # Handle legths are equal, True without the need to resolve loops.
-                if fa_a_id[0] == fa_b_id[0]:
-                    return True
+    fa_a_formulae = get_length_formulae(fa_a_formulae_dict)
+    fa_b_formulae = get_length_formulae(fa_b_formulae_dict)
+    if cache is not None:
+        return cache.check(fa_a_formulae, fa_b_formulae, check_formulae)
+
+    return check_formulae(fa_a_formulae, fa_b_formulae)
 
-                # Handle lengths are distinct, further checking needed.
-                elif fa_a_id[0] > fa_b_id[0]:  # FA A handle is longer.
-                    if solve_for_one_handle_longer(fa_a_id, fa_b_id):
-                        return True
 
-                else:  # FA B handle is longer.
-                    if solve_for_one_handle_longer(fa_b_id, fa_a_id):
-                        return True
+def check_length_formulae_smt(fa_a_formulae, fa_b_formulae):
+    """
+    Check whether any pair of length formulae of FA A and FA B is satisfiable using SMT solver Z3.
+    :param fa_a_formulae: Pairs '(handle, loop)' for FA A.
+    :param fa_b_formulae: Pairs '(handle, loop)' for FA B.
+    :return: True if satisfiable; False if not satisfiable.
+    """
+    smt = z3.Solver()
+    fa_a_var = z3.Int('fa_a_var')
+    fa_b_var = z3.Int('fa_b_var')
+    smt.add(fa_a_var >= 0, fa_b_var >= 0)
 
-            else:  # Using SMT solver.
-                smt.push()
-                smt.add(fa_a_id[0] + fa_a_id[1] * fa_a_var == fa_b_id[0] + fa_b_id[1] * fa_b_var)
+    # Check for every formulae combination.
+    for fa_a_id in fa_a_formulae:
+        for fa_b_id in fa_b_formulae:
+            smt.push()
+            smt.add(fa_a_id[0] + fa_a_id[1] * fa_a_var == fa_b_id[0] + fa_b_id[1] * fa_b_var)
 
-                if smt.check() != z3.unsat:
-                    return True
+            if smt.check() != z3.unsat:
+                return True
 
-                smt.pop()
+            smt.pop()
 
     return False
 
@@ -294,18 +445,7 @@ def check_single_length_satisfiability(config, fa_a_formula, fa_b_formula):
 
     # Check for every formulae combination.
     if config.smt_free:  # Without using SMT solver.
-        # Handle legths are equal, True without the need to resolve loops.
-        if fa_a_formula[0] == fa_b_formula[0]:
-            return True
-
-        # Handle lengths are distinct, further checking needed.
-        elif fa_a_formula[0] > fa_b_formula[0]:  # FA A handle is longer.
-            if solve_for_one_handle_longer(fa_a_formula, fa_b_formula):
-                return True
-
-        else:  # FA B handle is longer.
-            if solve_for_one_handle_longer(fa_b_id, fa_b_formula):
-                return True
+        return solve_length_formulae(tuple(fa_a_formula), tuple(fa_b_formula))
 
     else:  # Using SMT solver.
         smt.push()
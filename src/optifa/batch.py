@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+
+# file name: batch.py
+#
+# Group testing of Parikh image satisfiability for batches of pending product states.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+import time
+
+import z3
+
+from optifa.basic import check_parikh_image_satisfiability
+
+
+class ParikhBatchChecker:
+    """
+    Checker of Parikh image satisfiability deciding pending product states in batches.
+
+    A product state to check is tested together with the next pending product states of the work set by a single
+    query whether any product state of the batch is satisfiable, i.e., a disjunction of conjunctions of selectors of
+    their initial states. An unsatisfiable batch is rejected at once. A satisfiable batch is split and its parts are
+    tested again, single product states are checked by 'check_parikh_image_satisfiability()'. Results of the product
+    states decided in advance are kept until the product states are popped from the work set. Results of product
+    states which are no longer pending to be checked, e.g., skipped or rejected by a pre-filter, are dropped.
+
+    With a linear relaxation, a popped product state is rejected without the integer check when the relaxation is
+    infeasible.
+
+    With a budget, every solver call gets its own timeout from the budget, a batch query with the weight summed over
+    the product states of the batch, and time of every solver call is recorded in the budget. Product states popped
+    after the budget is spent are not checked and their results are unknown.
+
+    With a pool of worker processes, the batch is checked by the workers in parallel, each worker checking its part
+    of the batch product state by product state with its own solver. Workers use the static timeout only, hence the
+    pool is not combined with a budget or a portfolio. Dead states found by the workers are added to the dead states
+    of the checker, a popped product state with a dead state is rejected without sending it to the workers.
+    """
+
+    BINARY = 'binary'  # Split a satisfiable batch in halves.
+    LINEAR = 'linear'  # Check product states of a satisfiable batch one by one.
+
+    SPLITS = (BINARY, LINEAR)
+
+    def __init__(self, smt, fa_a_variables, fa_b_variables, config, q_pair_states, fa_a, fa_b, model_pool=None,
+                 relaxation=None, budget=None, portfolio=None, pool=None):
+        """
+        Parameters:
+            smt (smt.Solver): Smt solver with persistent and selector formulae.
+            fa_a_variables (optifa.ParikhVariables): Parikh image variables of the first finite automaton.
+            fa_b_variables (optifa.ParikhVariables): Parikh image variables of the second finite automaton.
+            config (optifa.ProgramConfig): Configuration of Parikh image computation.
+            q_pair_states (optifa.PairWorkSet): Work set of pending product states.
+            fa_a (optifa.CompactAutomaton): First automaton of the states in the work set.
+            fa_b (optifa.CompactAutomaton): Second automaton of the states in the work set.
+            model_pool (optifa.ParikhModelPool): Pool of recent satisfying models.
+            relaxation (optifa.ParikhRelaxation): Linear relaxation checked before the integer formulae.
+            budget (optifa.SmtBudget): Budget of time for checks of integer formulae.
+            portfolio (optifa.ParikhPortfolio): Portfolio of solver configurations for undecided formulae.
+            pool (optifa.ParikhWorkerPool): Pool of worker processes checking batches instead of the solver.
+        """
+        if config.batch_split not in self.SPLITS:
+            raise ValueError(f"unknown batch split policy '{config.batch_split}'")
+
+        self.smt = smt
+        self.fa_a_variables = fa_a_variables
+        self.fa_b_variables = fa_b_variables
+        self.config = config
+        self.q_pair_states = q_pair_states
+        self.fa_a = fa_a
+        self.fa_b = fa_b
+        self.model_pool = model_pool
+        self.relaxation = relaxation
+        self.budget = budget
+        self.portfolio = portfolio
+        self.pool = pool
+        # Every worker of the pool checks a batch of the configured size.
+        self.batch_size = config.batch_size * pool.workers if pool is not None else config.batch_size
+        self.split = config.batch_split
+
+        self.decided = {}
+        self.batch_checks_cnt = 0  # Number of queries for batches of product states.
+        self.batch_rejected_cnt = 0  # Number of product states rejected as parts of unsatisfiable batches.
+        self.smt_time = 0.0  # Time spent by checks of integer formulae in seconds.
+        self.unknown_cnt = 0  # Number of product states with unknown results, e.g., after a timeout.
+
+    def check(self, a_state, b_state):
+        """
+        Check satisfiability of Parikh image formulae for the product state '(a_state, b_state)'.
+
+        Returns:
+            z3.CheckSatResult: Result of the SMT solver.
+        """
+        res = self.decided.pop((a_state, b_state), None)
+        if res is None:
+            res = self.check_undecided(a_state, b_state)
+
+        if res == z3.unknown:
+            self.unknown_cnt += 1
+        return res
+
+    def check_undecided(self, a_state, b_state):
+        """Check the product state '(a_state, b_state)' not decided in advance."""
+        if self.relaxation is not None and a_state not in self.fa_a_variables.dead_states and \
+                b_state not in self.fa_b_variables.dead_states and self.relaxation.check(a_state, b_state) == z3.unsat:
+            return z3.unsat
+
+        if self.pool is not None:
+            # Without the pool, product states with dead states are rejected by 'check_parikh_image_satisfiability()'.
+            if a_state in self.fa_a_variables.dead_states:
+                self.fa_a_variables.dead_hits += 1
+                return z3.unsat
+            if b_state in self.fa_b_variables.dead_states:
+                self.fa_b_variables.dead_hits += 1
+                return z3.unsat
+
+        self.drop_stale_decisions()
+        batch = [(a_state, b_state)]
+        for entry in self.q_pair_states.peek(self.batch_size - 1):
+            pair = (self.fa_a.states[entry[0]], self.fa_b.states[entry[1]])
+            if not entry[2] and pair not in self.decided and pair[0] not in self.fa_a_variables.dead_states and \
+                    pair[1] not in self.fa_b_variables.dead_states:
+                batch.append(pair)
+
+        if self.budget is not None and self.pool is None and self.budget.get_remaining() < 1:
+            return z3.unknown
+
+        start = time.perf_counter()
+        if self.pool is not None:
+            self.decided.update(self.pool.check(batch))
+            for state in self.pool.fa_a_dead_states:
+                self.fa_a_variables.dead_states.add(state)
+            for state in self.pool.fa_b_dead_states:
+                self.fa_b_variables.dead_states.add(state)
+        else:
+            self.decide(batch)
+        self.smt_time += time.perf_counter() - start
+
+        return self.decided.pop((a_state, b_state))
+
+    def drop_stale_decisions(self):
+        """Drop results decided in advance for product states which are no longer pending to be checked."""
+        index = self.q_pair_states.index
+        stale = []
+        for pair in self.decided:
+            entry = index.get((self.fa_a.state_ids[pair[0]], self.fa_b.state_ids[pair[1]]))
+            if entry is None or entry[2]:
+                stale.append(pair)
+        for pair in stale:
+            del self.decided[pair]
+
+    def set_timeout(self, batch):
+        """
+        Set timeout of the next solver call for the batch from the budget.
+
+        Returns:
+            bool: False if the budget is spent and the solver is not to be called.
+        """
+        timeout = self.budget.get_timeout(sum(self.get_weight(a_state, b_state) for a_state, b_state in batch))
+        if not timeout:
+            return False
+
+        self.smt.set("timeout", timeout)
+        return True
+
+    def get_weight(self, a_state, b_state):
+        """Get number of successors of the product state '(a_state, b_state)' in the product."""
+        a_state = self.fa_a.state_ids[a_state]
+        b_state = self.fa_b.state_ids[b_state]
+        weight = 0
+        for symbol, a_targets in self.fa_a.get_transitions(a_state):
+            entry = self.fa_b.find_entry(b_state, symbol)
+            if entry != -1:
+                weight += len(a_targets) * len(self.fa_b.get_targets(entry))
+
+        return weight
+
+    def decide(self, batch):
+        """Decide satisfiability of all product states in the batch."""
+        if len(batch) == 1:
+            a_state, b_state = batch[0]
+            if self.budget is not None and not self.set_timeout(batch):
+                self.decided[batch[0]] = z3.unknown
+                return
+
+            self.decided[batch[0]] = check_parikh_image_satisfiability(
+                self.smt, self.fa_a_variables, self.fa_b_variables, a_state, b_state, self.config, self.model_pool,
+                self.portfolio, self.budget)
+            return
+
+        if self.check_any(batch) == z3.unsat:
+            for pair in batch:
+                self.decided[pair] = z3.unsat
+            self.batch_rejected_cnt += len(batch)
+            return
+
+        if self.split == self.BINARY:
+            self.decide(batch[:len(batch) // 2])
+            self.decide(batch[len(batch) // 2:])
+        else:
+            for pair in batch:
+                self.decide([pair])
+
+    def check_any(self, batch):
+        """
+        Check whether Parikh image formulae are satisfiable for any product state of the batch.
+
+        The disjunction is asserted in a new scope of the solver popped after the query, hence it constrains only this
+        query and does not stay in the solver.
+        """
+        if self.budget is not None and not self.set_timeout(batch):
+            return z3.unknown
+
+        self.batch_checks_cnt += 1
+        self.smt.push()
+        self.smt.add(z3.Or([z3.And(self.fa_a_variables.get_selector(a_state), self.fa_b_variables.get_selector(b_state))
+                            for a_state, b_state in batch]))
+        res = self.smt.check() if self.budget is None else self.budget.check(self.smt)
+        self.smt.pop()
+        return res
+
+# End of file.
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+
+# file name: bidirectional.py
+#
+# Bidirectional emptiness test of products of compact automata.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+from optifa.compact import CompactProduct
+
+
+class BidirectionalSearch:
+    """
+    Emptiness test of the product of two compact automata searching forward and backward at the same time.
+
+    The forward search starts in the initial product states and follows the transitions of the automata, the backward
+    search starts in the final product states and follows the transitions of the reversed automata. The search with
+    the smaller frontier is expanded by one level at a time. The product is non-empty as soon as one search reaches a
+    product state reached by the other search, and empty as soon as either frontier is exhausted.
+
+    Only the forward search checks product states: a product state whose check fails has empty intersection of
+    languages of its states, hence the forward search prunes it. Every product state reached by the backward search
+    reaches a final product state, so its intersection is non-empty and a sound check cannot reject it; the backward
+    search therefore does not check product states and neither does the forward search when it meets the backward
+    search. Every product state is checked at most once. The product holds only the product states reached by the
+    forward search, with the accepting run through the product state where the searches met when non-empty.
+    """
+
+    def __init__(self, fa_a, fa_b, check=None):
+        """
+        Parameters:
+            fa_a (optifa.CompactAutomaton): First automaton.
+            fa_b (optifa.CompactAutomaton): Second automaton with the symbol table shared with 'fa_a'.
+            check (callable): Check of satisfiability of the product state '(a_state, b_state)' of state identifiers,
+                None to accept all product states.
+        """
+        self.fa_a = fa_a
+        self.fa_b = fa_b
+        self.fa_a_reversed = fa_a.reverse()
+        self.fa_b_reversed = fa_b.reverse()
+        self.check = check
+        # Accepted product states reached by the forward search with transitions between them.
+        self.product = CompactProduct(fa_a, fa_b)
+
+        self.decided = {}  # Results of the checks by product states.
+        self.forward = set()  # Accepted product states reached by the forward search.
+        # Product states reached by the backward search with their next transitions '(symbol, target)' towards final
+        # product states, None for final product states.
+        self.backward = {}
+        self.processed_cnt = 0  # Number of checked product states.
+        self.sat_cnt = 0
+        self.false_cnt = 0
+
+    def run(self):
+        """
+        Run the emptiness test.
+
+        Returns:
+            bool: True if the product is non-empty; False if the product is empty.
+        """
+        final = {self.product.get_state(a_state, b_state) for a_state in self.fa_a.final for b_state in self.fa_b.final}
+        self.backward.update(dict.fromkeys(final))
+        backward_frontier = list(final)
+        forward_frontier = []
+        for a_state in self.fa_a.start:
+            for b_state in self.fa_b.start:
+                product_state = self.product.get_state(a_state, b_state)
+                if product_state in self.backward or self.accept(product_state):
+                    self.reach_forward(product_state)
+                    forward_frontier.append(product_state)
+        found = not self.forward.isdisjoint(self.backward)
+
+        while not found and forward_frontier and backward_frontier:
+            if len(forward_frontier) <= len(backward_frontier):
+                forward_frontier, found = self.expand(forward_frontier, self.fa_a, self.fa_b, True)
+            else:
+                backward_frontier, found = self.expand(backward_frontier, self.fa_a_reversed, self.fa_b_reversed,
+                                                       False)
+
+        if found:
+            self.complete_run(next(iter(self.forward.intersection(self.backward))))
+        # Only final product states reached by the forward search are in the product.
+        self.product.final.update(final & self.forward)
+        return found
+
+    def complete_run(self, product_state):
+        """
+        Complete the accepting run of the product from the product state where the searches met by the path found by
+        the backward search. The product states on the path are reached forward through the meeting product state.
+        """
+        while self.backward[product_state] is not None:
+            label, endstate = self.backward[product_state]
+            self.reach_forward(endstate)
+            transitions = self.product.transitions[product_state]
+            # The transition is already in the product if the forward search expanded the product state.
+            if not any(transitions[i] == label and transitions[i + 1] == endstate
+                       for i in range(0, len(transitions), 2)):
+                transitions.append(label)
+                transitions.append(endstate)
+            product_state = endstate
+
+    def expand(self, frontier, fa_a, fa_b, forward):
+        """
+        Expand the frontier of a search by one level.
+
+        Parameters:
+            frontier (list): Product states of the frontier.
+            fa_a (optifa.CompactAutomaton): First automaton of the search, reversed for the backward search.
+            fa_b (optifa.CompactAutomaton): Second automaton of the search, reversed for the backward search.
+            forward (bool): Whether the search is the forward search.
+
+        Returns:
+            tuple: The next frontier and whether the searches met.
+        """
+        reached, other_reached = (self.forward, self.backward) if forward else (self.backward, self.forward)
+        next_frontier = []
+        for product_state in frontier:
+            a_state, b_state = self.product.get_pair(product_state)
+            for a_entry in range(fa_a.rows[a_state], fa_a.rows[a_state + 1]):
+                label = fa_a.row_symbols[a_entry]
+                b_entry = fa_b.find_entry(b_state, label)
+                if b_entry < 0:
+                    continue
+
+                b_targets = fa_b.get_targets(b_entry)
+                for a_target in fa_a.get_targets(a_entry):
+                    for b_target in b_targets:
+                        endstate = self.product.get_state(a_target, b_target)
+                        if endstate not in reached:
+                            if not forward:
+                                reached[endstate] = (label, product_state)
+                            elif endstate in other_reached or self.accept(endstate):
+                                self.reach_forward(endstate)
+                            else:
+                                continue
+                            next_frontier.append(endstate)
+
+                        if forward:
+                            self.product.transitions[product_state].append(label)
+                            self.product.transitions[product_state].append(endstate)
+
+                        if endstate in other_reached:
+                            return next_frontier, True
+
+        return next_frontier, False
+
+    def accept(self, product_state):
+        """Check the product state reached by the forward search once."""
+        try:
+            return self.decided[product_state]
+        except KeyError:
+            pass
+
+        if self.check is None:
+            satisfiable = True
+        else:
+            self.processed_cnt += 1
+            satisfiable = self.check(*self.product.get_pair(product_state))
+            if satisfiable:
+                self.sat_cnt += 1
+            else:
+                self.false_cnt += 1
+
+        self.decided[product_state] = satisfiable
+        return satisfiable
+
+    def reach_forward(self, product_state):
+        """Mark the product state as reached by the forward search and add it to the product."""
+        self.forward.add(product_state)
+        self.product.add_state(product_state)
+
+    def get_checked_cnt(self):
+        """Get number of product states reached by either search, including the product states rejected by checks."""
+        return len(self.forward.union(self.backward, self.decided))
+
+# End of file.
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+
+# file name: budget.py
+#
+# Budget of time for SMT checks with adaptive timeouts of single checks.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+import bisect
+from collections import deque
+import time
+
+
+# Timeout of the first checks in ms, before enough check times are observed.
+DEFAULT_INITIAL_TIMEOUT = 1000
+# Lowest timeout of a single check in ms.
+MIN_TIMEOUT = 10
+# Number of recent check times the timeouts are derived from.
+HISTORY_SIZE = 64
+# Number of observed check times needed to derive timeouts from them.
+MIN_OBSERVATIONS = 8
+# Timeout of a single check as a multiple of the 90th percentile of recent check times.
+TIMEOUT_FACTOR = 4
+# Multiple of the timeout given to checks of product states with many successors.
+DEFAULT_ESCALATION = 8
+
+
+class SmtBudget:
+    """
+    Global budget of time for SMT checks of product states.
+
+    Every check gets a timeout derived from the distribution of recent check times, i.e., a multiple of their 90th
+    percentile. A product state with many more successors than the recently checked product states prunes a large
+    subtree of the product when it is unsatisfiable, hence its check is escalated to a longer timeout. The timeout is
+    limited by the highest timeout and by the remaining budget last. When the budget is spent, the checks are not run
+    and their results are unknown. Only times of solver checks are used to derive timeouts.
+
+    The recent check times are kept sorted as well and the sum of the recent weights is kept up to date, hence a
+    timeout is derived without sorting the times or summing the weights on every check.
+    """
+
+    def __init__(self, budget, max_timeout=None, escalation=DEFAULT_ESCALATION):
+        """
+        Parameters:
+            budget (int): Time for all SMT checks in ms.
+            max_timeout (int): Highest timeout of a single check, escalated or not, in ms, not limited if not given.
+            escalation (int): Multiple of the timeout given to checks of product states with many successors.
+        """
+        self.budget = budget
+        self.max_timeout = max_timeout
+        self.escalation = escalation
+        self.spent = 0.0  # Time spent by SMT checks in ms.
+        self.times = deque(maxlen=HISTORY_SIZE)
+        self.sorted_times = []  # The recent check times in ascending order.
+        self.weights = deque(maxlen=HISTORY_SIZE)
+        self.weights_sum = 0  # Sum of the recent weights.
+        self.escalations_cnt = 0  # Number of checks with escalated timeouts.
+
+    def get_remaining(self):
+        """Get remaining time of the budget in ms."""
+        return max(self.budget - self.spent, 0)
+
+    def get_timeout(self, weight):
+        """
+        Get timeout of the next check.
+
+        Parameters:
+            weight (int): Number of successors of the checked product state pruned when it is unsatisfiable.
+
+        Returns:
+            int: Timeout in ms, 0 if the budget is spent.
+        """
+        remaining = self.get_remaining()
+        if remaining < 1:
+            return 0
+
+        if len(self.times) < MIN_OBSERVATIONS:
+            timeout = DEFAULT_INITIAL_TIMEOUT
+        else:
+            timeout = max(TIMEOUT_FACTOR * self.sorted_times[int(0.9 * (len(self.sorted_times) - 1))], MIN_TIMEOUT)
+
+        if self.weights and weight > 2 * self.weights_sum / len(self.weights):
+            timeout *= self.escalation
+            self.escalations_cnt += 1
+        if len(self.weights) == HISTORY_SIZE:
+            self.weights_sum -= self.weights[0]
+        self.weights.append(weight)
+        self.weights_sum += weight
+
+        if self.max_timeout:
+            timeout = min(timeout, self.max_timeout)
+
+        return max(int(min(timeout, remaining)), 1)
+
+    def check(self, smt, *assumptions):
+        """
+        Check the formulae of the solver under the assumptions and record time of the check.
+
+        Returns:
+            z3.CheckSatResult: Result of the SMT solver.
+        """
+        start = time.perf_counter()
+        res = smt.check(*assumptions)
+        self.record((time.perf_counter() - start) * 1000)
+        return res
+
+    def record(self, elapsed):
+        """Record time of a finished solver check in ms, used to derive the following timeouts."""
+        self.spend(elapsed)
+        if len(self.times) == HISTORY_SIZE:
+            del self.sorted_times[bisect.bisect_left(self.sorted_times, self.times[0])]
+        self.times.append(elapsed)
+        bisect.insort(self.sorted_times, elapsed)
+
+    def spend(self, elapsed):
+        """Spend time in ms from the budget without using it to derive timeouts, e.g., time of a portfolio."""
+        self.spent += elapsed
+
+# End of file.
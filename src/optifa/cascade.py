@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+
+# file name: cascade.py
+#
+# Cascade of abstraction checks of product states reordered by their measured cost and pruning power.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+import math
+import time
+
+
+# Number of checks between reorderings of stages of an adaptive cascade.
+DEFAULT_REORDER_INTERVAL = 32
+# Number of calls of a stage needed to reorder or disable it by its statistics.
+MIN_CALLS = 16
+# Number of reorderings after which a disabled stage of an adaptive cascade is enabled again to probe it.
+DEFAULT_PROBE_INTERVAL = 8
+
+
+class CascadeStage:
+    """Stage of a cascade with online statistics of its calls."""
+
+    def __init__(self, name, check):
+        """
+        Parameters:
+            name (str): Name of the stage.
+            check (callable): Check of the product state '(a_state, b_state)' returning False to reject it.
+        """
+        self.name = name
+        self.check = check
+        self.enabled = True
+        self.disabled_reorders_cnt = 0  # Number of reorderings since the stage was disabled.
+        self.calls_cnt = 0
+        self.rejects_cnt = 0
+        self.time = 0.0  # Time spent by the calls in seconds.
+
+    def probe(self):
+        """Enable the disabled stage again with its statistics cleared, collected anew from its following calls."""
+        self.enabled = True
+        self.calls_cnt = 0
+        self.rejects_cnt = 0
+        self.time = 0.0
+
+    def get_rank(self):
+        """
+        Get the expected cost of a reject by the stage, i.e., time per call divided by the reject rate.
+
+        Running stages in the ascending order of their ranks minimizes the expected cost of a check of independent
+        stages.
+        """
+        if not self.rejects_cnt:
+            return math.inf
+        return self.time / self.rejects_cnt
+
+
+class AbstractionCascade:
+    """
+    Cascade of abstraction checks of product states.
+
+    A product state is rejected by the first stage rejecting it and accepted when all enabled stages accept it. Every
+    stage is an over-approximation of the intersection of the languages of the states, hence the order of stages does
+    not change the results, only the cost of the checks. An adaptive cascade measures time per call and reject rate
+    of every stage and after every 'reorder_interval' checks reorders the stages by their expected cost of a reject
+    and disables the stages which never rejected a product state in their calls. A stage which rejects no product
+    state early in the exploration may reject product states later, hence a disabled stage is enabled again at the
+    front of the cascade after 'probe_interval' reorderings and disabled again only if it still rejects no product
+    state in enough calls.
+    """
+
+    def __init__(self, stages, counters, adaptive=False, reorder_interval=DEFAULT_REORDER_INTERVAL,
+                 probe_interval=DEFAULT_PROBE_INTERVAL):
+        """
+        Parameters:
+            stages (list): Pairs '(name, check)' of stages in their initial order.
+            counters: Counters with attributes 'cascade_reorders' and 'cascade_disabled_stages' to update.
+            adaptive (bool): Reorder and disable stages by their statistics.
+            reorder_interval (int): Number of checks between reorderings.
+            probe_interval (int): Number of reorderings after which a disabled stage is enabled again.
+        """
+        self.stages = [CascadeStage(name, check) for name, check in stages]
+        self.counters = counters
+        self.adaptive = adaptive
+        self.reorder_interval = reorder_interval
+        self.probe_interval = probe_interval
+        self.checks_cnt = 0
+
+    def check(self, a_state, b_state):
+        """
+        Check the product state by the enabled stages.
+
+        Returns:
+            bool: False if rejected by a stage; True otherwise.
+        """
+        self.checks_cnt += 1
+        if self.adaptive and not self.checks_cnt % self.reorder_interval:
+            self.reorder()
+
+        for stage in self.stages:
+            if not stage.enabled:
+                continue
+
+            start = time.perf_counter()
+            accepted = stage.check(a_state, b_state)
+            stage.time += time.perf_counter() - start
+            stage.calls_cnt += 1
+            if not accepted:
+                stage.rejects_cnt += 1
+                return False
+
+        return True
+
+    def reorder(self):
+        """
+        Disable the stages which never rejected a product state in enough calls, enable the stages disabled for
+        'probe_interval' reorderings again at the front, so that they get calls, and reorder the stages by their ranks
+        when all the enabled stages have enough calls.
+        """
+        probed = []
+        for stage in self.stages:
+            if not stage.enabled:
+                stage.disabled_reorders_cnt += 1
+                if stage.disabled_reorders_cnt >= self.probe_interval:
+                    stage.probe()
+                    probed.append(stage)
+            elif stage.calls_cnt >= MIN_CALLS and not stage.rejects_cnt:
+                stage.enabled = False
+                stage.disabled_reorders_cnt = 0
+                self.counters.cascade_disabled_stages += 1
+        if probed:
+            self.stages = probed + [stage for stage in self.stages if stage not in probed]
+
+        if any(stage.enabled and stage.calls_cnt < MIN_CALLS for stage in self.stages):
+            return  # Not enough statistics to compare the stages.
+
+        order = [stage.name for stage in self.stages]
+        self.stages.sort(key=CascadeStage.get_rank)  # Stable sort keeps the order of equally ranked stages.
+        if order != [stage.name for stage in self.stages]:
+            self.counters.cascade_reorders += 1
+
+    def get_order(self):
+        """Get names of the enabled stages in their current order separated by '|'."""
+        return '|'.join(stage.name for stage in self.stages if stage.enabled)
+
+# End of file.
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+
+# file name: compact.py
+#
+# Compact integer-indexed automaton representation for product construction.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+from array import array
+from bisect import bisect_left
+from collections import deque
+
+from lfa import LFA
+
+
+class CompactAutomaton:
+    """
+    Finite automaton with states and symbols interned to dense integers.
+
+    Transitions are stored in a CSR (compressed sparse row) form. Transitions leaving state 'q' are the entries
+    'rows[q]' to 'rows[q + 1]' of the array 'row_symbols', each holding a symbol. Targets of the transition in the
+    entry 'i' are 'targets[target_rows[i]:target_rows[i + 1]]'. Entries of a row keep the order of the transitions in
+    the original automaton, 'sorted_symbols' and 'sorted_entries' store the same row sorted by symbols for lookups.
+    """
+
+    def __init__(self, states, symbols, start, final, transitions):
+        """
+        Parameters:
+            states (list): Names of states indexed by their integer identifiers.
+            symbols (list): Names of symbols indexed by their integer identifiers, may be shared among automata.
+            start (iterable): Identifiers of initial states.
+            final (iterable): Identifiers of final states.
+            transitions (list): Transitions leaving each state as lists of pairs '(symbol, [target, ...])'.
+        """
+        self.states = states
+        self.state_ids = {state: state_id for state_id, state in enumerate(states)}
+        self.symbols = symbols
+        self.start = list(start)
+        self.final = frozenset(final)
+
+        self.rows = array('l', [0])
+        self.row_symbols = array('l')
+        self.target_rows = array('l', [0])
+        self.targets = array('l')
+        self.sorted_symbols = array('l')
+        self.sorted_entries = array('l')
+
+        for state_transitions in transitions:
+            row_start = len(self.row_symbols)
+            for symbol, symbol_targets in state_transitions:
+                self.row_symbols.append(symbol)
+                self.targets.extend(symbol_targets)
+                self.target_rows.append(len(self.targets))
+            self.rows.append(len(self.row_symbols))
+
+            for entry in sorted(range(row_start, len(self.row_symbols)), key=self.row_symbols.__getitem__):
+                self.sorted_symbols.append(self.row_symbols[entry])
+                self.sorted_entries.append(entry)
+
+    @classmethod
+    def from_lfa(cls, fa, symbols=None, symbol_ids=None):
+        """
+        Create compact automaton from Symboliclib automaton.
+
+        Parameters:
+            fa (symboliclib.LFA): Automaton to convert.
+            symbols (list): Symbol table to extend with new symbols, shared with other automata.
+            symbol_ids (dict): Mapping of symbols to their identifiers for the symbol table.
+
+        Returns:
+            CompactAutomaton: Converted automaton.
+        """
+        if symbols is None:
+            symbols = []
+            symbol_ids = {}
+
+        states = list(fa.states)
+        state_ids = {state: state_id for state_id, state in enumerate(states)}
+
+        def intern_state(state):
+            try:
+                return state_ids[state]
+            except KeyError:
+                state_ids[state] = len(states)
+                states.append(state)
+                return state_ids[state]
+
+        def intern_symbol(symbol):
+            try:
+                return symbol_ids[symbol]
+            except KeyError:
+                symbol_ids[symbol] = len(symbols)
+                symbols.append(symbol)
+                return symbol_ids[symbol]
+
+        state_transitions = {}
+        for state, state_dict in fa.transitions.items():
+            state_transitions[intern_state(state)] = [
+                (intern_symbol(symbol), [intern_state(target) for target in symbol_targets])
+                for symbol, symbol_targets in state_dict.items()]
+
+        start = [intern_state(state) for state in fa.start]
+        final = [intern_state(state) for state in fa.final]
+        transitions = [state_transitions.get(state_id, []) for state_id in range(len(states))]
+
+        return cls(states, symbols, start, final, transitions)
+
+    @classmethod
+    def from_lfa_pair(cls, fa_a, fa_b):
+        """
+        Create compact automata sharing a single symbol table from a pair of Symboliclib automata.
+
+        Returns:
+            tuple: Compact automata for 'fa_a' and 'fa_b'.
+        """
+        symbols = []
+        symbol_ids = {}
+        return cls.from_lfa(fa_a, symbols, symbol_ids), cls.from_lfa(fa_b, symbols, symbol_ids)
+
+    def reverse(self):
+        """
+        Get the reversed automaton with the same states and the same symbol table.
+
+        Returns:
+            CompactAutomaton: Automaton with reversed transitions and swapped initial and final states.
+        """
+        transitions = [{} for _ in self.states]
+        for state in range(len(self.states)):
+            for symbol, symbol_targets in self.get_transitions(state):
+                for target in symbol_targets:
+                    transitions[target].setdefault(symbol, []).append(state)
+
+        return CompactAutomaton(self.states, self.symbols, self.final, self.start,
+                                [list(state_transitions.items()) for state_transitions in transitions])
+
+    def trim(self):
+        """
+        Get the automaton trimmed to useful states, i.e., states reachable from an initial state with a final state
+        reachable, with the same symbol table.
+
+        Returns:
+            CompactAutomaton: Trimmed automaton with the useful states renumbered in their original order.
+        """
+        accessible = [False] * len(self.states)
+        queue = deque(self.start)
+        for state in self.start:
+            accessible[state] = True
+        while queue:
+            state = queue.popleft()
+            for _, symbol_targets in self.get_transitions(state):
+                for target in symbol_targets:
+                    if not accessible[target]:
+                        accessible[target] = True
+                        queue.append(target)
+
+        distances = self.get_final_distances()
+        useful = [state for state in range(len(self.states)) if accessible[state] and distances[state] is not None]
+        state_ids = {state: state_id for state_id, state in enumerate(useful)}
+
+        transitions = []
+        for state in useful:
+            state_transitions = []
+            for symbol, symbol_targets in self.get_transitions(state):
+                useful_targets = [state_ids[target] for target in symbol_targets if target in state_ids]
+                if useful_targets:
+                    state_transitions.append((symbol, useful_targets))
+            transitions.append(state_transitions)
+
+        return CompactAutomaton([self.states[state] for state in useful], self.symbols,
+                                [state_ids[state] for state in self.start if state in state_ids],
+                                [state_ids[state] for state in self.final if state in state_ids], transitions)
+
+    def find_entry(self, state, symbol):
+        """
+        Find the entry of the transition over the given symbol leaving the given state.
+
+        Returns:
+            int: Index of the transition entry, -1 if there is no such transition.
+        """
+        row_start = self.rows[state]
+        row_end = self.rows[state + 1]
+        position = bisect_left(self.sorted_symbols, symbol, row_start, row_end)
+        if position < row_end and self.sorted_symbols[position] == symbol:
+            return self.sorted_entries[position]
+        return -1
+
+    def get_targets(self, entry):
+        """Get targets of the transition entry."""
+        return self.targets[self.target_rows[entry]:self.target_rows[entry + 1]]
+
+    def get_transitions(self, state):
+        """
+        Iterate over transitions leaving the given state.
+
+        Returns:
+            iterator: Pairs '(symbol, targets)' of the transitions.
+        """
+        for entry in range(self.rows[state], self.rows[state + 1]):
+            yield self.row_symbols[entry], self.get_targets(entry)
+
+    def count_transitions(self):
+        """Count all transitions (source, symbol, target) of the automaton."""
+        return len(self.targets)
+
+    def get_final_distances(self):
+        """
+        Get the shortest distances from the states to a final state by breadth-first search of the reversed automaton.
+
+        Returns:
+            list: Numbers of transitions on the shortest paths to a final state indexed by state identifiers, None
+                for states with no final state reachable.
+        """
+        reversed_fa = self.reverse()
+        distances = [None] * len(self.states)
+        queue = deque(self.final)
+        for state in self.final:
+            distances[state] = 0
+
+        while queue:
+            state = queue.popleft()
+            for _, predecessors in reversed_fa.get_transitions(state):
+                for predecessor in predecessors:
+                    if distances[predecessor] is None:
+                        distances[predecessor] = distances[state] + 1
+                        queue.append(predecessor)
+
+        return distances
+
+    def to_lfa(self):
+        """
+        Convert compact automaton to Symboliclib automaton.
+
+        Returns:
+            symboliclib.LFA: Converted automaton.
+        """
+        fa = LFA.get_new()
+        fa.states = set(self.states)
+        fa.start = {self.states[state] for state in self.start}
+        fa.final = {self.states[state] for state in self.final}
+
+        for state in range(len(self.states)):
+            if self.rows[state] == self.rows[state + 1]:
+                continue
+
+            state_dict = fa.transitions[self.states[state]] = {}
+            for symbol, symbol_targets in self.get_transitions(state):
+                state_dict[self.symbols[symbol]] = [self.states[target] for target in symbol_targets]
+                fa.alphabet.add(self.symbols[symbol])
+
+        return fa
+
+    def to_timbuk(self, name='compact_automaton', start_symbol='x'):
+        """
+        Get the automaton in Timbuk format.
+
+        Parameters:
+            name (str): Name of the automaton.
+            start_symbol (str): Nullary symbol marking initial states.
+
+        Returns:
+            str: Automaton in Timbuk format.
+        """
+        used_symbols = sorted({self.row_symbols[entry] for entry in range(len(self.row_symbols))})
+        lines = ["Ops " + ' '.join([f"{self.symbols[symbol]}:1" for symbol in used_symbols] + [f"{start_symbol}:0"]),
+                 "",
+                 f"Automaton {name} @LFA",
+                 "States " + ' '.join(self.states),
+                 "Final States " + ' '.join(self.states[state] for state in sorted(self.final)),
+                 "Transitions"]
+        lines.extend(f"{start_symbol} -> {self.states[state]}" for state in self.start)
+
+        for state in range(len(self.states)):
+            for symbol, symbol_targets in self.get_transitions(state):
+                lines.extend(f"{self.symbols[symbol]}({self.states[state]}) -> {self.states[target]}"
+                             for target in symbol_targets)
+
+        return '\n'.join(lines) + '\n'
+
+    def print_automaton(self, filename=None):
+        """
+        Print the automaton in Timbuk format.
+
+        Parameters:
+            filename (str): File to print the automaton to, standard output if not given.
+        """
+        if filename:
+            with open(filename, 'w') as automaton_file:
+                automaton_file.write(self.to_timbuk())
+        else:
+            print(self.to_timbuk(), end='')
+
+
+class CompactProduct:
+    """
+    Product automaton of two compact automata generated during product construction.
+
+    Product states are integers 'a_state * len(fa_b.states) + b_state'. Transitions leaving a product state are
+    stored as a flat array of pairs 'symbol, target'.
+    """
+
+    def __init__(self, fa_a, fa_b):
+        """
+        Parameters:
+            fa_a (CompactAutomaton): First automaton.
+            fa_b (CompactAutomaton): Second automaton with the symbol table shared with 'fa_a'.
+        """
+        self.fa_a = fa_a
+        self.fa_b = fa_b
+        self.b_states_cnt = len(fa_b.states)
+        self.states = set()
+        self.final = set()
+        self.transitions = {}
+
+    def get_state(self, a_state, b_state):
+        """Get product state for the pair of states of the original automata."""
+        return a_state * self.b_states_cnt + b_state
+
+    def get_pair(self, product_state):
+        """Get the pair of states of the original automata for the product state."""
+        return divmod(product_state, self.b_states_cnt)
+
+    def get_state_name(self, product_state):
+        """Get name of the product state in the form 'a_state,b_state'."""
+        a_state, b_state = divmod(product_state, self.b_states_cnt)
+        return self.fa_a.states[a_state] + ',' + self.fa_b.states[b_state]
+
+    def add_state(self, product_state):
+        """Add product state to the product automaton."""
+        self.states.add(product_state)
+        if product_state not in self.transitions:
+            self.transitions[product_state] = array('l')
+
+    def to_lfa(self):
+        """
+        Convert product to Symboliclib automaton with product states named 'a_state,b_state'.
+
+        Returns:
+            symboliclib.LFA: Converted product automaton.
+        """
+        intersect = LFA.get_new()
+        intersect.states = {self.get_state_name(product_state) for product_state in self.states}
+        intersect.final = {self.get_state_name(product_state) for product_state in self.final}
+
+        symbols = self.fa_a.symbols
+        for product_state, product_transitions in self.transitions.items():
+            state_dict = intersect.transitions[self.get_state_name(product_state)] = {}
+            for i in range(0, len(product_transitions), 2):
+                label = symbols[product_transitions[i]]
+                endstate_str = self.get_state_name(product_transitions[i + 1])
+                if label not in state_dict:
+                    state_dict[label] = [endstate_str]
+                    intersect.alphabet.add(str(label))
+                else:
+                    state_dict[label].append(endstate_str)
+
+        return intersect
+
+# End of file.
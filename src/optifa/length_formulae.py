@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+
+# file name: length_formulae.py
+#
+# Per-state table of length abstraction formulae.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+from lfa import LFA
+
+
+class LengthFormulaeTable:
+    """
+    Table of handle and loop length formulae for single states of one automaton.
+
+    The formulae of a product state depend only on its component states. Formulae for a component state are
+    therefore computed lazily the first time the state is requested and reused for every product state sharing it.
+    """
+
+    def __init__(self, fa_unified):
+        """
+        Parameters:
+            fa_unified (symboliclib.LFA): Automaton with unified transition symbols to compute the formulae for.
+        """
+        self.fa_unified = fa_unified
+        self.handle_and_loop = LFA.get_new()
+        self.handle_and_loop_states_cnt = 0  # Size of the handle and loop automaton for the last requested state.
+        self.formulae = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_formulae(self, state):
+        """
+        Get length abstraction formulae for the given state as the initial state.
+
+        Parameters:
+            state (str): State of the automaton to compute the formulae for.
+
+        Returns:
+            dict: Formulae dictionary of the handle and loop automaton, None if no final state is reachable.
+        """
+        try:
+            formulae_dict, self.handle_and_loop_states_cnt = self.formulae[state]
+            self.hits += 1
+        except KeyError:
+            self.misses += 1
+            self.fa_unified.start = {state}
+            self.fa_unified.determinize_check(self.handle_and_loop)
+
+            formulae_dict = None
+            if self.handle_and_loop.final:
+                formulae_dict = self.handle_and_loop.count_formulae_for_lfa()
+
+            self.handle_and_loop_states_cnt = len(self.handle_and_loop.states)
+            self.formulae[state] = (formulae_dict, self.handle_and_loop_states_cnt)
+
+        return formulae_dict
+
+    def __len__(self):
+        return len(self.formulae)
+
+# End of file.
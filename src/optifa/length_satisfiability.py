@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+
+# file name: length_satisfiability.py
+#
+# Arithmetic satisfiability check of length abstraction formulae.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+from collections import OrderedDict
+import math
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, formulae are checked in pure Python without it.
+    np = None
+
+
+# Number of formulae pairs from which the formulae are checked in a single vectorized NumPy batch.
+VECTORIZATION_THRESHOLD = 256
+
+# Default number of formulae sets pairs kept in the satisfiability results cache.
+DEFAULT_CACHE_SIZE = 4096
+
+
+def get_length_formulae(formulae_dict):
+    """
+    Get handle and loop lengths from formulae dictionary of a handle and loop automaton.
+
+    Parameters:
+        formulae_dict (dict): Formulae dictionary as computed by 'LFA.count_formulae_for_lfa()'.
+
+    Returns:
+        tuple: Sorted tuple of unique pairs '(handle, loop)', loop is 0 for formulae without a loop.
+    """
+    length_formulae = set()
+    for accept_state in formulae_dict:
+        formula = formulae_dict[accept_state]
+        length_formulae.add((formula[1], formula[2] if len(formula) > 2 else 0))
+
+    return tuple(sorted(length_formulae))
+
+
+def solve_length_formulae(fa_a_formula, fa_b_formula):
+    """
+    Decide whether 'h1 + l1 * x = h2 + l2 * y' has a solution in non-negative integers 'x' and 'y'.
+
+    With both loops non-zero, the equation requires a length 'n >= max(h1, h2)' with 'n = h1 (mod l1)' and
+    'n = h2 (mod l2)'. By the Chinese remainder theorem, such lengths exist (and are unbounded) iff 'h1 = h2 (mod
+    gcd(l1, l2))'.
+
+    Parameters:
+        fa_a_formula (tuple): Pair '(h1, l1)' of handle and loop lengths for FA A.
+        fa_b_formula (tuple): Pair '(h2, l2)' of handle and loop lengths for FA B.
+
+    Returns:
+        bool: True if satisfiable; False if not satisfiable.
+    """
+    fa_a_handle, fa_a_loop = fa_a_formula
+    fa_b_handle, fa_b_loop = fa_b_formula
+
+    if fa_a_loop == 0 and fa_b_loop == 0:  # No loops.
+        return fa_a_handle == fa_b_handle
+    elif fa_a_loop == 0:
+        return fa_a_handle >= fa_b_handle and (fa_a_handle - fa_b_handle) % fa_b_loop == 0
+    elif fa_b_loop == 0:
+        return fa_b_handle >= fa_a_handle and (fa_b_handle - fa_a_handle) % fa_a_loop == 0
+    else:  # Two loops.
+        return (fa_a_handle - fa_b_handle) % math.gcd(fa_a_loop, fa_b_loop) == 0
+
+
+def check_length_formulae(fa_a_formulae, fa_b_formulae):
+    """
+    Check whether any pair of length formulae of FA A and FA B is satisfiable.
+
+    Large formulae sets are checked in a single vectorized NumPy batch when NumPy is available.
+
+    Parameters:
+        fa_a_formulae (tuple): Pairs '(handle, loop)' for FA A.
+        fa_b_formulae (tuple): Pairs '(handle, loop)' for FA B.
+
+    Returns:
+        bool: True if satisfiable; False if not satisfiable.
+    """
+    if np is not None and len(fa_a_formulae) * len(fa_b_formulae) >= VECTORIZATION_THRESHOLD:
+        return check_length_formulae_vectorized(fa_a_formulae, fa_b_formulae)
+
+    for fa_a_formula in fa_a_formulae:
+        for fa_b_formula in fa_b_formulae:
+            if solve_length_formulae(fa_a_formula, fa_b_formula):
+                return True
+
+    return False
+
+
+def check_length_formulae_vectorized(fa_a_formulae, fa_b_formulae):
+    """
+    Check all pairs of length formulae of FA A and FA B at once using NumPy.
+
+    See 'check_length_formulae()' for parameters.
+    """
+    if not fa_a_formulae or not fa_b_formulae:
+        return False
+
+    fa_a_array = np.array(fa_a_formulae, dtype=np.int64)
+    fa_b_array = np.array(fa_b_formulae, dtype=np.int64)
+    fa_a_handles = fa_a_array[:, 0, np.newaxis]
+    fa_a_loops = fa_a_array[:, 1, np.newaxis]
+    fa_b_handles = fa_b_array[np.newaxis, :, 0]
+    fa_b_loops = fa_b_array[np.newaxis, :, 1]
+
+    difference = fa_a_handles - fa_b_handles
+    # 'gcd(0, l) = l' covers a single loop, 'gcd(0, 0) = 0' no loops where the handles must be equal.
+    gcd = np.gcd(fa_a_loops, fa_b_loops)
+    divisible = np.where(gcd == 0, difference == 0, difference % np.where(gcd == 0, 1, gcd) == 0)
+    # Without a loop, the handle of the automaton must not be shorter than the other handle.
+    reachable = (difference >= 0) | (fa_a_loops != 0)
+    reachable &= (difference <= 0) | (fa_b_loops != 0)
+
+    return bool(np.any(divisible & reachable))
+
+
+class LengthSatisfiabilityCache:
+    """
+    Bounded LRU cache of satisfiability results for pairs of length formulae sets.
+
+    Many product states have identical formulae sets. The cache is keyed by the canonical (sorted and deduplicated)
+    formulae sets from 'get_length_formulae()', hence repeated formulae combinations cost a single lookup.
+    """
+
+    def __init__(self, max_size=DEFAULT_CACHE_SIZE):
+        """
+        Parameters:
+            max_size (int): Maximal number of cached results, the least recently used result is evicted first.
+        """
+        self.max_size = max_size
+        self.results = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def check(self, fa_a_formulae, fa_b_formulae, check_formulae):
+        """
+        Get cached satisfiability of the formulae sets, check and cache the formulae on a miss.
+
+        Parameters:
+            fa_a_formulae (tuple): Canonical formulae set for FA A.
+            fa_b_formulae (tuple): Canonical formulae set for FA B.
+            check_formulae (callable): Function checking satisfiability of the formulae sets on a miss.
+
+        Returns:
+            bool: True if satisfiable; False if not satisfiable.
+        """
+        key = (fa_a_formulae, fa_b_formulae)
+        try:
+            satisfiable = self.results[key]
+        except KeyError:
+            self.misses += 1
+            satisfiable = check_formulae(fa_a_formulae, fa_b_formulae)
+            self.results[key] = satisfiable
+            if len(self.results) > self.max_size:
+                self.results.popitem(last=False)
+        else:
+            self.hits += 1
+            self.results.move_to_end(key)
+
+        return satisfiable
+
+    def get_hit_rate(self):
+        """Get ratio of lookups answered from the cache."""
+        lookups_cnt = self.hits + self.misses
+        return self.hits / lookups_cnt if lookups_cnt else 0.0
+
+# End of file.
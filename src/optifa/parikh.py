@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+
+# file name: parikh.py
+#
+# Pre-built Z3 variables for Parikh image formulae of an automaton.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+from collections import deque
+
+import z3
+
+from optifa.scc import find_sccs
+
+
+# Default number of recent satisfying models kept in the model pool, 0 disables the pool.
+DEFAULT_MODEL_POOL_SIZE = 0
+
+
+class ParikhVariables:
+    """
+    Z3 variables of Parikh image formulae for a single automaton, built once and indexed by dense integers.
+
+    Transitions '(source, symbol, target)' are numbered in the order of the automaton transitions. Variables keep
+    the names used by the formulae since the beginning, i.e., 'a_y_<source>_<symbol>_<target>' for transition 'y'
+    variables, 'a_u_<state>', 'a_z_<state>' for state 'u' and 'z' variables and 'hash_<symbol>' for symbol counts
+    shared by both automata, with the prefix of the automaton instead of 'a'.
+    """
+
+    def __init__(self, fa, prefix):
+        """
+        Parameters:
+            fa (symboliclib.LFA): Automaton to create variables for.
+            prefix (str): Prefix of variable names distinguishing the automaton, 'a' or 'b'.
+        """
+        self.prefix = prefix
+        self.states = list(fa.states)
+        self.state_ids = {state: state_id for state_id, state in enumerate(self.states)}
+        self.start = frozenset(self.state_ids[state] for state in fa.start)
+        self.final = frozenset(self.state_ids[state] for state in fa.final)
+        self.alphabet = list(fa.alphabet)
+
+        # Transitions as parallel lists of sources and targets, with transitions indexes for states and symbols.
+        self.transitions_names = []
+        self.transitions_symbols = []
+        self.sources = []
+        self.targets = []
+        self.ingoing = [[] for _ in self.states]
+        self.outgoing = [[] for _ in self.states]
+        self.with_symbol = {symbol: [] for symbol in self.alphabet}
+        for state, state_dict in fa.transitions.items():
+            source = self.state_ids[state]
+            for symbol, symbol_targets in state_dict.items():
+                for target_state in symbol_targets:
+                    target = self.state_ids[target_state]
+                    transition = len(self.sources)
+                    self.transitions_names.append('%s_%s_%s' % (state, symbol, target_state))
+                    self.transitions_symbols.append(symbol)
+                    self.sources.append(source)
+                    self.targets.append(target)
+                    self.outgoing[source].append(transition)
+                    self.ingoing[target].append(transition)
+                    self.with_symbol.setdefault(symbol, []).append(transition)
+
+        self.y = [z3.Int('%s_y_%s' % (prefix, transition)) for transition in self.transitions_names]
+        self.u = [z3.Int('%s_u_%s' % (prefix, state)) for state in self.states]
+        self.z = [z3.Int('%s_z_%s' % (prefix, state)) for state in self.states]
+        self.selectors = [z3.Bool('%s_s_%s' % (prefix, state)) for state in self.states]
+        self.hash = {symbol: z3.Int('hash_%s' % symbol) for symbol in self.alphabet}
+
+        self.sccs = None  # Strongly connected components, computed on demand.
+        self.cuts_cnt = 0  # Number of connectivity cuts created for lazy connectivity constraints.
+        self.dead_states = set()  # States which make the formulae unsatisfiable with any state of the other automaton.
+        self.dead_hits = 0  # Product states rejected because of a dead state of the automaton.
+
+    def get_ingoing_y(self, state):
+        """Get 'y' variables of transitions entering the state with the given identifier."""
+        return [self.y[transition] for transition in self.ingoing[state]]
+
+    def get_outgoing_y(self, state):
+        """Get 'y' variables of transitions leaving the state with the given identifier."""
+        return [self.y[transition] for transition in self.outgoing[state]]
+
+    def get_selector(self, state):
+        """Get selector literal choosing the state with the given name as the initial state of the run."""
+        return self.selectors[self.state_ids[state]]
+
+    def get_sccs(self):
+        """
+        Get strongly connected components of the automaton, computed once and cached.
+
+        Returns:
+            list: Strongly connected components as sets of state identifiers.
+        """
+        if self.sccs is None:
+            successors = [[self.targets[transition] for transition in self.outgoing[state]]
+                          for state in range(len(self.states))]
+            self.sccs = [set(scc) for scc in find_sccs(len(self.states), successors)]
+
+        return self.sccs
+
+    def get_y_values(self, model):
+        """Get values of 'y' variables in the model."""
+        return [model.eval(y_transition, model_completion=True).as_long() for y_transition in self.y]
+
+    def get_reached_states(self, support, initial_state):
+        """
+        Get states reached from the initial state using only the given transitions.
+
+        Parameters:
+            support (iterable): Identifiers of transitions to use.
+            initial_state (int): Identifier of the initial state.
+
+        Returns:
+            set: Identifiers of reached states.
+        """
+        support_outgoing = {}
+        for transition in support:
+            support_outgoing.setdefault(self.sources[transition], []).append(transition)
+
+        reached = {initial_state}
+        stack = [initial_state]
+        while stack:
+            for transition in support_outgoing.get(stack.pop(), []):
+                if self.targets[transition] not in reached:
+                    reached.add(self.targets[transition])
+                    stack.append(self.targets[transition])
+
+        return reached
+
+    def is_connected(self, y_values, initial_state):
+        """Check whether all transitions with non-zero 'y' values are reached from the initial state identifier."""
+        support = [transition for transition, y_value in enumerate(y_values) if y_value > 0]
+        reached = self.get_reached_states(support, initial_state)
+        return all(self.sources[transition] in reached for transition in support)
+
+    def get_connectivity_cuts(self, model, initial_state):
+        """
+        Get cuts excluding the model if the support of its 'y' variables is not connected to the initial state.
+
+        The support (transitions with 'y > 0') is explored from the initial state. Support transitions not reached
+        form weakly connected components which no support transition enters from outside. A run starting outside a
+        component can use transitions leaving the component only after entering it, which the cut of the component
+        requires. The cuts hold for every product state, hence they can be asserted permanently.
+
+        Parameters:
+            model (z3.ModelRef): Model of Parikh image formulae without connectivity constraints.
+            initial_state (str): State the run starts in.
+
+        Returns:
+            list: Cut formulae, one for each disconnected component, empty if the support is connected.
+        """
+        y_values = self.get_y_values(model)
+        support = [transition for transition, y_value in enumerate(y_values) if y_value > 0]
+        reached = self.get_reached_states(support, self.state_ids[initial_state])
+
+        # Union of states of unreached support transitions into weakly connected components.
+        parents = {}
+
+        def find(state):
+            while parents[state] != state:
+                parents[state] = parents[parents[state]]
+                state = parents[state]
+            return state
+
+        for transition in support:
+            source = self.sources[transition]
+            if source in reached:
+                continue
+            parents.setdefault(source, source)
+            if self.targets[transition] not in reached:
+                parents.setdefault(self.targets[transition], self.targets[transition])
+                parents[find(self.targets[transition])] = find(source)
+
+        components = {}
+        for state in parents:
+            components.setdefault(find(state), set()).add(state)
+
+        self.cuts_cnt += len(components)
+        return [self.get_cut_formula(component) for component in components.values()]
+
+    def get_cut_formula(self, component):
+        """
+        Get cut formula requiring a run starting outside the component to enter the component before leaving it.
+
+        Parameters:
+            component (set): Identifiers of states of the component.
+
+        Returns:
+            z3.BoolRef: Cut formula.
+        """
+        leaving = [self.y[transition] for state in component for transition in self.outgoing[state]]
+        entering = [self.y[transition] for state in component for transition in self.ingoing[state]
+                    if self.sources[transition] not in component]
+        return z3.Implies(z3.Not(z3.Or([self.selectors[state] for state in component])),
+                          z3.Implies(z3.Sum(leaving) > 0, z3.Sum(entering) > 0 if entering else z3.BoolVal(False)))
+
+
+class ParikhModelPool:
+    """
+    Bounded pool of recent satisfying models of Parikh image formulae.
+
+    A model satisfying the formulae for a product state '(a, b)' is stored as the 'y' vectors of both automata. For
+    a product state '(a2, b2)' reached from '(a, b)' over a symbol, the model shifted by removing the transitions
+    'a -> a2' and 'b -> b2' (when the model uses both) keeps the flow conservation for the new initial states as long
+    as 'a' and 'a2' ('b' and 'b2') are not final, and keeps the symbol counts equal. The shifted model is then checked
+    for the connectivity constraints in pure Python, hence the solver is called only when no pooled model fits.
+
+    In reverse lengths mode with 'z' constraints, the 'z' constraints do not depend on the initial states and
+    removing transitions from the model keeps them satisfied. Other modes with connectivity constraints require the
+    used transitions to be reached from the new initial states.
+    """
+
+    def __init__(self, fa_a_variables, fa_b_variables, config, max_size=DEFAULT_MODEL_POOL_SIZE):
+        """
+        Parameters:
+            fa_a_variables (ParikhVariables): Parikh image variables of the first automaton.
+            fa_b_variables (ParikhVariables): Parikh image variables of the second automaton.
+            config (optifa.ProgramConfig): Configuration of Parikh image computation.
+            max_size (int): Maximal number of pooled models, the oldest model is discarded first.
+        """
+        self.fa_a_variables = fa_a_variables
+        self.fa_b_variables = fa_b_variables
+        self.max_size = max_size
+        self.check_connectivity = config.lazy_z_constraints or config.scc_constraints or \
+            (config.use_z_constraints and not config.reverse_lengths)
+        self.models = deque(maxlen=max_size) if max_size > 0 else None
+        self.hits = 0  # Solver calls avoided by a pooled model.
+        self.misses = 0
+
+    def add(self, model, a_state, b_state):
+        """Add a satisfying model for the product state '(a_state, b_state)' to the pool."""
+        if self.models is not None:
+            self.models.append((self.fa_a_variables.state_ids[a_state], self.fa_b_variables.state_ids[b_state],
+                                self.fa_a_variables.get_y_values(model), self.fa_b_variables.get_y_values(model)))
+
+    def find(self, a_state, b_state):
+        """
+        Find a pooled model which, shifted, satisfies the formulae for the product state '(a_state, b_state)'.
+
+        The shifted model is added to the pool for the following product states.
+
+        Returns:
+            bool: True if a fitting model was found; False otherwise.
+        """
+        if not self.models:
+            return False
+
+        a_target = self.fa_a_variables.state_ids[a_state]
+        b_target = self.fa_b_variables.state_ids[b_state]
+        for a_source, b_source, a_y_values, b_y_values in reversed(self.models):
+            a_transitions = self.get_shift_transitions(self.fa_a_variables, a_y_values, a_source, a_target)
+            b_transitions = self.get_shift_transitions(self.fa_b_variables, b_y_values, b_source, b_target)
+            if a_transitions is None or b_transitions is None:
+                continue
+
+            for symbol in a_transitions.keys() & b_transitions.keys():
+                a_shifted = self.shift(a_y_values, a_transitions[symbol])
+                b_shifted = self.shift(b_y_values, b_transitions[symbol])
+                if self.check_connectivity and (not self.fa_a_variables.is_connected(a_shifted, a_target) or
+                                                not self.fa_b_variables.is_connected(b_shifted, b_target)):
+                    continue
+
+                self.hits += 1
+                self.models.append((a_target, b_target, a_shifted, b_shifted))
+                return True
+
+        self.misses += 1
+        return False
+
+    @staticmethod
+    def get_shift_transitions(variables, y_values, source, target):
+        """
+        Get used transitions from the source to the target state by their symbols.
+
+        Returns:
+            dict: Transitions identifiers by symbols, None if the shift breaks flow conservation.
+        """
+        if source in variables.final or target in variables.final:
+            return None
+
+        transitions = {}
+        for transition in variables.outgoing[source]:
+            if variables.targets[transition] == target and y_values[transition] > 0:
+                transitions[variables.transitions_symbols[transition]] = transition
+
+        return transitions
+
+    @staticmethod
+    def shift(y_values, transition):
+        """Get 'y' values with the transition used one time less."""
+        shifted = list(y_values)
+        shifted[transition] -= 1
+        return shifted
+
+# End of file.
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+
+# file name: partition.py
+#
+# Hash-partitioned parallel exploration of products of compact automata.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+import multiprocessing
+
+from optifa.compact import CompactProduct
+
+
+def get_owner(product_state, partitions):
+    """Get the partition owning the product state, by multiplicative hashing of the product state."""
+    return (product_state * 2654435761) % 2 ** 32 % partitions
+
+
+def run_partition(connection, fa_a, fa_b, partition, partitions, break_when_final, check):
+    """
+    Explore the partition of the product owned by a worker process, driven by messages from the master process.
+
+    Messages are tuples with the command first:
+        ('expand', pairs): Process the incoming product states 'pairs', i.e., lists of entries '(a_state, b_state,
+            single_pair)', and reply with the outgoing product states by their owners and whether a final product
+            state was found.
+        ('collect', pairs): Count the incoming product states 'pairs' left unprocessed after the last superstep as
+            checked, reply with the counters and the explored part of the product, then end.
+
+    Like 'PairWorkSet.push()', a product state arriving several times in a superstep is skippable when any of its
+    arrivals is skippable. The 'checked' counter counts the distinct product states reached, processed or not, as
+    the number of pushed product states of the sequential exploration.
+
+    Parameters:
+        connection (multiprocessing.connection.Connection): Connection to the master process.
+        fa_a (optifa.CompactAutomaton): First automaton.
+        fa_b (optifa.CompactAutomaton): Second automaton with the symbol table shared with 'fa_a'.
+        partition (int): Partition owned by the worker.
+        partitions (int): Number of partitions.
+        break_when_final (bool): Stop when a final product state is found.
+        check (callable): Check of satisfiability of the product state '(a_state, b_state)', None to accept all.
+    """
+    product = CompactProduct(fa_a, fa_b)
+    b_states_cnt = product.b_states_cnt
+    q_checked_pairs = set()
+    counters = dict.fromkeys(('checked', 'processed', 'sat', 'false', 'skipped'), 0)
+
+    while True:
+        message = connection.recv()
+        pending = get_pending(message[1], b_states_cnt, q_checked_pairs)
+        counters['checked'] += len(pending)
+        if message[0] == 'collect':
+            counters.update({name: value + counters.get(name, 0)
+                             for name, value in getattr(check, 'counters', {}).items()})
+            connection.send((counters, product.states, product.final, product.transitions))
+            return
+
+        outgoing = [[] for _ in range(partitions)]
+        found = False
+        for product_state, (a_state, b_state, single_pair) in pending.items():
+            if check is None:
+                satisfiable = True
+            elif single_pair:
+                satisfiable = True
+                counters['skipped'] += 1
+            else:
+                counters['processed'] += 1
+                satisfiable = check(a_state, b_state)
+                counters['sat' if satisfiable else 'false'] += 1
+
+            if not satisfiable:
+                continue
+
+            product.add_state(product_state)
+            if a_state in fa_a.final and b_state in fa_b.final:
+                product.final.add(product_state)
+                found = True
+                if break_when_final:
+                    break
+
+            # Successors are routed to their owners, which filter the already explored ones.
+            product_transitions = product.transitions[product_state]
+            successors = []
+            for a_entry in range(fa_a.rows[a_state], fa_a.rows[a_state + 1]):
+                label = fa_a.row_symbols[a_entry]
+                b_entry = fa_b.find_entry(b_state, label)
+                if b_entry < 0:
+                    continue
+
+                b_targets = fa_b.get_targets(b_entry)
+                for a_target in fa_a.get_targets(a_entry):
+                    for b_target in b_targets:
+                        endstate = a_target * b_states_cnt + b_target
+                        product_transitions.append(label)
+                        product_transitions.append(endstate)
+                        successors.append((a_target, b_target, endstate))
+
+            # If only a single new product state was generated, set this state as skippable.
+            single_pair = len(successors) == 1
+            for a_target, b_target, endstate in successors:
+                outgoing[get_owner(endstate, partitions)].append((a_target, b_target, single_pair))
+
+        connection.send((outgoing, found))
+
+
+def get_pending(pairs, b_states_cnt, q_checked_pairs):
+    """
+    Get the product states of the incoming pairs not reached before and mark them as reached.
+
+    Returns:
+        dict: Lists '[a_state, b_state, single_pair]' by product states, in the order of their first arrivals, with
+            the skip flag upgraded when any arrival of the product state is skippable.
+    """
+    pending = {}
+    for a_state, b_state, single_pair in pairs:
+        product_state = a_state * b_states_cnt + b_state
+        if product_state in q_checked_pairs:
+            continue
+
+        entry = pending.get(product_state)
+        if entry is None:
+            pending[product_state] = [a_state, b_state, single_pair]
+        elif single_pair:
+            entry[2] = True
+
+    q_checked_pairs.update(pending)
+    return pending
+
+
+class PartitionedExploration:
+    """
+    Parallel exploration of the product of two compact automata with product states partitioned among workers.
+
+    Every product state is owned by a single worker process chosen by hashing the product state. A worker keeps the
+    explored product states of its partition and the part of the product leaving them. The exploration proceeds in
+    supersteps: every worker processes the product states routed to it, i.e., checks and expands the new ones, and
+    the master process routes the generated successors to their owners in batches for the next superstep. The
+    exploration ends when no successors are generated or, in emptiness test, after the superstep in which a final
+    product state is found. The parts of the product are merged by the master process at the end.
+
+    In full product construction, the product consists of all product states reachable over accepted product states
+    regardless of the order of exploration, hence it is the same as the product of the sequential exploration.
+    Otherwise, the product and the counters are not comparable with the sequential exploration:
+        - Supersteps explore the product level by level, as the BFS strategy does. In emptiness test, the product and
+          the counters depend on the order of exploration, like for different strategies of the sequential
+          exploration, and the whole superstep finding a final product state is explored.
+        - Skip flags depend on which arrivals of a product state fall into the superstep processing it, hence the
+          skipped product states differ from the sequential exploration with its order of pushes.
+        - Antichain subsumption is not applied.
+    """
+
+    def __init__(self, fa_a, fa_b, partitions, break_when_final=False, check=None):
+        """
+        Parameters:
+            fa_a (optifa.CompactAutomaton): First automaton.
+            fa_b (optifa.CompactAutomaton): Second automaton with the symbol table shared with 'fa_a'.
+            partitions (int): Number of partitions and worker processes.
+            break_when_final (bool): Stop when a final product state is found.
+            check (callable): Check of satisfiability of the product state '(a_state, b_state)' of state
+                identifiers, None to accept all product states. Counters of the check in its attribute 'counters'
+                (dict) are summed over the workers.
+        """
+        self.fa_a = fa_a
+        self.fa_b = fa_b
+        self.partitions = partitions
+        self.break_when_final = break_when_final
+        self.check = check
+        self.counters = {}
+        self.supersteps_cnt = 0
+
+    def run(self):
+        """
+        Explore the product.
+
+        Returns:
+            optifa.CompactProduct: Merged product.
+        """
+        connections = []
+        processes = []
+        for partition in range(self.partitions):
+            master_connection, worker_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=run_partition, args=(
+                worker_connection, self.fa_a, self.fa_b, partition, self.partitions, self.break_when_final,
+                self.check), daemon=True)
+            process.start()
+            connections.append(master_connection)
+            processes.append(process)
+
+        b_states_cnt = len(self.fa_b.states)
+        incoming = [[] for _ in range(self.partitions)]
+        for a_initial_state in self.fa_a.start:
+            for b_initial_state in self.fa_b.start:
+                incoming[get_owner(a_initial_state * b_states_cnt + b_initial_state, self.partitions)].append(
+                    (a_initial_state, b_initial_state, False))
+
+        while any(incoming):
+            self.supersteps_cnt += 1
+            for connection, pairs in zip(connections, incoming):
+                connection.send(('expand', pairs))
+
+            incoming = [[] for _ in range(self.partitions)]
+            found = False
+            for connection in connections:
+                outgoing, worker_found = connection.recv()
+                found = found or worker_found
+                for owner, pairs in enumerate(outgoing):
+                    incoming[owner].extend(pairs)
+
+            if found and self.break_when_final:
+                break
+
+        product = CompactProduct(self.fa_a, self.fa_b)
+        for connection, pairs in zip(connections, incoming):
+            connection.send(('collect', pairs))
+            counters, states, final, transitions = connection.recv()
+            for name, value in counters.items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            product.states.update(states)
+            product.final.update(final)
+            product.transitions.update(transitions)
+
+        for process in processes:
+            process.join()
+
+        return product
+
+# End of file.
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+
+# file name: pool.py
+#
+# Pool of worker processes checking Parikh image satisfiability of product states.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+from concurrent.futures import ProcessPoolExecutor
+import itertools
+
+import z3
+
+from optifa.basic import add_scc_formulae, add_selector_formulae, check_parikh_image_satisfiability
+from optifa.parikh import ParikhModelPool, ParikhVariables
+from optifa.smtlib import add_persistent_formulae_smtlib
+
+
+# Results of checks by their names passed from worker processes.
+RESULTS = {'sat': z3.sat, 'unsat': z3.unsat, 'unknown': z3.unknown}
+
+# Solver with Parikh image formulae of a worker process and its variables, created by 'init_worker()'.
+worker = {}
+
+
+def init_worker(fa_a, fa_b, config):
+    """
+    Initialize a worker process with its own solver preloaded with persistent and selector formulae.
+
+    Parameters:
+        fa_a (symboliclib.LFA): First automaton of Parikh image formulae.
+        fa_b (symboliclib.LFA): Second automaton of Parikh image formulae.
+        config (optifa.ProgramConfig): Configuration of Parikh image computation.
+    """
+    smt = z3.Solver()
+    if config.timeout:
+        smt.set("timeout", config.timeout)
+
+    fa_a_variables = ParikhVariables(fa_a, 'a')
+    fa_b_variables = ParikhVariables(fa_b, 'b')
+    add_persistent_formulae_smtlib(smt, fa_a_variables, fa_b_variables, config, load_filename=config.load_formulae)
+    add_selector_formulae(smt, fa_a_variables, fa_b_variables, config)
+    if config.scc_constraints:
+        add_scc_formulae(smt, fa_a_variables, fa_b_variables)
+
+    worker.update(smt=smt, fa_a_variables=fa_a_variables, fa_b_variables=fa_b_variables, config=config,
+                  model_pool=ParikhModelPool(fa_a_variables, fa_b_variables, config, config.model_pool_size))
+
+
+def check_pairs(pairs, fa_a_dead_states, fa_b_dead_states):
+    """
+    Check satisfiability of Parikh image formulae for product states in a worker process.
+
+    Dead states found by the workers so far are added to the dead states of the worker before the checks.
+
+    Parameters:
+        pairs (list): Product states as pairs of state names.
+        fa_a_dead_states (set): Dead states of the first automaton found by the workers.
+        fa_b_dead_states (set): Dead states of the second automaton found by the workers.
+
+    Returns:
+        tuple: Names of the results of the checks and the dead states of both automata known to the worker.
+    """
+    fa_a_variables = worker['fa_a_variables']
+    fa_b_variables = worker['fa_b_variables']
+    fa_a_variables.dead_states.update(fa_a_dead_states)
+    fa_b_variables.dead_states.update(fa_b_dead_states)
+    results = [str(check_parikh_image_satisfiability(worker['smt'], fa_a_variables, fa_b_variables, a_state, b_state,
+                                                     worker['config'], worker['model_pool']))
+               for a_state, b_state in pairs]
+    return results, fa_a_variables.dead_states, fa_b_variables.dead_states
+
+
+class ParikhWorkerPool:
+    """
+    Pool of worker processes checking Parikh image satisfiability of batches of product states.
+
+    Every worker holds its own incremental solver with the persistent and selector formulae. A batch of product states
+    is split into chunks of consecutive product states, one for each worker. Satisfiability of a product state does
+    not depend on the order of checks, hence the results are the same as the results of sequential checks.
+
+    Dead states found by the workers are collected by the pool and passed to all the workers with the next batch.
+    """
+
+    def __init__(self, fa_a, fa_b, config, workers):
+        """
+        Parameters:
+            fa_a (symboliclib.LFA): First automaton of Parikh image formulae.
+            fa_b (symboliclib.LFA): Second automaton of Parikh image formulae.
+            config (optifa.ProgramConfig): Configuration of Parikh image computation.
+            workers (int): Number of worker processes.
+        """
+        self.workers = workers
+        self.executor = ProcessPoolExecutor(workers, initializer=init_worker, initargs=(fa_a, fa_b, config))
+        self.checks_cnt = 0  # Number of product states checked by workers.
+        self.fa_a_dead_states = set()  # Dead states of the first automaton found by the workers.
+        self.fa_b_dead_states = set()  # Dead states of the second automaton found by the workers.
+
+    def check(self, pairs):
+        """
+        Check satisfiability of Parikh image formulae for a batch of product states.
+
+        Parameters:
+            pairs (list): Product states as pairs of state names.
+
+        Returns:
+            dict: Results of the checks by product states.
+        """
+        chunk_size = -(-len(pairs) // self.workers)
+        chunks = [pairs[start:start + chunk_size] for start in range(0, len(pairs), chunk_size)]
+        results = []
+        for chunk_results, fa_a_dead_states, fa_b_dead_states in self.executor.map(
+                check_pairs, chunks, itertools.repeat(self.fa_a_dead_states), itertools.repeat(self.fa_b_dead_states)):
+            results.extend(chunk_results)
+            self.fa_a_dead_states.update(fa_a_dead_states)
+            self.fa_b_dead_states.update(fa_b_dead_states)
+        self.checks_cnt += len(pairs)
+        return {pair: RESULTS[result] for pair, result in zip(pairs, results)}
+
+    def shutdown(self):
+        """Stop the worker processes."""
+        self.executor.shutdown(cancel_futures=True)
+
+# End of file.
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+
+# file name: portfolio.py
+#
+# Portfolio of SMT solver configurations run in parallel processes for hard Parikh image queries.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+import json
+import multiprocessing
+import multiprocessing.connection
+import os
+import time
+
+import z3
+
+
+# Timeout of a portfolio query in ms.
+DEFAULT_PORTFOLIO_TIMEOUT = 60000
+
+# Solver configurations of the portfolio.
+CONFIGURATIONS = ('default', 'qflia', 'solve-eqs', 'lia2card', 'simplex')
+
+
+def get_solver(name):
+    """
+    Get a new solver with the given configuration of the portfolio.
+
+    Parameters:
+        name (str): Name of the configuration, one of 'CONFIGURATIONS'.
+
+    Returns:
+        z3.Solver: Solver with the configuration.
+    """
+    if name == 'default':
+        return z3.Solver()
+    if name == 'qflia':
+        return z3.SolverFor('QF_LIA')
+    if name == 'solve-eqs':
+        return z3.Then('simplify', 'solve-eqs', 'smt').solver()
+    if name == 'lia2card':
+        return z3.Then('simplify', 'lia2card', 'smt').solver()
+    if name == 'simplex':
+        smt = z3.Solver()
+        smt.set('arith.solver', 2)
+        return smt
+
+    raise ValueError(f"unknown solver configuration '{name}'")
+
+
+def get_script(assertions):
+    """Get SMT-LIB script with the assertions and declarations of their constants."""
+    smt = z3.Solver()
+    smt.add(assertions)
+    return smt.sexpr()
+
+
+def run_worker(name, connection):
+    """
+    Solve queries with a solver configuration of the portfolio, run in a long-lived worker process.
+
+    Messages are tuples with the command first:
+        ('add', script): Add the formulae of the SMT-LIB script to the solver.
+        ('check', assumptions, timeout): Check the formulae with the Boolean constants named 'assumptions' asserted
+            with the timeout in ms and reply with the result.
+        ('stop',): End.
+
+    Parameters:
+        name (str): Name of the solver configuration.
+        connection (multiprocessing.connection.Connection): Connection to the portfolio.
+    """
+    smt = get_solver(name)
+    while True:
+        message = connection.recv()
+        if message[0] == 'add':
+            smt.add(z3.parse_smt2_string(message[1]))
+        elif message[0] == 'check':
+            smt.set('timeout', message[2])
+            # Solvers built from tactics do not support assumptions, the assumptions are asserted in a scope instead.
+            smt.push()
+            smt.add([z3.Bool(assumption) for assumption in message[1]])
+            connection.send(str(smt.check()))
+            smt.pop()
+        else:
+            return
+
+
+class PortfolioWorker:
+    """Long-lived worker process of the portfolio with the number of formulae of the incremental solver it holds."""
+
+    def __init__(self, name):
+        """
+        Parameters:
+            name (str): Name of the solver configuration.
+        """
+        self.name = name
+        self.connection, worker_connection = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=run_worker, args=(name, worker_connection), daemon=True)
+        self.process.start()
+        self.synced_cnt = 0  # Number of assertions of the incremental solver added to the worker.
+        self.busy = False  # Solving a query with no answer received yet.
+
+    def is_ready(self):
+        """Check whether the worker is ready for a query, dropping the late answer of the previous query."""
+        if self.busy and self.connection.poll():
+            self.connection.recv()
+            self.busy = False
+        return not self.busy
+
+    def stop(self):
+        """Wait for the worker to end, terminate it when it is still solving a query."""
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process.join()
+
+
+class ParikhPortfolio:
+    """
+    Portfolio of solver configurations deciding Parikh image queries the incremental solver did not decide.
+
+    Every configuration of the portfolio runs in a long-lived worker process with its own solver. Before a query, the
+    assertions of the incremental solver not yet added to a worker are passed to it as an SMT-LIB script, hence the
+    formulae are transferred once per worker. The query with the selectors of the initial states is sent to all the
+    ready workers and the first definitive answer is taken. Workers still solving the query after the answer or the
+    timeout keep solving it until their own timeout and skip the following queries meanwhile. Wins of the
+    configurations are stored per pair of automata in a JSON file. A portfolio of limited size runs only the
+    configurations which won most often for the pair in the previous runs.
+
+    Formulae asserted by the incremental solver later, e.g., connectivity cuts, only strengthen the formulae, hence
+    the portfolio solving the formulae at the time of the query never rejects a satisfiable product state. Queries
+    are sent outside of scopes of the incremental solver, hence its assertions only grow between queries.
+    """
+
+    def __init__(self, smt, fa_a_variables, fa_b_variables, size=len(CONFIGURATIONS), stats_file=None,
+                 pair_name=None, timeout=DEFAULT_PORTFOLIO_TIMEOUT):
+        """
+        Parameters:
+            smt (smt.Solver): Incremental smt solver with Parikh image formulae.
+            fa_a_variables (optifa.ParikhVariables): Parikh image variables of the first finite automaton.
+            fa_b_variables (optifa.ParikhVariables): Parikh image variables of the second finite automaton.
+            size (int): Number of configurations to run.
+            stats_file (str): JSON file with wins of the configurations for pairs of automata.
+            pair_name (str): Name of the pair of automata in the statistics.
+            timeout (int): Timeout of a portfolio query in ms.
+        """
+        self.smt = smt
+        self.fa_a_variables = fa_a_variables
+        self.fa_b_variables = fa_b_variables
+        self.timeout = timeout
+        self.stats_file = stats_file
+        self.pair_name = pair_name
+
+        self.stats = {}
+        if stats_file and os.path.isfile(stats_file):
+            with open(stats_file) as portfolio_stats_file:
+                self.stats = json.load(portfolio_stats_file)
+        self.wins = dict.fromkeys(CONFIGURATIONS, 0)
+        pair_wins = self.stats.get(pair_name, {})
+        self.configurations = sorted(CONFIGURATIONS, key=lambda name: -pair_wins.get(name, 0))[:size]
+        self.workers = {}  # Running workers by the names of their configurations, started by the first query.
+
+        self.checks_cnt = 0  # Number of portfolio queries.
+        self.decided_cnt = 0  # Number of portfolio queries with a definitive answer.
+
+    def check(self, a_state, b_state, timeout=None):
+        """
+        Check satisfiability of Parikh image formulae for the product state '(a_state, b_state)' by the portfolio.
+
+        Parameters:
+            a_state (str): State of the first automaton to start the run in.
+            b_state (str): State of the second automaton to start the run in.
+            timeout (int): Timeout of the query in ms, e.g., the remaining budget of time for SMT checks, limited by
+                the timeout of the portfolio.
+
+        Returns:
+            z3.CheckSatResult: The first definitive result, 'z3.unknown' if no configuration decided the query.
+        """
+        self.checks_cnt += 1
+        timeout = self.timeout if timeout is None else min(timeout, self.timeout)
+        assertions = self.smt.assertions()
+        assumptions = [str(self.fa_a_variables.get_selector(a_state)), str(self.fa_b_variables.get_selector(b_state))]
+        pending = {}
+        for name in self.configurations:
+            worker = self.workers.get(name)
+            if worker is None:
+                worker = self.workers[name] = PortfolioWorker(name)
+            if not worker.is_ready():
+                continue
+
+            if worker.synced_cnt < len(assertions):
+                worker.connection.send(('add', get_script(assertions[worker.synced_cnt:])))
+                worker.synced_cnt = len(assertions)
+            worker.connection.send(('check', assumptions, timeout))
+            worker.busy = True
+            pending[worker.connection] = worker
+
+        res = z3.unknown
+        deadline = time.monotonic() + timeout / 1000
+        while pending and res == z3.unknown:
+            ready = multiprocessing.connection.wait(list(pending), timeout=max(deadline - time.monotonic(), 0))
+            if not ready:
+                break  # Timeout.
+
+            for connection in ready:
+                worker = pending.pop(connection)
+                worker.busy = False
+                answer = connection.recv()
+                if answer in ('sat', 'unsat') and res == z3.unknown:
+                    res = z3.sat if answer == 'sat' else z3.unsat
+                    self.wins[worker.name] += 1
+                    self.decided_cnt += 1
+
+        return res
+
+    def shutdown(self):
+        """Stop the workers."""
+        for worker in self.workers.values():
+            if worker.is_ready():
+                worker.connection.send(('stop',))
+            worker.stop()
+        self.workers = {}
+
+    def store_stats(self):
+        """Add wins of the configurations for the pair of automata to the statistics file."""
+        if not self.stats_file:
+            return
+
+        pair_wins = self.stats.setdefault(self.pair_name, {})
+        for name, wins in self.wins.items():
+            pair_wins[name] = pair_wins.get(name, 0) + wins
+
+        with open(self.stats_file, 'w') as portfolio_stats_file:
+            json.dump(self.stats, portfolio_stats_file, indent=4, sort_keys=True)
+
+# End of file.
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+# file name: prefilter.py
+#
+# Pre-filters rejecting product states by summaries of states of compact automata computed in linear time.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+import math
+
+from optifa.scc import find_sccs
+
+
+class StateSummaries:
+    """
+    Summaries of accepting paths from the states of a compact automaton.
+
+    Only states with a final state reachable (live states) have accepting paths. For every live state, the summaries
+    hold the minimal and maximal length of accepted words (infinite when a cycle of live states is reachable), the
+    bit set of symbols read on some accepting path ('may' symbols) and the bit set of symbols read on every accepting
+    path ('must' symbols). Bit sets are integers with the bit of each symbol identifier set.
+    """
+
+    def __init__(self, fa):
+        """
+        Parameters:
+            fa (optifa.CompactAutomaton): Automaton to summarize.
+        """
+        states_cnt = len(fa.states)
+        self.min_lengths = fa.get_final_distances()
+        self.live = [distance is not None for distance in self.min_lengths]
+
+        # Transitions between live states, the only transitions on accepting paths.
+        live_transitions = [[(symbol, target) for symbol, targets in fa.get_transitions(state) for target in targets
+                             if self.live[target]] if self.live[state] else [] for state in range(states_cnt)]
+        sccs = find_sccs(states_cnt, [[target for _, target in transitions] for transitions in live_transitions])
+
+        self.max_lengths = [None] * states_cnt
+        self.may_symbols = [0] * states_cnt
+        # Components are in reverse topological order, hence successor components are summarized first.
+        for scc in sccs:
+            if not self.live[scc[0]]:
+                continue
+
+            scc_states = set(scc)
+            cyclic = len(scc) > 1
+            may_symbols = 0
+            max_length = 0 if any(state in fa.final for state in scc) else -math.inf
+            for state in scc:
+                for symbol, target in live_transitions[state]:
+                    may_symbols |= 1 << symbol
+                    if target in scc_states:
+                        cyclic = True
+                    else:
+                        may_symbols |= self.may_symbols[target]
+                        max_length = max(max_length, self.max_lengths[target] + 1)
+
+            for state in scc:
+                self.may_symbols[state] = may_symbols
+                self.max_lengths[state] = math.inf if cyclic else max_length
+
+        # Must symbols are the greatest fixpoint of intersections over transitions leaving non-final states.
+        all_symbols = (1 << len(fa.symbols)) - 1
+        self.must_symbols = [0 if state in fa.final or not self.live[state] else all_symbols
+                             for state in range(states_cnt)]
+        changed = True
+        while changed:
+            changed = False
+            for scc in sccs:
+                for state in scc:
+                    if not self.live[state] or state in fa.final:
+                        continue
+
+                    must_symbols = all_symbols
+                    for symbol, target in live_transitions[state]:
+                        must_symbols &= (1 << symbol) | self.must_symbols[target]
+                    if must_symbols != self.must_symbols[state]:
+                        self.must_symbols[state] = must_symbols
+                        changed = True
+
+
+class PairPrefilter:
+    """
+    Pre-filter rejecting product states with provably empty intersection of languages of their states.
+
+    The product state '(a_state, b_state)' is rejected when:
+        dead: Either state has no final state reachable.
+        length: The ranges of lengths of words accepted from the states are disjoint.
+        symbols: Either state must read a symbol the other state can never read on an accepting path.
+    Filters are applied in this order and the rejections are counted per filter.
+    """
+
+    def __init__(self, fa_a, fa_b):
+        """
+        Parameters:
+            fa_a (optifa.CompactAutomaton): First automaton.
+            fa_b (optifa.CompactAutomaton): Second automaton with the symbol table shared with 'fa_a'.
+        """
+        self.fa_a_summaries = StateSummaries(fa_a)
+        self.fa_b_summaries = StateSummaries(fa_b)
+        self.checks_cnt = 0
+        self.dead_rejected_cnt = 0
+        self.length_rejected_cnt = 0
+        self.symbols_rejected_cnt = 0
+
+    def check(self, a_state, b_state):
+        """
+        Check the product state of the states with the given identifiers.
+
+        Returns:
+            bool: False if the product state is rejected; True otherwise.
+        """
+        self.checks_cnt += 1
+        a_summaries = self.fa_a_summaries
+        b_summaries = self.fa_b_summaries
+
+        if not a_summaries.live[a_state] or not b_summaries.live[b_state]:
+            self.dead_rejected_cnt += 1
+            return False
+
+        if a_summaries.min_lengths[a_state] > b_summaries.max_lengths[b_state] or \
+                b_summaries.min_lengths[b_state] > a_summaries.max_lengths[a_state]:
+            self.length_rejected_cnt += 1
+            return False
+
+        if a_summaries.must_symbols[a_state] & ~b_summaries.may_symbols[b_state] or \
+                b_summaries.must_symbols[b_state] & ~a_summaries.may_symbols[a_state]:
+            self.symbols_rejected_cnt += 1
+            return False
+
+        return True
+
+# End of file.
@@ -15,6 +15,8 @@ import pickle
 import symboliclib
 from lfa import LFA
 
+from optifa.reduction import REDUCTIONS, reduce_automaton
+
 
 class ProgramConfig:
     """Class for storing program configurations passed as command line arguments."""
@@ -30,6 +32,17 @@ class ProgramConfig:
         else:
             raise ValueError("missing automata arguments or their wrong combination")
 
+        self.fa_a_path = args.fa_a
+        self.fa_b_path = args.fa_b
+
+        # Quotient the automata before any engine runs. Ratios are the numbers of states kept.
+        self.reduction = args.reduction
+        self.fa_a_reduction_ratio = 1.0
+        self.fa_b_reduction_ratio = 1.0
+        if self.reduction:
+            self.fa_a_reduction_ratio = reduce_automaton(self.fa_a_orig, self.reduction)
+            self.fa_b_reduction_ratio = reduce_automaton(self.fa_b_orig, self.reduction)
+
 
 
 class ProgramArgumentsParser:
@@ -54,6 +67,10 @@ class ProgramArgumentsParser:
         automata_path_group.add_argument('--fa-b', '-b', metavar='AUTOMATON_B', type=str, required=True,
                                          help='Automaton B to generate product from.')
 
+        self.arg_parser.add_argument('--reduction', choices=REDUCTIONS,
+                                     help='Reduce the automata to their quotients by bisimulation or forward '
+                                          'simulation equivalence before generating the product.')
+
     def parse_args(self):
         """Parse program command line arguments."""
         args = self.arg_parser.parse_args()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+
+# file name: reduction.py
+#
+# Reduction of automata to quotients by bisimulation or forward simulation equivalence.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+from collections import deque
+
+from optifa.compact import CompactAutomaton
+from optifa.simulation import compute_simulation
+
+
+BISIMULATION = 'bisimulation'
+SIMULATION = 'simulation'
+
+REDUCTIONS = (BISIMULATION, SIMULATION)
+
+
+def compute_bisimulation(fa):
+    """
+    Compute the coarsest forward bisimulation of the automaton by partition refinement with a worklist of splitters.
+
+    The partition starts with final and non-final states. For a splitter block taken from the worklist and every
+    symbol, every block is split to its states with a transition over the symbol to the splitter and the rest, and
+    both parts of a split block become splitters. Only blocks with predecessors of the splitter are visited, hence the
+    refinement takes O(m * n) time for m transitions and n states (Kanellakis-Smolka). Unlike Paige-Tarjan, both parts
+    of a split block are used as splitters, since skipping the larger part requires counts of transitions to blocks
+    for nondeterministic transitions.
+
+    Parameters:
+        fa (optifa.CompactAutomaton): Automaton to compute the bisimulation for.
+
+    Returns:
+        list: Blocks of the states as integers indexed by state identifiers.
+    """
+    reversed_fa = fa.reverse()
+    blocks = [int(state in fa.final) for state in range(len(fa.states))]
+    members = [[state for state in range(len(fa.states)) if blocks[state] == block] for block in (0, 1)]
+    if not members[1] or not members[0]:
+        # A single block, renumbered to 0.
+        members = [members[0] or members[1]]
+        blocks = [0] * len(fa.states)
+
+    worklist = deque(range(len(members)))
+    in_worklist = [True] * len(members)
+    while worklist:
+        splitter = worklist.popleft()
+        in_worklist[splitter] = False
+
+        predecessors = {}
+        for state in members[splitter]:
+            for symbol, sources in reversed_fa.get_transitions(state):
+                predecessors.setdefault(symbol, set()).update(sources)
+
+        for symbol_predecessors in predecessors.values():
+            touched = {}
+            for state in symbol_predecessors:
+                touched.setdefault(blocks[state], []).append(state)
+
+            for block, block_predecessors in touched.items():
+                if len(block_predecessors) == len(members[block]):
+                    continue  # The whole block has a transition to the splitter.
+
+                # The predecessors of the splitter form a new block.
+                new_block = len(members)
+                for state in block_predecessors:
+                    blocks[state] = new_block
+                members[block] = [state for state in members[block] if blocks[state] == block]
+                members.append(block_predecessors)
+                in_worklist.append(True)
+                worklist.append(new_block)
+                if not in_worklist[block]:
+                    in_worklist[block] = True
+                    worklist.append(block)
+
+    return blocks
+
+
+def compute_simulation_equivalence(fa):
+    """
+    Compute the forward simulation equivalence of the automaton, i.e., states simulating each other.
+
+    Simulation equivalence is coarser than bisimulation and states equivalent by it accept the same language.
+
+    Parameters:
+        fa (optifa.CompactAutomaton): Automaton to compute the equivalence for.
+
+    Returns:
+        list: Blocks of the states as integers indexed by state identifiers.
+    """
+    simulators = compute_simulation(fa)
+    blocks = [None] * len(fa.states)
+    blocks_cnt = 0
+    for state in range(len(fa.states)):
+        if blocks[state] is not None:
+            continue
+
+        for equivalent in range(state, len(fa.states)):
+            if simulators[state] >> equivalent & 1 and simulators[equivalent] >> state & 1:
+                blocks[equivalent] = blocks_cnt
+        blocks_cnt += 1
+
+    return blocks
+
+
+def get_quotient(fa, blocks):
+    """
+    Get the quotient of the automaton merging the states of every block.
+
+    Parameters:
+        fa (optifa.CompactAutomaton): Automaton to get the quotient of.
+        blocks (list): Blocks of the states of a language-preserving equivalence, e.g., bisimulation.
+
+    Returns:
+        optifa.CompactAutomaton: Quotient with every block named by its first state, with the same symbol table.
+    """
+    # Blocks are renumbered in the order of their first states.
+    block_ids = {}
+    representatives = []
+    for state in range(len(fa.states)):
+        if blocks[state] not in block_ids:
+            block_ids[blocks[state]] = len(representatives)
+            representatives.append(state)
+
+    transitions = [{} for _ in representatives]
+    for state in range(len(fa.states)):
+        block_transitions = transitions[block_ids[blocks[state]]]
+        for symbol, symbol_targets in fa.get_transitions(state):
+            block_targets = block_transitions.setdefault(symbol, [])
+            for target in symbol_targets:
+                block_target = block_ids[blocks[target]]
+                if block_target not in block_targets:
+                    block_targets.append(block_target)
+
+    return CompactAutomaton([fa.states[state] for state in representatives], fa.symbols,
+                            {block_ids[blocks[state]] for state in fa.start},
+                            {block_ids[blocks[state]] for state in fa.final},
+                            [list(block_transitions.items()) for block_transitions in transitions])
+
+
+def reduce_automaton(fa, reduction):
+    """
+    Reduce the Symboliclib automaton in place to its quotient by the given equivalence.
+
+    Parameters:
+        fa (symboliclib.LFA): Automaton to reduce.
+        reduction (str): Equivalence to reduce the automaton by: 'bisimulation' or 'simulation'.
+
+    Returns:
+        float: Reduction ratio, i.e., the number of states of the quotient divided by the original number of states.
+    """
+    if reduction not in REDUCTIONS:
+        raise ValueError(f"unknown reduction '{reduction}'")
+
+    compact = CompactAutomaton.from_lfa(fa)
+    if reduction == BISIMULATION:
+        blocks = compute_bisimulation(compact)
+    else:
+        blocks = compute_simulation_equivalence(compact)
+    quotient = get_quotient(compact, blocks).to_lfa()
+
+    ratio = len(quotient.states) / len(compact.states) if compact.states else 1.0
+    fa.states = quotient.states
+    fa.start = quotient.start
+    fa.final = quotient.final
+    fa.transitions = quotient.transitions
+    fa.alphabet = quotient.alphabet
+    return ratio
+
+# End of file.
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+# file name: relaxation.py
+#
+# Linear relaxation of Parikh image formulae used as a pre-filter of integer checks.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+import time
+
+import z3
+
+
+class ParikhRelaxation:
+    """
+    Linear relaxation of Parikh image formulae over rationals.
+
+    The relaxation keeps the flow conservation, non-negativity of transitions and equal symbol counts of both automata
+    with 'y' and 'hash' variables over rationals and without connectivity constraints. Initial states are chosen by
+    selectors passed as assumptions, the same way as for the integer formulae, hence the system is asserted once and
+    solved incrementally by the exact rational simplex of the SMT solver for every product state. When the relaxation
+    is infeasible, the integer formulae are unsatisfiable as well and the integer check is not needed.
+    """
+
+    def __init__(self, fa_a_variables, fa_b_variables, timeout=None):
+        """
+        Parameters:
+            fa_a_variables (optifa.ParikhVariables): Parikh image variables of the first finite automaton.
+            fa_b_variables (optifa.ParikhVariables): Parikh image variables of the second finite automaton.
+            timeout (int): Timeout of the SMT solver in ms.
+        """
+        self.fa_a_variables = fa_a_variables
+        self.fa_b_variables = fa_b_variables
+        self.smt = z3.SolverFor('QF_LRA')
+        if timeout:
+            self.smt.set("timeout", timeout)
+
+        self.hash = {}
+        self.selectors = {}
+        for variables in (fa_a_variables, fa_b_variables):
+            self.selectors[variables.prefix] = self.add_automaton_formulae(variables)
+
+        self.checks_cnt = 0  # Number of relaxation checks.
+        self.rejected_cnt = 0  # Product states rejected by infeasible relaxation.
+        self.time = 0.0  # Time spent by relaxation checks in seconds.
+
+    def add_automaton_formulae(self, variables):
+        """
+        Add relaxed formulae for a single automaton.
+
+        Returns:
+            list: Selectors choosing the initial states of the run, by state identifiers.
+        """
+        prefix = 'lp_%s' % variables.prefix
+        y = [z3.Real('%s_y_%s' % (prefix, transition)) for transition in variables.transitions_names]
+        selectors = [z3.Bool('%s_s_%s' % (prefix, state)) for state in variables.states]
+
+        self.smt.add(z3.AtMost(*selectors, 1))
+        for state in range(len(variables.states)):
+            self.smt.add(z3.If(selectors[state], 1, -1 if state in variables.final else 0)
+                         + z3.Sum([y[transition] for transition in variables.ingoing[state]])
+                         - z3.Sum([y[transition] for transition in variables.outgoing[state]]) == 0)
+
+        self.smt.add(z3.And([y_transition >= 0 for y_transition in y]))
+
+        for symbol in variables.alphabet:
+            if symbol not in self.hash:
+                self.hash[symbol] = z3.Real('lp_hash_%s' % symbol)
+            self.smt.add(self.hash[symbol] == z3.Sum([y[transition] for transition in variables.with_symbol[symbol]]))
+
+        return selectors
+
+    def check(self, a_state, b_state):
+        """
+        Check feasibility of the relaxation for the product state '(a_state, b_state)'.
+
+        Returns:
+            z3.CheckSatResult: Result of the SMT solver, 'z3.unsat' if the integer formulae are unsatisfiable.
+        """
+        start = time.perf_counter()
+        res = self.smt.check(self.selectors[self.fa_a_variables.prefix][self.fa_a_variables.state_ids[a_state]],
+                             self.selectors[self.fa_b_variables.prefix][self.fa_b_variables.state_ids[b_state]])
+        self.time += time.perf_counter() - start
+
+        self.checks_cnt += 1
+        if res == z3.unsat:
+            self.rejected_cnt += 1
+
+        return res
+
+# End of file.
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+
+# file name: scc.py
+#
+# Strongly connected components of automata.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+
+def find_sccs(states_cnt, successors):
+    """
+    Find strongly connected components of a graph using iterative Tarjan's algorithm.
+
+    Parameters:
+        states_cnt (int): Number of states identified by integers '0' to 'states_cnt - 1'.
+        successors (list): Successors of each state as lists of state identifiers.
+
+    Returns:
+        list: Strongly connected components as lists of state identifiers, in reverse topological order of the
+            condensation (components reachable from a component precede the component).
+    """
+    indexes = [-1] * states_cnt
+    low_links = [0] * states_cnt
+    on_stack = [False] * states_cnt
+    stack = []
+    sccs = []
+    index = 0
+
+    for root in range(states_cnt):
+        if indexes[root] != -1:
+            continue
+
+        indexes[root] = low_links[root] = index
+        index += 1
+        stack.append(root)
+        on_stack[root] = True
+        work = [(root, iter(successors[root]))]
+        while work:
+            state, state_successors = work[-1]
+            for successor in state_successors:
+                if indexes[successor] == -1:
+                    indexes[successor] = low_links[successor] = index
+                    index += 1
+                    stack.append(successor)
+                    on_stack[successor] = True
+                    work.append((successor, iter(successors[successor])))
+                    break
+                elif on_stack[successor]:
+                    low_links[state] = min(low_links[state], indexes[successor])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low_links[parent] = min(low_links[parent], low_links[state])
+
+                if low_links[state] == indexes[state]:
+                    scc = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        scc.append(member)
+                        if member == state:
+                            break
+                    sccs.append(scc)
+
+    return sccs
+
+# End of file.
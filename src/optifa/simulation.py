@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+
+# file name: simulation.py
+#
+# Forward simulation relation of compact automata and antichains of product states.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+
+def compute_simulation(fa):
+    """
+    Compute the maximal forward simulation relation of the automaton.
+
+    State 'r' simulates state 'p' when 'r' is final whenever 'p' is final and every transition 'p -a-> p2' is matched
+    by a transition 'r -a-> r2' with 'r2' simulating 'p2'. The language of 'p' is then a subset of the language of
+    'r'. The relation is computed by refining the relation of all pairs until no pair is removed.
+
+    Parameters:
+        fa (optifa.CompactAutomaton): Automaton to compute the relation for.
+
+    Returns:
+        list: Bit sets of states simulating each state, as integers indexed by state identifiers.
+    """
+    states_cnt = len(fa.states)
+    all_states = (1 << states_cnt) - 1
+    final = sum(1 << state for state in fa.final)
+
+    # Bit sets of targets of transitions over each symbol leaving each state.
+    targets = []
+    for state in range(states_cnt):
+        state_targets = {}
+        for symbol, symbol_targets in fa.get_transitions(state):
+            state_targets[symbol] = state_targets.get(symbol, 0) | sum(1 << target for target in set(symbol_targets))
+        targets.append(state_targets)
+
+    simulators = [final if state in fa.final else all_states for state in range(states_cnt)]
+    changed = True
+    while changed:
+        changed = False
+        for state in range(states_cnt):
+            for symbol, symbol_targets in fa.get_transitions(state):
+                for target in symbol_targets:
+                    # States with a transition over the symbol to a state simulating the target.
+                    matching = 0
+                    candidates = simulators[state]
+                    while candidates:
+                        candidate = candidates & -candidates
+                        candidates ^= candidate
+                        if targets[candidate.bit_length() - 1].get(symbol, 0) & simulators[target]:
+                            matching |= candidate
+
+                    if matching != simulators[state]:
+                        simulators[state] = matching
+                        changed = True
+
+    return simulators
+
+
+def get_simulated(simulators):
+    """Get bit sets of states simulated by each state from bit sets of states simulating each state."""
+    simulated = [0] * len(simulators)
+    for state, state_simulators in enumerate(simulators):
+        while state_simulators:
+            simulator = state_simulators & -state_simulators
+            state_simulators ^= simulator
+            simulated[simulator.bit_length() - 1] |= 1 << state
+
+    return simulated
+
+
+class ProductAntichain:
+    """
+    Antichain of explored product states subsuming product states simulated by them.
+
+    Product state '(p, q)' is subsumed by an explored product state '(p2, q2)' when 'p2' simulates 'p' and 'q2'
+    simulates 'q'. Every word accepted from '(p, q)' is accepted from '(p2, q2)' and every abstraction of languages
+    unsatisfiable for '(p2, q2)' is unsatisfiable for '(p, q)', hence the emptiness test does not need to explore
+    '(p, q)'. Only the maximal explored product states are kept.
+    """
+
+    def __init__(self, fa_a, fa_b):
+        """
+        Parameters:
+            fa_a (optifa.CompactAutomaton): First automaton.
+            fa_b (optifa.CompactAutomaton): Second automaton.
+        """
+        self.fa_a_simulators = compute_simulation(fa_a)
+        self.fa_b_simulators = compute_simulation(fa_b)
+        self.fa_a_simulated = get_simulated(self.fa_a_simulators)
+        self.fa_b_simulated = get_simulated(self.fa_b_simulators)
+        self.explored = [0] * len(fa_a.states)  # Bit sets of states of FA B explored with each state of FA A.
+        self.subsumed_cnt = 0  # Number of product states not explored because they are subsumed.
+
+    def is_subsumed(self, a_state, b_state):
+        """Check whether the product state is subsumed by an explored product state, counting subsumed states."""
+        b_simulators = self.fa_b_simulators[b_state]
+        a_simulators = self.fa_a_simulators[a_state]
+        while a_simulators:
+            a_simulator = a_simulators & -a_simulators
+            a_simulators ^= a_simulator
+            if self.explored[a_simulator.bit_length() - 1] & b_simulators:
+                self.subsumed_cnt += 1
+                return True
+
+        return False
+
+    def add(self, a_state, b_state):
+        """Add the explored product state and remove the product states it subsumes."""
+        b_simulated = self.fa_b_simulated[b_state]
+        a_simulated = self.fa_a_simulated[a_state]
+        while a_simulated:
+            a_simulated_state = a_simulated & -a_simulated
+            a_simulated ^= a_simulated_state
+            self.explored[a_simulated_state.bit_length() - 1] &= ~b_simulated
+
+        self.explored[a_state] |= 1 << b_state
+
+# End of file.
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+
+# file name: smtlib.py
+#
+# Persistent Parikh image formulae rendered in SMT-LIB format.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+import hashlib
+
+import z3
+
+# Prefix of the first line of a stored script with the key of the automata and the configuration it was rendered for.
+KEY_PREFIX = '; optifa persistent formulae '
+
+
+def get_persistent_formulae_smtlib(fa_a_variables, fa_b_variables, config):
+    """
+    Render persistent formulae valid for every product state as a single SMT-LIB script.
+
+    The script declares all its variables with the same names as 'optifa.ParikhVariables', hence the loaded
+    formulae share the variables with formulae built through Z3 Python API. The formulae are equivalent to the
+    formulae added by 'add_persistent_formulae()'.
+
+    Parameters:
+        fa_a_variables (optifa.ParikhVariables): Parikh image variables of the first finite automaton.
+        fa_b_variables (optifa.ParikhVariables): Parikh image variables of the second finite automaton.
+        config (optifa.ProgramConfig): Configuration of Parikh image computation.
+
+    Returns:
+        str: SMT-LIB script with the key comment, declarations and assertions.
+    """
+    declarations = [KEY_PREFIX + get_formulae_key(fa_a_variables, fa_b_variables, config)]
+    assertions = []
+    hash_symbols = set()
+    for variables in (fa_a_variables, fa_b_variables):
+        render_automaton_persistent_formulae(variables, config, declarations, assertions)
+        hash_symbols.update(variables.alphabet)
+
+    declarations.extend(f"(declare-fun {get_symbol('hash_%s' % symbol)} () Int)" for symbol in sorted(hash_symbols))
+
+    return '\n'.join(declarations + assertions) + '\n'
+
+
+def render_automaton_persistent_formulae(variables, config, declarations, assertions):
+    """
+    Render persistent formulae for a single automaton.
+
+    Parameters:
+        variables (optifa.ParikhVariables): Parikh image variables of the automaton.
+        config (optifa.ProgramConfig): Configuration of Parikh image computation.
+        declarations (list): List to append variables declarations to.
+        assertions (list): List to append assertions to.
+    """
+    prefix = variables.prefix
+    y = [get_symbol('%s_y_%s' % (prefix, transition)) for transition in variables.transitions_names]
+    u = [get_symbol('%s_u_%s' % (prefix, state)) for state in variables.states]
+    z = [get_symbol('%s_z_%s' % (prefix, state)) for state in variables.states]
+    use_z = config.reverse_lengths and config.use_z_constraints
+
+    declarations.extend(f"(declare-fun {name} () Int)" for name in y + u + (z if use_z else []))
+
+    # First conjunct.
+    for state in range(len(variables.states)):
+        ingoing = [y[transition] for transition in variables.ingoing[state]]
+        outgoing = [y[transition] for transition in variables.outgoing[state]]
+        assertions.append(f"(assert (= {get_sum([u[state]] + ingoing)} {get_sum(outgoing)}))")
+
+    # Second conjunct.
+    assertions.extend(f"(assert (>= {y_transition} 0))" for y_transition in y)
+
+    # Third conjunct.
+    for symbol in variables.alphabet:
+        assertions.append(f"(assert (= {get_symbol('hash_%s' % symbol)} "
+                          f"{get_sum([y[transition] for transition in variables.with_symbol[symbol]])}))")
+
+    if use_z:
+        # Fourth conjunct. Outgoing transitions of final states are non-negative by the second conjunct.
+        for state in range(len(variables.states)):
+            if state in variables.final:
+                assertions.append(f"(assert (= {z[state]} 1))")
+
+            if state not in variables.start and state not in variables.final:
+                unreached = get_conjunction([f"(= {z[state]} 0)"] +
+                                            [f"(= {y[transition]} 0)" for transition in variables.ingoing[state]])
+                reached = get_disjunction([
+                    f"(and (>= {y[transition]} 0) (> {z[variables.sources[transition]]} 0) "
+                    f"(= {z[state]} (- {z[variables.sources[transition]]} 1)))"
+                    for transition in variables.ingoing[state]])
+                assertions.append(f"(assert (or {unreached} {reached}))")
+
+
+def get_formulae_key(fa_a_variables, fa_b_variables, config):
+    """
+    Get key of the persistent formulae, i.e., a hash of the automata of the variables and of the configuration options
+    the formulae depend on. The key does not depend on the order of states and transitions.
+    """
+    key = hashlib.sha256()
+    for variables in (fa_a_variables, fa_b_variables):
+        states = variables.states
+        transitions = sorted(zip(variables.transitions_names, (states[source] for source in variables.sources),
+                                 (states[target] for target in variables.targets), variables.transitions_symbols))
+        key.update(repr((variables.prefix, sorted(states), transitions,
+                         sorted(states[state] for state in variables.start),
+                         sorted(states[state] for state in variables.final), sorted(variables.alphabet))).encode())
+    key.update(repr((config.reverse_lengths, config.use_z_constraints)).encode())
+    return key.hexdigest()
+
+
+def add_persistent_formulae_smtlib(smt, fa_a_variables, fa_b_variables, config, filename=None, load_filename=None):
+    """
+    Add persistent formulae valid for every product state loaded from a single SMT-LIB script.
+
+    A script stored for reuse starts with a comment with the key of the automata and the configuration. A stored
+    script is loaded instead of rendering the formulae only if its key matches.
+
+    Parameters:
+        smt (smt.Solver): Smt solver to solve Parikh image satisfiability.
+        fa_a_variables (optifa.ParikhVariables): Parikh image variables of the first finite automaton.
+        fa_b_variables (optifa.ParikhVariables): Parikh image variables of the second finite automaton.
+        config (optifa.ProgramConfig): Configuration of Parikh image computation.
+        filename (str): File to store the SMT-LIB script to for reuse, not stored if not given.
+        load_filename (str): File with a stored SMT-LIB script to load, rendered if not given.
+    """
+    if load_filename:
+        with open(load_filename) as script_file:
+            stored_key = script_file.readline().rstrip('\n')
+        if stored_key != KEY_PREFIX + get_formulae_key(fa_a_variables, fa_b_variables, config):
+            raise ValueError(f"formulae file '{load_filename}' was stored for other automata or configuration")
+
+        smt.add(z3.parse_smt2_file(load_filename))
+        return
+
+    script = get_persistent_formulae_smtlib(fa_a_variables, fa_b_variables, config)
+    if filename:
+        with open(filename, 'w') as script_file:
+            script_file.write(script)
+
+    smt.add(z3.parse_smt2_string(script))
+
+
+def get_symbol(name):
+    """Get SMT-LIB quoted symbol for the variable name."""
+    if '|' in name or '\\' in name:
+        raise ValueError(f"variable name '{name}' cannot be quoted in SMT-LIB")
+    return '|' + name + '|'
+
+
+def get_sum(terms):
+    """Get SMT-LIB sum of the terms, '0' for no terms."""
+    if not terms:
+        return '0'
+    if len(terms) == 1:
+        return terms[0]
+    return '(+ ' + ' '.join(terms) + ')'
+
+
+def get_conjunction(terms):
+    """Get SMT-LIB conjunction of the terms, 'true' for no terms."""
+    if not terms:
+        return 'true'
+    return '(and ' + ' '.join(terms) + ')'
+
+
+def get_disjunction(terms):
+    """Get SMT-LIB disjunction of the terms, 'false' for no terms."""
+    if not terms:
+        return 'false'
+    return '(or ' + ' '.join(terms) + ')'
+
+# End of file.
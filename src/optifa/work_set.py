@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+
+# file name: work_set.py
+#
+# Indexed work set of product states.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+from collections import deque
+import heapq
+import itertools
+import math
+
+
+class PairWorkSet:
+    """
+    Work set of product states (pairs of states of the original automata) waiting to be processed.
+
+    Every pending pair is indexed by a hash table from the pair to its work set entry. Testing whether a pair is
+    pending and upgrading its skip flag therefore takes O(1) time regardless of the size of the work set.
+
+    Work set entries are lists '[a_state, b_state, skip]' where 'skip' marks a pair which does not need to be
+    checked for satisfiability.
+    """
+
+    DFS = 'dfs'
+    BFS = 'bfs'
+    PRIORITY = 'priority'
+
+    ORDERS = (DFS, BFS, PRIORITY)
+
+    # Exploration strategies selectable by the engines.
+    BEST_FIRST = 'best-first'
+    STRATEGIES = (DFS, BFS, BEST_FIRST)
+
+    def __init__(self, order=DFS, priority=None):
+        """
+        Parameters:
+            order (str): Order to pop the pairs in: 'dfs', 'bfs' or 'priority'.
+            priority (callable): Function computing priority of a pair '(a_state, b_state)' for 'priority' order.
+                Pairs with lower priority are popped first, pairs with equal priority in the order of pushing.
+        """
+        if order not in self.ORDERS:
+            raise ValueError(f"unknown work set order '{order}'")
+        if order == self.PRIORITY and priority is None:
+            raise ValueError("priority order requires a priority function")
+
+        self.order = order
+        self.priority = priority
+        self.entries = [] if order == self.PRIORITY else deque()
+        self.index = {}
+        self.counter = itertools.count()  # Tie breaker for pairs with equal priority.
+
+    @classmethod
+    def for_strategy(cls, strategy, fa_a, fa_b):
+        """
+        Create a work set of product states of compact automata popping them in the order of the exploration strategy.
+
+        Best-first strategy pops first the product states with the lowest lower bound on the distance to a final
+        product state, i.e., the larger of the shortest distances of their states to a final state in the original
+        automata, as A* search with an admissible heuristic. Product states with no final state reachable in either
+        automaton are popped last.
+
+        Parameters:
+            strategy (str): Exploration strategy: 'dfs', 'bfs' or 'best-first'.
+            fa_a (optifa.CompactAutomaton): First automaton.
+            fa_b (optifa.CompactAutomaton): Second automaton.
+
+        Returns:
+            PairWorkSet: Work set for the strategy.
+        """
+        if strategy not in cls.STRATEGIES:
+            raise ValueError(f"unknown exploration strategy '{strategy}'")
+        if strategy != cls.BEST_FIRST:
+            return cls(strategy)
+
+        a_distances = [math.inf if distance is None else distance for distance in fa_a.get_final_distances()]
+        b_distances = [math.inf if distance is None else distance for distance in fa_b.get_final_distances()]
+        return cls(cls.PRIORITY, lambda a_state, b_state: max(a_distances[a_state], b_distances[b_state]))
+
+    def push(self, a_state, b_state, skip=False):
+        """
+        Push a pair to the work set or upgrade the skip flag of an already pending pair.
+
+        Parameters:
+            a_state: State of the first automaton.
+            b_state: State of the second automaton.
+            skip (bool): The pair does not need to be checked for satisfiability.
+
+        Returns:
+            bool: True if the pair was newly pushed; False if the pair was already pending.
+        """
+        entry = self.index.get((a_state, b_state))
+        if entry is not None:
+            if skip:
+                entry[2] = True
+            return False
+
+        entry = [a_state, b_state, skip]
+        self.index[(a_state, b_state)] = entry
+        if self.order == self.PRIORITY:
+            heapq.heappush(self.entries, (self.priority(a_state, b_state), next(self.counter), entry))
+        else:
+            self.entries.append(entry)
+
+        return True
+
+    def pop(self):
+        """
+        Pop the next pair from the work set.
+
+        Returns:
+            list: Work set entry '[a_state, b_state, skip]'.
+        """
+        if self.order == self.DFS:
+            entry = self.entries.pop()
+        elif self.order == self.BFS:
+            entry = self.entries.popleft()
+        else:
+            entry = heapq.heappop(self.entries)[2]
+
+        del self.index[(entry[0], entry[1])]
+        return entry
+
+    def peek(self, count):
+        """
+        Get the next pairs in the work set without popping them.
+
+        Parameters:
+            count (int): Maximal number of pairs to get.
+
+        Returns:
+            list: Work set entries '[a_state, b_state, skip]' in the order of popping, for 'priority' order in the
+                order of priorities.
+        """
+        if count <= 0:
+            return []
+        if self.order == self.DFS:
+            return list(itertools.islice(reversed(self.entries), count))
+        elif self.order == self.BFS:
+            return list(itertools.islice(self.entries, count))
+        else:
+            return [heap_entry[2] for heap_entry in heapq.nsmallest(count, self.entries)]
+
+    def __contains__(self, pair):
+        return (pair[0], pair[1]) in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def __bool__(self):
+        return bool(self.index)
+
+# End of file.
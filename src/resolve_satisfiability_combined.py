@@ -15,6 +15,21 @@ import z3
 
 from lfa import LFA
 from optifa.basic import *
+from optifa.bidirectional import BidirectionalSearch
+from optifa.length_formulae import LengthFormulaeTable
+from optifa.length_satisfiability import DEFAULT_CACHE_SIZE, LengthSatisfiabilityCache
+from optifa.compact import CompactAutomaton, CompactProduct
+from optifa.batch import ParikhBatchChecker
+from optifa.budget import SmtBudget
+from optifa.cascade import DEFAULT_REORDER_INTERVAL, AbstractionCascade
+from optifa.parikh import DEFAULT_MODEL_POOL_SIZE, ParikhModelPool, ParikhVariables
+from optifa.pool import ParikhWorkerPool
+from optifa.portfolio import DEFAULT_PORTFOLIO_TIMEOUT, ParikhPortfolio
+from optifa.prefilter import PairPrefilter
+from optifa.relaxation import ParikhRelaxation
+from optifa.simulation import ProductAntichain
+from optifa.smtlib import add_persistent_formulae_smtlib
+from optifa.work_set import PairWorkSet
 from optifa.program_config import ProductConstructionConfig, ProductConstructionArgumentsParser
 
 
@@ -50,108 +65,156 @@ def main():
         smt.set("timeout", config.timeout)  # Set solver to timeout after given amount of time in ms.
 
     # Add Parikh image formulae which are the same for all potential product-states tested for satisfiability.
-    add_persistent_formulae(smt, fa_a_orig, fa_b_orig, config)
+    # Variables of Parikh image formulae are created once and shared by all formulae.
+    fa_a_variables = ParikhVariables(fa_a_orig, 'a')
+    fa_b_variables = ParikhVariables(fa_b_orig, 'b')
+
+    # Persistent formulae are loaded from a single SMT-LIB script.
+    add_persistent_formulae_smtlib(smt, fa_a_variables, fa_b_variables, config, config.store_formulae,
+                                   config.load_formulae)
+    # Initial states of the checked product states are chosen by selectors passed as assumptions.
+    add_selector_formulae(smt, fa_a_variables, fa_b_variables, config)
+    if config.scc_constraints:
+        add_scc_formulae(smt, fa_a_variables, fa_b_variables)
+    # Recent satisfying models are reused for the following product states without calling the solver.
+    model_pool = ParikhModelPool(fa_a_variables, fa_b_variables, config, config.model_pool_size)
+    # Linear relaxation of Parikh image formulae rejects product states before the integer check.
+    relaxation = ParikhRelaxation(fa_a_variables, fa_b_variables, config.timeout) if config.lp_relaxation else None
+    # Timeouts of integer checks are derived from the remaining budget of time for all checks.
+    budget = SmtBudget(config.smt_budget, config.timeout) if config.smt_budget else None
+    # Formulae not decided by the solver are decided by a portfolio of solver configurations in parallel processes.
+    portfolio = ParikhPortfolio(smt, fa_a_variables, fa_b_variables, config.portfolio, config.portfolio_stats,
+                                f"{config.fa_a_path},{config.fa_b_path}", config.portfolio_timeout) \
+        if config.portfolio else None
+    # Batches of product states are checked by worker processes, each with its own solver.
+    pool = ParikhWorkerPool(fa_a_orig, fa_b_orig, config, config.workers) if config.workers > 1 else None
+
+    # Explore the product on compact automata with states and symbols interned to integers.
+    fa_a_compact, fa_b_compact = CompactAutomaton.from_lfa_pair(fa_a_orig, fa_b_orig)
+    if config.trim:
+        # Only useful states are explored, hence product states with a dead state are never pushed or checked.
+        fa_a_compact = fa_a_compact.trim()
+        fa_b_compact = fa_b_compact.trim()
 
     # Define additional variables.
     q_checked_pairs = {}
-    q_pair_states = deque()
+    q_pair_states = PairWorkSet.for_strategy(config.strategy, fa_a_compact, fa_b_compact)
+    # Pending product states are checked for Parikh image satisfiability in batches of the configured size. The
+    # linear relaxation is a stage of the cascade of abstraction checks instead of a part of the Parikh image check.
+    parikh_checker = ParikhBatchChecker(smt, fa_a_variables, fa_b_variables, config, q_pair_states, fa_a_compact,
+                                       fa_b_compact, model_pool, budget=budget, portfolio=portfolio, pool=pool)
+
+    # Product states with provably empty intersection of languages are rejected before the abstraction checks.
+    prefilter = PairPrefilter(fa_a_compact, fa_b_compact) if config.prefilters else None
+    # In emptiness test, product states simulated by explored product states are not explored.
+    antichain = ProductAntichain(fa_a_compact, fa_b_compact) if config.antichain and config.break_when_final else None
 
     # Enqueue the initial states.
-    for a_initial_state in fa_a_orig.start:
-        for b_initial_state in fa_b_orig.start:
-            q_pair_states.append([a_initial_state, b_initial_state, False])
+    for a_initial_state in fa_a_compact.start:
+        for b_initial_state in fa_b_compact.start:
+            q_pair_states.push(a_initial_state, b_initial_state)
+            if antichain is not None:
+                antichain.add(a_initial_state, b_initial_state)
 
-    # Generate single handle and loop automata per original input automaton.
-    # Therefore, only single handle and loop automaton for all of the tested
-    # states in the original automaton is needed.
-    fa_a_handle_and_loop = LFA.get_new()
-    fa_b_handle_and_loop = LFA.get_new()
-    intersect_ab = LFA.get_new()
+    intersect_ab = CompactProduct(fa_a_compact, fa_b_compact)
 
     fa_a_unified = deepcopy(fa_a_orig)
     fa_b_unified = deepcopy(fa_b_orig)
 
     fa_a_unified.unify_transition_symbols()
     fa_b_unified.unify_transition_symbols()
-    fa_a_copy = deepcopy(fa_a_orig)
-    fa_b_copy = deepcopy(fa_b_orig)
+
+    # Handle and loop formulae are computed once per state of the original automata and shared by all the tested
+    # product states containing the state.
+    fa_a_formulae = LengthFormulaeTable(fa_a_unified)
+    fa_b_formulae = LengthFormulaeTable(fa_b_unified)
+    # Product states with identical formulae sets share a single satisfiability check.
+    length_cache = LengthSatisfiabilityCache(config.length_cache_size)
 
     found = False
     skipped_cnt = 0
     false_cnt = 0
     sat_cnt = 0
     sat_counters = SatCounters()
+    # Abstractions are checked by a cascade of stages, optionally reordered by their measured cost and pruning power.
+    cascade = AbstractionCascade(get_stages(config, fa_a_compact, fa_b_compact, fa_a_formulae, fa_b_formulae,
+                                            length_cache, prefilter, relaxation, parikh_checker, sat_counters),
+                                 sat_counters, config.adaptive_cascade, config.cascade_interval)
+
+    if config.bidirectional:
+        # Emptiness is tested by searching forward from the initial and backward from the final product states.
+        search = BidirectionalSearch(fa_a_compact, fa_b_compact, lambda a, b: check_satisfiability(
+            fa_a_compact, fa_b_compact, a, b, cascade))
+        found = search.run()
+        intersect_ab = search.product
+        checked_cnt = search.get_checked_cnt()
+        processed_pair_states_cnt = search.processed_cnt
+        sat_cnt = search.sat_cnt
+        false_cnt = search.false_cnt
+    else:
+        # When there are any pair states to test for satisfiability, test them.
+        while q_pair_states:
+            curr_pair = q_pair_states.pop()
+            product_state = intersect_ab.get_state(curr_pair[0], curr_pair[1])
+
+            q_checked_pairs[product_state] = True
+
+            # If the current pair is a single pair created from the previous pair,
+            # no need to check for satisfiability.
+            #if True:  # Turn Skip feature off.
+            if not curr_pair[2]:
+                processed_pair_states_cnt += 1
+                satisfiable = check_satisfiability(fa_a_compact, fa_b_compact, curr_pair[0], curr_pair[1], cascade)
+                if satisfiable:
+                    sat_cnt += 1
+            else:
+                satisfiable = True
+                #printproduct_state_name + " sat", end='  ')
+                skipped_cnt += 1
 
-    # When there are any pair states to test for satisfiability, test them.
-    while q_pair_states:
-        #curr_pair = q_pair_states.popleft()  # BFS
-        curr_pair = q_pair_states.pop()  # DFS
-        product_state_name = curr_pair[0] + ',' + curr_pair[1]
+            if satisfiable:
+                # Add product states to intersection FA.
+                intersect_ab.add_state(product_state)
 
-        q_checked_pairs[product_state_name] = True
+                if curr_pair[0] in fa_a_compact.final and curr_pair[1] in fa_b_compact.final:
+                    # Automata have a non-empty intersection. We can end the testing here as we have found a
+                    # solution.
+                    intersect_ab.final.add(product_state)
+                    found = True
+                    if config.break_when_final:
+                        break
 
-        fa_a_unified.start = {curr_pair[0]}
-        fa_b_unified.start = {curr_pair[1]}
-        fa_a_copy.start = {curr_pair[0]}
-        fa_b_copy.start = {curr_pair[1]}
+                #print(q_pair_states)
+                #old_pair_states_len = len(q_pair_states)
 
-        # If the current pair is a single pair created from the previous pair,
-        # no need to check for satisfiability.
-        #if True:  # Turn Skip feature off.
-        if not curr_pair[2]:
-            processed_pair_states_cnt += 1
-            fa_a_unified.determinize_check(fa_a_handle_and_loop)
-            fa_b_unified.determinize_check(fa_b_handle_and_loop)
+                # Generate the following potential product-states.
+                make_pairs(fa_a_compact, fa_b_compact, q_pair_states, q_checked_pairs, intersect_ab, curr_pair,
+                           antichain=antichain)
 
-            if not fa_a_handle_and_loop.final or not fa_b_handle_and_loop.final:
-                break
+                #pair_states_len_diff = len(q_pair_states) - old_pair_states_len
+                #print(pair_states_len_diff)
+                #print(q_pair_states)
+            else:
+                false_cnt += 1
 
-            fa_a_formulae_dict = fa_a_handle_and_loop.count_formulae_for_lfa()
-            #print(fa_a_formulae_dict)  # DEBUG
-            fa_b_formulae_dict = fa_b_handle_and_loop.count_formulae_for_lfa()
-            #print(fa_b_formulae_dict)  # DEBUG
+            #printlen(q_pair_states))
 
-            satisfiable = check_satisfiability(fa_a_copy, fa_b_copy, fa_a_formulae_dict, fa_b_formulae_dict, sat_counters, smt, config)
-            if satisfiable:
-                sat_cnt += 1
-        else:
-            satisfiable = True
-            #printproduct_state_name + " sat", end='  ')
-            skipped_cnt += 1
-
-        if satisfiable:
-            # Add product states to intersection FA.
-            intersect_ab.states.add(product_state_name)
-            if product_state_name not in intersect_ab.transitions:
-                intersect_ab.transitions[product_state_name] = {}
-
-            if curr_pair[0] in fa_a_orig.final and curr_pair[1] in fa_b_orig.final:
-                # Automata have a non-empty intersection. We can end the testing here as we have found a solution.
-                intersect_ab.final.add(product_state_name)
-                found = True
-                if config.break_when_final:
-                    break
-
-            #print(q_pair_states)
-            #old_pair_states_len = len(q_pair_states)
-
-            # Generate the following potential product-states.
-            make_pairs(fa_a_orig, fa_b_orig, q_pair_states, q_checked_pairs, intersect_ab, curr_pair)
-
-            #pair_states_len_diff = len(q_pair_states) - old_pair_states_len
-            #print(pair_states_len_diff)
-            #print(q_pair_states)
-        else:
-            false_cnt += 1
-
-        #printlen(q_pair_states))
+        checked_cnt = len(q_checked_pairs)
 
+    intersect_ab = intersect_ab.to_lfa()
     intersect_ab.start = {f"{abstract_initial_state},{abstract_initial_state}"}
     intersect_ab.remove_useless_transitions()
     intersect_ab.remove_abstract_final_state(abstract_final_symbol, abstract_final_state)
     intersect_ab.remove_abstract_initial_state(abstract_initial_symbol, abstract_initial_state)
     # Output format: <checked> <processed> <sat> <false_cnt> <skipped>.. <intersect_states> <final_cnt>
-    print_csv(len(q_checked_pairs))
+    # <formulae_hits> <formulae_misses> <length_cache_hits> <length_cache_hit_rate>
+    # <connectivity_cuts> <model_pool_hits> <dead_state_hits> <batch_checks>
+    # <batch_rejected> <relaxation_rejected> <relaxation_time> <parikh_time>
+    # <parikh_unknown> <smt_escalations> <portfolio_checks> <portfolio_decided>
+    # <worker_checks> <antichain_subsumed> <prefilter_dead> <prefilter_length>
+    # <prefilter_symbols> <cascade_reorders> <cascade_disabled> <cascade_order> <fa_a_states> <fa_b_states>
+    # <fa_a_reduction_ratio> <fa_b_reduction_ratio>
+    print_csv(checked_cnt)
     print_csv(processed_pair_states_cnt)
     print_csv(sat_cnt)
     print_csv(false_cnt)
@@ -161,31 +224,127 @@ def main():
     print_csv(sat_counters.parikh_image_sat_states)
     print_csv(sat_counters.parikh_image_unsat_states)
     if len(fa_a_orig.states) > len(fa_b_orig.states):
-        print_csv(len(fa_a_handle_and_loop.states))
-        print_csv(len(fa_b_handle_and_loop.states))
+        print_csv(fa_a_formulae.handle_and_loop_states_cnt)
+        print_csv(fa_b_formulae.handle_and_loop_states_cnt)
     else:
-        print_csv(len(fa_b_handle_and_loop.states))
-        print_csv(len(fa_a_handle_and_loop.states))
+        print_csv(fa_b_formulae.handle_and_loop_states_cnt)
+        print_csv(fa_a_formulae.handle_and_loop_states_cnt)
     print_csv(len(intersect_ab.states))
     print_csv(len(intersect_ab.final))
+    print_csv(fa_a_formulae.hits + fa_b_formulae.hits)
+    print_csv(fa_a_formulae.misses + fa_b_formulae.misses)
+    print_csv(length_cache.hits)
+    print_csv(f"{length_cache.get_hit_rate():.4f}")
+    print_csv(fa_a_variables.cuts_cnt + fa_b_variables.cuts_cnt)
+    print_csv(model_pool.hits)
+    print_csv(fa_a_variables.dead_hits + fa_b_variables.dead_hits)
+    print_csv(parikh_checker.batch_checks_cnt)
+    print_csv(parikh_checker.batch_rejected_cnt)
+    print_csv(relaxation.rejected_cnt if relaxation is not None else 0)
+    print_csv(f"{relaxation.time if relaxation is not None else 0.0:.4f}")
+    print_csv(f"{parikh_checker.smt_time:.4f}")
+    print_csv(sat_counters.parikh_image_unknown_states)
+    print_csv(budget.escalations_cnt if budget is not None else 0)
+    print_csv(portfolio.checks_cnt if portfolio is not None else 0)
+    print_csv(portfolio.decided_cnt if portfolio is not None else 0)
+    print_csv(pool.checks_cnt if pool is not None else 0)
+    print_csv(antichain.subsumed_cnt if antichain is not None else 0)
+    print_csv(prefilter.dead_rejected_cnt if prefilter is not None else 0)
+    print_csv(prefilter.length_rejected_cnt if prefilter is not None else 0)
+    print_csv(prefilter.symbols_rejected_cnt if prefilter is not None else 0)
+    print_csv(sat_counters.cascade_reorders)
+    print_csv(sat_counters.cascade_disabled_stages)
+    print_csv(cascade.get_order())
+    print_csv(len(fa_a_compact.states))
+    print_csv(len(fa_b_compact.states))
+    print_csv(f"{config.fa_a_reduction_ratio:.4f}")
+    print_csv(f"{config.fa_b_reduction_ratio:.4f}")
     #print(intersect_ab.transitions)
     #intersect_ab.print_automaton()
     #print(intersect_ab.final)
 
+    if portfolio is not None:
+        portfolio.store_stats()
+        portfolio.shutdown()
+    if pool is not None:
+        pool.shutdown()
+
     # Store product.
     if config.store_result:
         intersect_ab.print_automaton(config.store_result)
 
 
-def check_satisfiability(fa_a, fa_b, fa_a_formulae_dict, fa_b_formulae_dict, sat_counters, smt, config):
+def get_stages(config, fa_a, fa_b, fa_a_formulae, fa_b_formulae, length_cache, prefilter, relaxation, parikh_checker,
+               sat_counters):
     """
-    Check satisfiability for formulae and Parikh image using SMT solver Z3.
-    :param fa_a: First automaton.
-    :param fa_b: Second automaton.
-    :param fa_a_formulae_dict: Dictionary with formulae for FA A.
-    :param fa_b_formulae_dict: Dictionary with formulae for FA B.
-    :param sat_counters: Counters of various satisfiability combinations.
+    Get stages of the cascade of abstraction checks in their initial order: pre-filters, length abstraction, linear
+    relaxation of Parikh image and Parikh image.
     :param config: Program configuration.
+    :param fa_a: First compact automaton.
+    :param fa_b: Second compact automaton.
+    :param fa_a_formulae: Length formulae of the states of the first automaton.
+    :param fa_b_formulae: Length formulae of the states of the second automaton.
+    :param length_cache: Cache of length abstraction satisfiability results.
+    :param prefilter: Pre-filter of product states, None for no pre-filter stage.
+    :param relaxation: Linear relaxation of Parikh image formulae, None for no relaxation stage.
+    :param parikh_checker: Checker of Parikh image satisfiability.
+    :param sat_counters: Counters of various satisfiability combinations.
+    :return: Pairs '(name, check)' of the stages checking product states of state identifiers.
+    """
+
+    def check_length(a_state, b_state):
+        fa_a_formulae_dict = fa_a_formulae.get_formulae(fa_a.states[a_state])
+        fa_b_formulae_dict = fa_b_formulae.get_formulae(fa_b.states[b_state])
+        if fa_a_formulae_dict is None or fa_b_formulae_dict is None:
+            return False  # No final state is reachable.
+
+        if not check_length_satisfiability(config, fa_a_formulae_dict, fa_b_formulae_dict, length_cache):
+            sat_counters.length_abstraction_unsat_states += 1
+            return False
+
+        sat_counters.length_abstraction_sat_states += 1
+        return True
+
+    def check_relaxation(a_state, b_state):
+        a_name = fa_a.states[a_state]
+        b_name = fa_b.states[b_state]
+        if a_name in parikh_checker.fa_a_variables.dead_states or b_name in parikh_checker.fa_b_variables.dead_states:
+            return True  # Decided by the Parikh image check without the solver.
+
+        return relaxation.check(a_name, b_name) != z3.unsat
+
+    def check_parikh(a_state, b_state):
+        # Check for satisfiability with the initial states selected by assumptions.
+        res = parikh_checker.check(fa_a.states[a_state], fa_b.states[b_state])
+        if res == z3.unknown:
+            sat_counters.parikh_image_unknown_states += 1
+            return True
+
+        if res == z3.sat:
+            sat_counters.parikh_image_sat_states += 1
+            return True
+
+        sat_counters.parikh_image_unsat_states += 1
+        return False
+
+    stages = []
+    if prefilter is not None:
+        stages.append(('prefilters', prefilter.check))
+    stages.append(('length', check_length))
+    if relaxation is not None:
+        stages.append(('relaxation', check_relaxation))
+    stages.append(('parikh', check_parikh))
+    return stages
+
+
+def check_satisfiability(fa_a, fa_b, a_state, b_state, cascade):
+    """
+    Check satisfiability of the product state by the cascade of abstraction checks.
+    :param fa_a: First compact automaton.
+    :param fa_b: Second compact automaton.
+    :param a_state: Identifier of the state of the first automaton to start the run in.
+    :param b_state: Identifier of the state of the second automaton to start the run in.
+    :param cascade: Cascade of abstraction checks.
     :return: True if satisfiable; False if not satisfiable.
     """
 
@@ -197,41 +356,12 @@ def check_satisfiability(fa_a, fa_b, fa_a_formulae_dict, fa_b_formulae_dict, sat
     #if next(iter(fa_b.start)) in fa_b.final:
     #    print("quick true")
     #    return True
-    if next(iter(fa_a.start)) in fa_a.final and next(iter(fa_b.start)) in fa_b.final:
+    if a_state in fa_a.final and b_state in fa_b.final:
         #printnext(iter(fa_a.start)) + ',' + next(iter(fa_b.start)) + " final", end='  ')
         #print('final')
         return True
 
-    if not check_length_satisfiability(config, fa_a_formulae_dict, fa_b_formulae_dict):
-        #print"Length abstraction not satisfiable.", end=' ')
-        sat_counters.length_abstraction_unsat_states += 1
-        return False
-
-    #print"Length abstraction satisfiable.", end=' ')
-    sat_counters.length_abstraction_sat_states += 1
-
-    # Add clauses – conjunction of formulae.
-    smt.push()
-    add_state_specific_formulae(smt, fa_a, fa_b, config)
-
-    # Check for satisfiability.
-    #print("start smt check")
-    res = smt.check()
-    #print(res)
-
-    smt.pop()
-
-    if res != z3.unsat:  # ~ res in [z3.sat, z3.unknown].
-        #printnext(iter(fa_a.start)) + ',' + next(iter(fa_b.start)) + " true", end='  ')
-        #print("true", end='  ')
-        #print(smt.model())
-        sat_counters.parikh_image_sat_states += 1
-        return True
-
-    #printnext(iter(fa_a.start)) + ',' + next(iter(fa_b.start)) + " false", end='  ')
-    #print("false")
-    sat_counters.parikh_image_unsat_states += 1
-    return False
+    return cascade.check(a_state, b_state)
 
 
 class ArgumentsParser(ProductConstructionArgumentsParser):
@@ -248,9 +378,80 @@ class ArgumentsParser(ProductConstructionArgumentsParser):
                                      help="Compute forward lengths 'z' for Parikh image.")
         self.arg_parser.add_argument('--no-z-constraints', '-z', action='store_true',
                                      help='Compute formulae without constraints for connectivity of automaton.')
+        self.arg_parser.add_argument('--length-cache-size', metavar='SIZE', type=int, default=DEFAULT_CACHE_SIZE,
+                                     help='Cache satisfiability of at most SIZE length abstraction formulae sets '
+                                          'pairs.')
+        self.arg_parser.add_argument('--store-formulae', metavar='FORMULAE_FILE', type=str,
+                                     help='Store persistent Parikh image formulae in SMT-LIB format into a file.')
+        self.arg_parser.add_argument('--load-formulae', metavar='FORMULAE_FILE', type=str,
+                                     help='Load persistent Parikh image formulae stored by --store-formulae for the '
+                                          'same automata and options instead of generating them.')
+        self.arg_parser.add_argument('--lazy-z-constraints', action='store_true',
+                                     help='Add constraints for connectivity of automaton lazily as cuts of '
+                                          'disconnected models.')
+        self.arg_parser.add_argument('--scc-constraints', action='store_true',
+                                     help='Add constraints for connectivity of strongly connected '
+                                          'components of automaton instead of its states.')
+        self.arg_parser.add_argument('--model-pool-size', metavar='SIZE', type=int, default=DEFAULT_MODEL_POOL_SIZE,
+                                     help='Reuse at most SIZE recent satisfying models of Parikh image formulae, '
+                                          'disabled if 0 (default).')
+        self.arg_parser.add_argument('--batch-size', metavar='SIZE', type=int, default=1,
+                                     help='Check pending product states for Parikh image satisfiability in batches of '
+                                          'SIZE.')
+        self.arg_parser.add_argument('--batch-split', choices=ParikhBatchChecker.SPLITS,
+                                     default=ParikhBatchChecker.BINARY,
+                                     help='Split satisfiable batches in halves (binary) or to single product states '
+                                          '(linear).')
+        self.arg_parser.add_argument('--lp-relaxation', action='store_true',
+                                     help='Check linear relaxation of Parikh image formulae over rationals before '
+                                          'the integer formulae.')
+        self.arg_parser.add_argument('--smt-budget', metavar='BUDGET_MS', type=int,
+                                     help='Spend at most BUDGET_MS ms by Parikh image checks, with timeouts of single '
+                                          'checks adapted to the remaining budget and limited by TIMEOUT_MS.')
+        self.arg_parser.add_argument('--portfolio', metavar='SIZE', type=int, default=0,
+                                     help='Decide Parikh image formulae not decided by the solver, e.g., after a '
+                                          'timeout, by a portfolio of SIZE solver configurations in parallel '
+                                          'processes.')
+        self.arg_parser.add_argument('--portfolio-stats', metavar='STATS_FILE', type=str,
+                                     help='Store wins of portfolio solver configurations for the automata into a JSON '
+                                          'file and run the configurations winning most often for the automata.')
+        self.arg_parser.add_argument('--portfolio-timeout', metavar='TIMEOUT_MS', type=int,
+                                     help='Set timeout of portfolio queries after TIMEOUT_MS ms, TIMEOUT_MS of the '
+                                          'solver if not given. Queries get at most the remaining SMT budget.')
+        self.arg_parser.add_argument('--workers', '-w', metavar='WORKERS', type=int, default=1,
+                                     help='Check batches of pending product states for Parikh image satisfiability by '
+                                          'WORKERS worker processes.')
+        self.arg_parser.add_argument('--bidirectional', action='store_true',
+                                     help='Test emptiness by searching the product forward from the initial and '
+                                          'backward from the final product states.')
+        self.arg_parser.add_argument('--antichain', action='store_true',
+                                     help='In emptiness test, skip product states simulated by explored product '
+                                          'states, by forward simulations of the automata.')
+        self.arg_parser.add_argument('--strategy', choices=PairWorkSet.STRATEGIES, default=PairWorkSet.DFS,
+                                     help='Explore the product depth-first (dfs), breadth-first (bfs) or best-first '
+                                          'by distances of the states to final states (best-first).')
+        self.arg_parser.add_argument('--prefilters', action='store_true',
+                                     help='Reject product states by lengths of accepted words and symbols read from '
+                                          'their states before the abstraction checks.')
+        self.arg_parser.add_argument('--adaptive-cascade', action='store_true',
+                                     help='Reorder and disable the abstraction checks by their measured time per '
+                                          'check and reject rate, probing disabled checks again periodically.')
+        self.arg_parser.add_argument('--cascade-interval', metavar='CHECKS', type=int,
+                                     default=DEFAULT_REORDER_INTERVAL,
+                                     help='Reorder the abstraction checks after every CHECKS checks.')
+        self.arg_parser.add_argument('--trim', action='store_true',
+                                     help='Trim the automata to states reachable from initial states with final '
+                                          'states reachable before the product construction.')
         self.arg_parser.add_argument('--timeout', '-t', metavar='TIMEOUT_MS', type=int,
                                      help='Set timeout after TIMEOUT_MS ms for Z3 SMT solver.')
 
+    def parse_args(self):
+        """Parse program command line arguments, rejecting options the worker processes do not support."""
+        args = super().parse_args()
+        if args.workers > 1 and (args.smt_budget or args.portfolio):
+            self.arg_parser.error('--workers greater than 1 cannot be combined with --smt-budget or --portfolio')
+        return args
+
 
 @dataclass
 class SatCounters:
@@ -260,6 +461,9 @@ class SatCounters:
     length_abstraction_unsat_states: int = 0  # Length abstraction unsatisfiable.
     parikh_image_sat_states: int = 0  # Both length abstraction and Parikh image satisfiable.
     parikh_image_unsat_states: int = 0  # Length abstraction satisfiable, Parikh image unsatisfiable.
+    parikh_image_unknown_states: int = 0  # Length abstraction satisfiable, Parikh image unknown (timeout).
+    cascade_reorders: int = 0  # Reorderings of the abstraction checks by the adaptive cascade.
+    cascade_disabled_stages: int = 0  # Disablings of abstraction checks by the adaptive cascade.
 
 
 class Config(ProductConstructionConfig):
@@ -270,8 +474,30 @@ class Config(ProductConstructionConfig):
 
         self.smt_free = not args.smt
         self.reverse_lengths = not args.forward_lengths
-        self.use_z_constraints = not args.no_z_constraints
+        self.use_z_constraints = not args.no_z_constraints and not args.lazy_z_constraints and \
+            not args.scc_constraints
+        self.lazy_z_constraints = args.lazy_z_constraints
+        self.scc_constraints = args.scc_constraints
+        self.model_pool_size = args.model_pool_size
+        self.batch_size = args.batch_size
+        self.batch_split = args.batch_split
+        self.lp_relaxation = args.lp_relaxation
+        self.smt_budget = args.smt_budget
+        self.portfolio = args.portfolio
+        self.portfolio_stats = args.portfolio_stats
+        self.portfolio_timeout = args.portfolio_timeout or args.timeout or DEFAULT_PORTFOLIO_TIMEOUT
+        self.workers = args.workers
         self.timeout = args.timeout
+        self.strategy = args.strategy
+        self.bidirectional = args.bidirectional
+        self.antichain = args.antichain
+        self.prefilters = args.prefilters
+        self.trim = args.trim
+        self.adaptive_cascade = args.adaptive_cascade
+        self.cascade_interval = args.cascade_interval
+        self.store_formulae = args.store_formulae
+        self.load_formulae = args.load_formulae
+        self.length_cache_size = args.length_cache_size
 
 
 if __name__ == "__main__":
@@ -14,6 +14,14 @@ import itertools
 
 from lfa import LFA
 from optifa.basic import *
+from optifa.bidirectional import BidirectionalSearch
+from optifa.length_formulae import LengthFormulaeTable
+from optifa.length_satisfiability import DEFAULT_CACHE_SIZE, LengthSatisfiabilityCache
+from optifa.compact import CompactAutomaton, CompactProduct
+from optifa.partition import PartitionedExploration
+from optifa.prefilter import PairPrefilter
+from optifa.simulation import ProductAntichain
+from optifa.work_set import PairWorkSet
 from optifa.program_config import ProductConstructionConfig, ProductConstructionArgumentsParser
 
 
@@ -28,20 +36,29 @@ def main():
 
     processed_pair_states_cnt = 0
 
+    # Explore the product on compact automata with states and symbols interned to integers.
+    fa_a_compact, fa_b_compact = CompactAutomaton.from_lfa_pair(fa_a_orig, fa_b_orig)
+    if config.trim:
+        # Only useful states are explored, hence product states with a dead state are never pushed or checked.
+        fa_a_compact = fa_a_compact.trim()
+        fa_b_compact = fa_b_compact.trim()
+
     q_checked_pairs = {}
-    q_pair_states = deque()
+    q_pair_states = PairWorkSet.for_strategy(config.strategy, fa_a_compact, fa_b_compact)
+
+    # Product states with provably empty intersection of languages are rejected before the abstraction checks.
+    prefilter = PairPrefilter(fa_a_compact, fa_b_compact) if config.prefilters else None
+    # In emptiness test, product states simulated by explored product states are not explored.
+    antichain = ProductAntichain(fa_a_compact, fa_b_compact) if config.antichain and config.break_when_final else None
 
     # Enqueue the initial states.
-    for a_initial_state in fa_a_orig.start:
-        for b_initial_state in fa_b_orig.start:
-            q_pair_states.append([a_initial_state, b_initial_state, False])
+    for a_initial_state in fa_a_compact.start:
+        for b_initial_state in fa_b_compact.start:
+            q_pair_states.push(a_initial_state, b_initial_state)
+            if antichain is not None:
+                antichain.add(a_initial_state, b_initial_state)
 
-    # Generate single handle and loop automata per original input automaton.
-    # Therefore, only single handle and loop automaton for all of the tested
-    # states in the original automaton is needed.
-    fa_a_handle_and_loop = LFA.get_new()
-    fa_b_handle_and_loop = LFA.get_new()
-    intersect_ab = LFA.get_new()
+    intersect_ab = CompactProduct(fa_a_compact, fa_b_compact)
 
     fa_a_unified = deepcopy(fa_a_orig)
     fa_b_unified = deepcopy(fa_b_orig)
@@ -49,85 +66,141 @@ def main():
     fa_a_unified.unify_transition_symbols()
     fa_b_unified.unify_transition_symbols()
 
+    # Handle and loop formulae are computed once per state of the original automata and shared by all the tested
+    # product states containing the state.
+    fa_a_formulae = LengthFormulaeTable(fa_a_unified)
+    fa_b_formulae = LengthFormulaeTable(fa_b_unified)
+    # Product states with identical formulae sets share a single satisfiability check.
+    length_cache = LengthSatisfiabilityCache(config.length_cache_size)
+
     found = False
     skipped_cnt = 0
     false_cnt = 0
     sat_cnt = 0
 
-    # When there are any pair states to test for satisfiability, test them.
-    while q_pair_states:
-        #curr_pair = q_pair_states.popleft()  # BFS
-        curr_pair = q_pair_states.pop()  # DFS
-        product_state_name = curr_pair[0] + ',' + curr_pair[1]
-        q_checked_pairs[product_state_name] = True
+    if config.bidirectional:
+        # Emptiness is tested by searching forward from the initial and backward from the final product states.
+        search = BidirectionalSearch(fa_a_compact, fa_b_compact, LengthCheck(config, fa_a_compact, fa_b_compact,
+                                                                             fa_a_formulae, fa_b_formulae,
+                                                                             length_cache, prefilter))
+        found = search.run()
+        intersect_ab = search.product
+        checked_cnt = search.get_checked_cnt()
+        processed_pair_states_cnt = search.processed_cnt
+        sat_cnt = search.sat_cnt
+        false_cnt = search.false_cnt
+    elif config.partitions > 1:
+        # Product states are explored by worker processes owning hash partitions of the product.
+        exploration = PartitionedExploration(fa_a_compact, fa_b_compact, config.partitions, config.break_when_final,
+                                             LengthCheck(config, fa_a_compact, fa_b_compact, fa_a_formulae,
+                                                         fa_b_formulae, length_cache, prefilter))
+        intersect_ab = exploration.run()
+        checked_cnt = exploration.counters['checked']
+        processed_pair_states_cnt = exploration.counters['processed']
+        sat_cnt = exploration.counters['sat']
+        false_cnt = exploration.counters['false']
+        skipped_cnt = exploration.counters['skipped']
+        fa_a_formulae.hits += exploration.counters['fa_a_formulae_hits']
+        fa_a_formulae.misses += exploration.counters['fa_a_formulae_misses']
+        fa_b_formulae.hits += exploration.counters['fa_b_formulae_hits']
+        fa_b_formulae.misses += exploration.counters['fa_b_formulae_misses']
+        length_cache.hits += exploration.counters['length_cache_hits']
+        length_cache.misses += exploration.counters['length_cache_misses']
+        if prefilter is not None:
+            prefilter.dead_rejected_cnt += exploration.counters['prefilter_dead']
+            prefilter.length_rejected_cnt += exploration.counters['prefilter_length']
+            prefilter.symbols_rejected_cnt += exploration.counters['prefilter_symbols']
+    else:
+        # When there are any pair states to test for satisfiability, test them.
+        while q_pair_states:
+            curr_pair = q_pair_states.pop()
+            a_state = fa_a_compact.states[curr_pair[0]]
+            b_state = fa_b_compact.states[curr_pair[1]]
+            product_state = intersect_ab.get_state(curr_pair[0], curr_pair[1])
+            q_checked_pairs[product_state] = True
+
+            # If the current pair is a single pair created from the previous pair,
+            # no need to check for satisfiability.
+            #if True:  # Turn Skip feature off.
+            if not curr_pair[2]:
+                processed_pair_states_cnt += 1
+
+                if prefilter is not None and not prefilter.check(curr_pair[0], curr_pair[1]):
+                    satisfiable = False
+                else:
+                    fa_a_formulae_dict = fa_a_formulae.get_formulae(a_state)
+                    #print(fa_a_formulae_dict)  # DEBUG
+                    fa_b_formulae_dict = fa_b_formulae.get_formulae(b_state)
+                    #print(fa_b_formulae_dict)  # DEBUG
+
+                    if fa_a_formulae_dict is None or fa_b_formulae_dict is None:
+                        satisfiable = False  # No final state is reachable.
+                    else:
+                        satisfiable = check_length_satisfiability(config, fa_a_formulae_dict, fa_b_formulae_dict,
+                                                                  length_cache)
+                if satisfiable:
+                    sat_cnt += 1
+            else:
+                satisfiable = True
+                skipped_cnt += 1
 
-        # If the current pair is a single pair created from the previous pair,
-        # no need to check for satisfiability.
-        #if True:  # Turn Skip feature off.
-        if not curr_pair[2]:
-            processed_pair_states_cnt += 1
+            if satisfiable:
+                # Add product states to intersection FA.
+                intersect_ab.add_state(product_state)
 
-            fa_a_unified.start = {curr_pair[0]}
-            fa_b_unified.start = {curr_pair[1]}
+                if curr_pair[0] in fa_a_compact.final and curr_pair[1] in fa_b_compact.final:
+                    # Automata have a non-empty intersection. We can end the testing here as we have found a
+                    # solution.
+                    intersect_ab.final.add(product_state)
+                    found = True
+                    if config.break_when_final:
+                        break
 
-            fa_a_unified.determinize_check(fa_a_handle_and_loop)
-            fa_b_unified.determinize_check(fa_b_handle_and_loop)
+                #print(q_pair_states)
+                #old_pair_states_len = len(q_pair_states)
 
-            if not fa_a_handle_and_loop.final or not fa_b_handle_and_loop.final:
-                break
+                # Generate the following potential product-states.
+                make_pairs(fa_a_compact, fa_b_compact, q_pair_states, q_checked_pairs, intersect_ab, curr_pair,
+                           antichain=antichain)
 
-            fa_a_formulae_dict = fa_a_handle_and_loop.count_formulae_for_lfa()
-            #print(fa_a_formulae_dict)  # DEBUG
-            fa_b_formulae_dict = fa_b_handle_and_loop.count_formulae_for_lfa()
-            #print(fa_b_formulae_dict)  # DEBUG
+                #pair_states_len_diff = len(q_pair_states) - old_pair_states_len
+                #print(pair_states_len_diff)
+                #print(q_pair_states)
+            else:
+                false_cnt += 1
 
-            satisfiable = check_length_satisfiability(config, fa_a_formulae_dict, fa_b_formulae_dict)
-            if satisfiable:
-                sat_cnt += 1
-        else:
-            satisfiable = True
-            skipped_cnt += 1
-
-        if satisfiable:
-            # Add product states to intersection FA.
-            intersect_ab.states.add(product_state_name)
-            if product_state_name not in intersect_ab.transitions:
-                intersect_ab.transitions[product_state_name] = {}
-
-            if curr_pair[0] in fa_a_orig.final and curr_pair[1] in fa_b_orig.final:
-                # Automata have a non-empty intersection. We can end the testing here as we have found a solution.
-                intersect_ab.final.add(product_state_name)
-                found = True
-                if config.break_when_final:
-                    break
-
-            #print(q_pair_states)
-            #old_pair_states_len = len(q_pair_states)
-
-            # Generate the following potential product-states.
-            make_pairs(fa_a_orig, fa_b_orig, q_pair_states, q_checked_pairs, intersect_ab, curr_pair)
-
-            #pair_states_len_diff = len(q_pair_states) - old_pair_states_len
-            #print(pair_states_len_diff)
-            #print(q_pair_states)
-        else:
-            false_cnt += 1
+        checked_cnt = len(q_checked_pairs)
 
+    intersect_ab = intersect_ab.to_lfa()
     intersect_ab.remove_useless_transitions()
-    # Output format: <checked> <processed> <sat> <skipped> <false_cnt> <intersect> <final_cnt>
-    print_csv(len(q_checked_pairs))
+    # Output format: <checked> <processed> <sat> <skipped> <false_cnt> <intersect> <final_cnt> <formulae_hits>
+    # <formulae_misses> <length_cache_hits> <length_cache_hit_rate> <antichain_subsumed> <prefilter_dead>
+    # <prefilter_length> <prefilter_symbols> <fa_a_states> <fa_b_states> <fa_a_reduction_ratio> <fa_b_reduction_ratio>
+    print_csv(checked_cnt)
     print_csv(processed_pair_states_cnt)
     print_csv(sat_cnt)
     print_csv(false_cnt)
     print_csv(skipped_cnt)
     if len(fa_a_orig.states) > len(fa_b_orig.states):
-        print_csv(len(fa_a_handle_and_loop.states))
-        print_csv(len(fa_b_handle_and_loop.states))
+        print_csv(fa_a_formulae.handle_and_loop_states_cnt)
+        print_csv(fa_b_formulae.handle_and_loop_states_cnt)
     else:
-        print_csv(len(fa_b_handle_and_loop.states))
-        print_csv(len(fa_a_handle_and_loop.states))
+        print_csv(fa_b_formulae.handle_and_loop_states_cnt)
+        print_csv(fa_a_formulae.handle_and_loop_states_cnt)
     print_csv(len(intersect_ab.states))
     print_csv(len(intersect_ab.final))
+    print_csv(fa_a_formulae.hits + fa_b_formulae.hits)
+    print_csv(fa_a_formulae.misses + fa_b_formulae.misses)
+    print_csv(length_cache.hits)
+    print_csv(f"{length_cache.get_hit_rate():.4f}")
+    print_csv(antichain.subsumed_cnt if antichain is not None else 0)
+    print_csv(prefilter.dead_rejected_cnt if prefilter is not None else 0)
+    print_csv(prefilter.length_rejected_cnt if prefilter is not None else 0)
+    print_csv(prefilter.symbols_rejected_cnt if prefilter is not None else 0)
+    print_csv(len(fa_a_compact.states))
+    print_csv(len(fa_b_compact.states))
+    print_csv(f"{config.fa_a_reduction_ratio:.4f}")
+    print_csv(f"{config.fa_b_reduction_ratio:.4f}")
     #print(intersect_ab.transitions)
     #intersect_ab.print_automaton()
     #print(intersect_ab.final)
@@ -143,10 +216,79 @@ class ArgumentsParser(ProductConstructionArgumentsParser):
         # Define script-specific arguments.
         self.arg_parser.add_argument('--smt', '-s', action='store_true',
                                      help='Use SMT solver Z3 to check for satisfiability of formulae.')
+        self.arg_parser.add_argument('--length-cache-size', metavar='SIZE', type=int, default=DEFAULT_CACHE_SIZE,
+                                     help='Cache satisfiability of at most SIZE length abstraction formulae sets '
+                                          'pairs.')
+        self.arg_parser.add_argument('--partitions', metavar='PARTITIONS', type=int, default=1,
+                                     help='Explore the product by PARTITIONS worker processes owning hash '
+                                          'partitions of the product states.')
+        self.arg_parser.add_argument('--bidirectional', action='store_true',
+                                     help='Test emptiness by searching the product forward from the initial and '
+                                          'backward from the final product states.')
+        self.arg_parser.add_argument('--antichain', action='store_true',
+                                     help='In emptiness test, skip product states simulated by explored product '
+                                          'states, by forward simulations of the automata.')
+        self.arg_parser.add_argument('--strategy', choices=PairWorkSet.STRATEGIES, default=PairWorkSet.DFS,
+                                     help='Explore the product depth-first (dfs), breadth-first (bfs) or best-first '
+                                          'by distances of the states to final states (best-first).')
+        self.arg_parser.add_argument('--prefilters', action='store_true',
+                                     help='Reject product states by lengths of accepted words and symbols read from '
+                                          'their states before the abstraction checks.')
+        self.arg_parser.add_argument('--trim', action='store_true',
+                                     help='Trim the automata to states reachable from initial states with final '
+                                          'states reachable before the product construction.')
         self.arg_parser.add_argument('--timeout', '-t', metavar='TIMEOUT_MS', type=int,
                                      help='Set timeout after TIMEOUT_MS ms for Z3 SMT solver.')
 
 
+class LengthCheck:
+    """Check of length abstraction satisfiability of product states of compact automata run by partition workers."""
+
+    def __init__(self, config, fa_a, fa_b, fa_a_formulae, fa_b_formulae, length_cache, prefilter=None):
+        """
+        Parameters:
+            config (Config): Program configuration.
+            fa_a (optifa.CompactAutomaton): First compact automaton.
+            fa_b (optifa.CompactAutomaton): Second compact automaton.
+            fa_a_formulae (optifa.LengthFormulaeTable): Length formulae of the states of the first automaton.
+            fa_b_formulae (optifa.LengthFormulaeTable): Length formulae of the states of the second automaton.
+            length_cache (optifa.LengthSatisfiabilityCache): Cache of length abstraction satisfiability results.
+            prefilter (optifa.prefilter.PairPrefilter): Pre-filter applied before the length abstraction check, None
+                for no pre-filter.
+        """
+        self.config = config
+        self.fa_a = fa_a
+        self.fa_b = fa_b
+        self.fa_a_formulae = fa_a_formulae
+        self.fa_b_formulae = fa_b_formulae
+        self.length_cache = length_cache
+        self.prefilter = prefilter
+
+    def __call__(self, a_state, b_state):
+        """Check the product state of the states with the given identifiers."""
+        if self.prefilter is not None and not self.prefilter.check(a_state, b_state):
+            return False
+
+        fa_a_formulae_dict = self.fa_a_formulae.get_formulae(self.fa_a.states[a_state])
+        fa_b_formulae_dict = self.fa_b_formulae.get_formulae(self.fa_b.states[b_state])
+        if fa_a_formulae_dict is None or fa_b_formulae_dict is None:
+            return False  # No final state is reachable.
+
+        return check_length_satisfiability(self.config, fa_a_formulae_dict, fa_b_formulae_dict, self.length_cache)
+
+    @property
+    def counters(self):
+        """Counters of the formulae tables, the cache and the pre-filter, summed over partition workers."""
+        counters = {'fa_a_formulae_hits': self.fa_a_formulae.hits, 'fa_a_formulae_misses': self.fa_a_formulae.misses,
+                    'fa_b_formulae_hits': self.fa_b_formulae.hits, 'fa_b_formulae_misses': self.fa_b_formulae.misses,
+                    'length_cache_hits': self.length_cache.hits, 'length_cache_misses': self.length_cache.misses}
+        if self.prefilter is not None:
+            counters.update(prefilter_dead=self.prefilter.dead_rejected_cnt,
+                            prefilter_length=self.prefilter.length_rejected_cnt,
+                            prefilter_symbols=self.prefilter.symbols_rejected_cnt)
+        return counters
+
+
 class Config(ProductConstructionConfig):
     """Class for storing program configurations passed as command line arguments."""
 
@@ -155,6 +297,13 @@ class Config(ProductConstructionConfig):
 
         self.smt_free = not args.smt
         self.timeout = args.timeout
+        self.strategy = args.strategy
+        self.bidirectional = args.bidirectional
+        self.antichain = args.antichain
+        self.prefilters = args.prefilters
+        self.trim = args.trim
+        self.length_cache_size = args.length_cache_size
+        self.partitions = args.partitions
 
 
 if __name__ == "__main__":
@@ -15,6 +15,18 @@ import z3
 
 from lfa import LFA
 from optifa.basic import *
+from optifa.bidirectional import BidirectionalSearch
+from optifa.compact import CompactAutomaton, CompactProduct
+from optifa.batch import ParikhBatchChecker
+from optifa.budget import SmtBudget
+from optifa.parikh import DEFAULT_MODEL_POOL_SIZE, ParikhModelPool, ParikhVariables
+from optifa.pool import ParikhWorkerPool
+from optifa.portfolio import DEFAULT_PORTFOLIO_TIMEOUT, ParikhPortfolio
+from optifa.prefilter import PairPrefilter
+from optifa.relaxation import ParikhRelaxation
+from optifa.simulation import ProductAntichain
+from optifa.smtlib import add_persistent_formulae_smtlib
+from optifa.work_set import PairWorkSet
 from optifa.program_config import ProductConstructionConfig, ProductConstructionArgumentsParser
 
 
@@ -42,104 +54,194 @@ def main():
         #print(f"Setting timeout {config.timeout}")
         smt.set("timeout", config.timeout)  # Set solver to timeout after given amount of time in ms.
 
-    add_persistent_formulae(smt, fa_a_orig, fa_b_orig, config)
+    # Variables of Parikh image formulae are created once and shared by all formulae.
+    fa_a_variables = ParikhVariables(fa_a_orig, 'a')
+    fa_b_variables = ParikhVariables(fa_b_orig, 'b')
+
+    # Persistent formulae are loaded from a single SMT-LIB script.
+    add_persistent_formulae_smtlib(smt, fa_a_variables, fa_b_variables, config, config.store_formulae,
+                                   config.load_formulae)
+    # Initial states of the checked product states are chosen by selectors passed as assumptions.
+    add_selector_formulae(smt, fa_a_variables, fa_b_variables, config)
+    if config.scc_constraints:
+        add_scc_formulae(smt, fa_a_variables, fa_b_variables)
+    # Recent satisfying models are reused for the following product states without calling the solver.
+    model_pool = ParikhModelPool(fa_a_variables, fa_b_variables, config, config.model_pool_size)
+    # Linear relaxation of Parikh image formulae rejects product states before the integer check.
+    relaxation = ParikhRelaxation(fa_a_variables, fa_b_variables, config.timeout) if config.lp_relaxation else None
+    # Timeouts of integer checks are derived from the remaining budget of time for all checks.
+    budget = SmtBudget(config.smt_budget, config.timeout) if config.smt_budget else None
+    # Formulae not decided by the solver are decided by a portfolio of solver configurations in parallel processes.
+    portfolio = ParikhPortfolio(smt, fa_a_variables, fa_b_variables, config.portfolio, config.portfolio_stats,
+                                f"{config.fa_a_path},{config.fa_b_path}", config.portfolio_timeout) \
+        if config.portfolio else None
+    # Batches of product states are checked by worker processes, each with its own solver.
+    pool = ParikhWorkerPool(fa_a_orig, fa_b_orig, config, config.workers) if config.workers > 1 else None
+
+    # Explore the product on compact automata with states and symbols interned to integers.
+    fa_a_compact, fa_b_compact = CompactAutomaton.from_lfa_pair(fa_a_orig, fa_b_orig)
+    if config.trim:
+        # Only useful states are explored, hence product states with a dead state are never pushed or checked.
+        fa_a_compact = fa_a_compact.trim()
+        fa_b_compact = fa_b_compact.trim()
 
     # Define additional variables.
     q_checked_pairs = {}
-    q_pair_states = deque()
+    q_pair_states = PairWorkSet.for_strategy(config.strategy, fa_a_compact, fa_b_compact)
+    # Pending product states are checked for Parikh image satisfiability in batches of the configured size.
+    parikh_checker = ParikhBatchChecker(smt, fa_a_variables, fa_b_variables, config, q_pair_states, fa_a_compact,
+                                       fa_b_compact, model_pool, relaxation, budget,
+                                       portfolio, pool)
 
-    # Enqueue the initial states.
-    for a_initial_state in fa_a_orig.start:
-        for b_initial_state in fa_b_orig.start:
-            q_pair_states.append([a_initial_state, b_initial_state, False])
+    # Product states with provably empty intersection of languages are rejected before the abstraction checks.
+    prefilter = PairPrefilter(fa_a_compact, fa_b_compact) if config.prefilters else None
+    # In emptiness test, product states simulated by explored product states are not explored.
+    antichain = ProductAntichain(fa_a_compact, fa_b_compact) if config.antichain and config.break_when_final else None
 
-    intersect_ab = LFA.get_new()
+    # Enqueue the initial states.
+    for a_initial_state in fa_a_compact.start:
+        for b_initial_state in fa_b_compact.start:
+            q_pair_states.push(a_initial_state, b_initial_state)
+            if antichain is not None:
+                antichain.add(a_initial_state, b_initial_state)
 
-    fa_a_copy = deepcopy(fa_a_orig)
-    fa_b_copy = deepcopy(fa_b_orig)
+    intersect_ab = CompactProduct(fa_a_compact, fa_b_compact)
 
     skipped_cnt = 0
     false_cnt = 0
     sat_cnt = 0
 
-    # When there are any pair states to test for satisfiability, test them.
-    while q_pair_states:
-        #curr_pair = q_pair_states.popleft()  # BFS
-        curr_pair = q_pair_states.pop()  # DFS
-        product_state_name = curr_pair[0] + ',' + curr_pair[1]
+    if config.bidirectional:
+        def check(a, b):
+            if prefilter is not None and not prefilter.check(a, b):
+                return False
+
+            return check_satisfiability(fa_a_orig, fa_b_orig, fa_a_compact.states[a], fa_b_compact.states[b],
+                                        parikh_checker)
+
+        # Emptiness is tested by searching forward from the initial and backward from the final product states.
+        search = BidirectionalSearch(fa_a_compact, fa_b_compact, check)
+        search.run()
+        intersect_ab = search.product
+        checked_cnt = search.get_checked_cnt()
+        processed_pair_states_cnt = search.processed_cnt
+        sat_cnt = search.sat_cnt
+        false_cnt = search.false_cnt
+    else:
+        # When there are any pair states to test for satisfiability, test them.
+        while q_pair_states:
+            curr_pair = q_pair_states.pop()
+            a_state = fa_a_compact.states[curr_pair[0]]
+            b_state = fa_b_compact.states[curr_pair[1]]
+            product_state = intersect_ab.get_state(curr_pair[0], curr_pair[1])
+
+            q_checked_pairs[product_state] = True
+
+            # If the current pair is a single pair created from the previous pair,
+            # no need to check for satisfiability.
+            #if True:  # Turn Skip feature off.
+            if not curr_pair[2]:
+                processed_pair_states_cnt += 1
+
+                if prefilter is not None and not prefilter.check(curr_pair[0], curr_pair[1]):
+                    satisfiable = False
+                else:
+                    satisfiable = check_satisfiability(fa_a_orig, fa_b_orig, a_state, b_state, parikh_checker)
+                if satisfiable:
+                    sat_cnt += 1
+            else:
+                satisfiable = True
+                #printproduct_state_name + " sat", end='  ')
+                skipped_cnt += 1
+
+            if satisfiable:
+                # Add product states to intersection FA.
+                intersect_ab.add_state(product_state)
 
-        q_checked_pairs[product_state_name] = True
+                if curr_pair[0] in fa_a_compact.final and curr_pair[1] in fa_b_compact.final:
+                    # Automata have a non-empty intersection. We can end the testing here as we have found a
+                    # solution.
+                    intersect_ab.final.add(product_state)
+                    if config.break_when_final:
+                        break
 
-        fa_a_copy.start = {curr_pair[0]}
-        fa_b_copy.start = {curr_pair[1]}
+                #print(q_pair_states)
+                #old_pair_states_len = len(q_pair_states)
 
-        # If the current pair is a single pair created from the previous pair,
-        # no need to check for satisfiability.
-        #if True:  # Turn Skip feature off.
-        if not curr_pair[2]:
-            processed_pair_states_cnt += 1
+                # Generate the following potential product-states.
+                make_pairs(fa_a_compact, fa_b_compact, q_pair_states, q_checked_pairs, intersect_ab, curr_pair,
+                           antichain=antichain)
 
-            satisfiable = check_satisfiability(fa_a_copy, fa_b_copy, smt, config)
-            if satisfiable:
-                sat_cnt += 1
-        else:
-            satisfiable = True
-            #printproduct_state_name + " sat", end='  ')
-            skipped_cnt += 1
-
-        if satisfiable:
-            # Add product states to intersection FA.
-            intersect_ab.states.add(product_state_name)
-            if product_state_name not in intersect_ab.transitions:
-                intersect_ab.transitions[product_state_name] = {}
-
-            if curr_pair[0] in fa_a_orig.final and curr_pair[1] in fa_b_orig.final:
-                # Automata have a non-empty intersection. We can end the testing here as we have found a solution.
-                intersect_ab.final.add(product_state_name)
-                if config.break_when_final:
-                    break
-
-            #print(q_pair_states)
-            #old_pair_states_len = len(q_pair_states)
-
-            # Generate the following potential product-states.
-            make_pairs(fa_a_orig, fa_b_orig, q_pair_states, q_checked_pairs, intersect_ab, curr_pair)
-
-            #pair_states_len_diff = len(q_pair_states) - old_pair_states_len
-            #print(pair_states_len_diff)
-            #print(q_pair_states)
-        else:
-            false_cnt += 1
-
-        #printlen(q_pair_states))
+                #pair_states_len_diff = len(q_pair_states) - old_pair_states_len
+                #print(pair_states_len_diff)
+                #print(q_pair_states)
+            else:
+                false_cnt += 1
+
+            #printlen(q_pair_states))
 
+        checked_cnt = len(q_checked_pairs)
+
+    intersect_ab = intersect_ab.to_lfa()
     intersect_ab.remove_useless_transitions()
     intersect_ab.remove_abstract_final_state(abstract_final_symbol, abstract_final_state)
-    # Output format: <checked> <processed> <sat> <skipped> <false_cnt> <intersect> <final_cnt>
-    print_csv(len(q_checked_pairs))
+    # Output format: <checked> <processed> <sat> <skipped> <false_cnt> <intersect> <final_cnt> <connectivity_cuts>
+    # <model_pool_hits> <dead_state_hits> <batch_checks>
+    # <batch_rejected> <relaxation_rejected> <relaxation_time> <parikh_time>
+    # <parikh_unknown> <smt_escalations> <portfolio_checks> <portfolio_decided>
+    # <worker_checks> <antichain_subsumed> <prefilter_dead> <prefilter_length>
+    # <prefilter_symbols> <fa_a_states> <fa_b_states> <fa_a_reduction_ratio> <fa_b_reduction_ratio>
+    print_csv(checked_cnt)
     print_csv(processed_pair_states_cnt)
     print_csv(sat_cnt)
     print_csv(false_cnt)
     print_csv(skipped_cnt)
     print_csv(len(intersect_ab.states))
     print_csv(len(intersect_ab.final))
+    print_csv(fa_a_variables.cuts_cnt + fa_b_variables.cuts_cnt)
+    print_csv(model_pool.hits)
+    print_csv(fa_a_variables.dead_hits + fa_b_variables.dead_hits)
+    print_csv(parikh_checker.batch_checks_cnt)
+    print_csv(parikh_checker.batch_rejected_cnt)
+    print_csv(relaxation.rejected_cnt if relaxation is not None else 0)
+    print_csv(f"{relaxation.time if relaxation is not None else 0.0:.4f}")
+    print_csv(f"{parikh_checker.smt_time:.4f}")
+    print_csv(parikh_checker.unknown_cnt)
+    print_csv(budget.escalations_cnt if budget is not None else 0)
+    print_csv(portfolio.checks_cnt if portfolio is not None else 0)
+    print_csv(portfolio.decided_cnt if portfolio is not None else 0)
+    print_csv(pool.checks_cnt if pool is not None else 0)
+    print_csv(antichain.subsumed_cnt if antichain is not None else 0)
+    print_csv(prefilter.dead_rejected_cnt if prefilter is not None else 0)
+    print_csv(prefilter.length_rejected_cnt if prefilter is not None else 0)
+    print_csv(prefilter.symbols_rejected_cnt if prefilter is not None else 0)
+    print_csv(len(fa_a_compact.states))
+    print_csv(len(fa_b_compact.states))
+    print_csv(f"{config.fa_a_reduction_ratio:.4f}")
+    print_csv(f"{config.fa_b_reduction_ratio:.4f}")
     #print(intersect_ab.transitions)
     #intersect_ab.print_automaton()
     #print(intersect_ab.final)
 
+    if portfolio is not None:
+        portfolio.store_stats()
+        portfolio.shutdown()
+    if pool is not None:
+        pool.shutdown()
+
     # Store product.
     if config.store_result:
         intersect_ab.print_automaton(config.store_result)
 
 
-def check_satisfiability(fa_a, fa_b, smt, config):
+def check_satisfiability(fa_a, fa_b, a_state, b_state, parikh_checker):
     """
     Check satisfiability for formulae and Parikh image using SMT solver Z3.
     :param fa_a: First automaton.
     :param fa_b: Second automaton.
-    :param fa_a_formulae_dict: Dictionary with formulae for FA A.
-    :param fa_b_formulae_dict: Dictionary with formulae for FA B.
-    :param config: Program configuration.
+    :param a_state: State of the first automaton to start the run in.
+    :param b_state: State of the second automaton to start the run in.
+    :param parikh_checker: Checker of Parikh image satisfiability.
     :return: True if satisfiable; False if not satisfiable.
     """
 
@@ -151,22 +253,16 @@ def check_satisfiability(fa_a, fa_b, smt, config):
     #if next(iter(fa_b.start)) in fa_b.final:
     #    print("quick true")
     #    return True
-    if next(iter(fa_a.start)) in fa_a.final and next(iter(fa_b.start)) in fa_b.final:
+    if a_state in fa_a.final and b_state in fa_b.final:
         #printnext(iter(fa_a.start)) + ',' + next(iter(fa_b.start)) + " final", end='  ')
         #print('final')
         return True
 
-    # Add clauses – conjunction of formulae.
-    smt.push()
-    add_state_specific_formulae(smt, fa_a, fa_b, config)
-
-    # Check for satisfiability for this current product state.
+    # Check for satisfiability for this current product state with its initial states selected by assumptions.
     #print("start smt check")
-    res = smt.check()
+    res = parikh_checker.check(a_state, b_state)
     #print(res)
 
-    smt.pop()
-
     if res != z3.unsat:  # ~ res in [z3.sat, z3.unknown].
         #printnext(iter(fa_a.start)) + ',' + next(iter(fa_b.start)) + " true", end='  ')
         #print("true", end='  ')
@@ -190,9 +286,68 @@ class ArgumentsParser(ProductConstructionArgumentsParser):
                 help="Compute forward lengths 'z' for Parikh image.")
         self.arg_parser.add_argument('--no-z-constraints', '-z', action='store_true',
                 help='Compute formulae without constraints for connectivity of automaton.')
+        self.arg_parser.add_argument('--store-formulae', metavar='FORMULAE_FILE', type=str,
+                help='Store persistent Parikh image formulae in SMT-LIB format into a file.')
+        self.arg_parser.add_argument('--load-formulae', metavar='FORMULAE_FILE', type=str,
+                help='Load persistent Parikh image formulae stored by --store-formulae for the same automata and '
+                     'options instead of generating them.')
+        self.arg_parser.add_argument('--lazy-z-constraints', action='store_true',
+                help='Add constraints for connectivity of automaton lazily as cuts of '
+                     'disconnected models.')
+        self.arg_parser.add_argument('--scc-constraints', action='store_true',
+                help='Add constraints for connectivity of strongly connected components of automaton '
+                     'instead of its states.')
+        self.arg_parser.add_argument('--model-pool-size', metavar='SIZE', type=int, default=DEFAULT_MODEL_POOL_SIZE,
+                help='Reuse at most SIZE recent satisfying models of Parikh image formulae, disabled if 0 '
+                     '(default).')
+        self.arg_parser.add_argument('--batch-size', metavar='SIZE', type=int, default=1,
+                help='Check pending product states for Parikh image satisfiability in batches of SIZE.')
+        self.arg_parser.add_argument('--batch-split', choices=ParikhBatchChecker.SPLITS,
+                default=ParikhBatchChecker.BINARY,
+                help='Split satisfiable batches in halves (binary) or to single product states (linear).')
+        self.arg_parser.add_argument('--lp-relaxation', action='store_true',
+                help='Check linear relaxation of Parikh image formulae over rationals before the integer '
+                     'formulae.')
+        self.arg_parser.add_argument('--smt-budget', metavar='BUDGET_MS', type=int,
+                help='Spend at most BUDGET_MS ms by Parikh image checks, with timeouts of single checks '
+                     'adapted to the remaining budget and limited by TIMEOUT_MS.')
+        self.arg_parser.add_argument('--portfolio', metavar='SIZE', type=int, default=0,
+                help='Decide Parikh image formulae not decided by the solver, e.g., after a timeout, by '
+                     'a portfolio of SIZE solver configurations in parallel processes.')
+        self.arg_parser.add_argument('--portfolio-stats', metavar='STATS_FILE', type=str,
+                help='Store wins of portfolio solver configurations for the automata into a JSON file '
+                     'and run the configurations winning most often for the automata.')
+        self.arg_parser.add_argument('--portfolio-timeout', metavar='TIMEOUT_MS', type=int,
+                help='Set timeout of portfolio queries after TIMEOUT_MS ms, TIMEOUT_MS of the solver if not '
+                     'given. Queries get at most the remaining SMT budget.')
+        self.arg_parser.add_argument('--workers', '-w', metavar='WORKERS', type=int, default=1,
+                help='Check batches of pending product states for Parikh image satisfiability by WORKERS '
+                     'worker processes.')
+        self.arg_parser.add_argument('--bidirectional', action='store_true',
+                help='Test emptiness by searching the product forward from the initial and backward from the '
+                     'final product states.')
+        self.arg_parser.add_argument('--antichain', action='store_true',
+                help='In emptiness test, skip product states simulated by explored product states, by '
+                     'forward simulations of the automata.')
+        self.arg_parser.add_argument('--strategy', choices=PairWorkSet.STRATEGIES, default=PairWorkSet.DFS,
+                help='Explore the product depth-first (dfs), breadth-first (bfs) or best-first by distances '
+                     'of the states to final states (best-first).')
+        self.arg_parser.add_argument('--prefilters', action='store_true',
+                help='Reject product states by lengths of accepted words and symbols read from their states '
+                     'before the abstraction checks.')
+        self.arg_parser.add_argument('--trim', action='store_true',
+                help='Trim the automata to states reachable from initial states with final states reachable '
+                     'before the product construction.')
         self.arg_parser.add_argument('--timeout', '-t', metavar='TIMEOUT_MS', type=int,
                 help='Set timeout after TIMEOUT_MS ms for Z3 SMT solver.')
 
+    def parse_args(self):
+        """Parse program command line arguments, rejecting options the worker processes do not support."""
+        args = super().parse_args()
+        if args.workers > 1 and (args.smt_budget or args.portfolio):
+            self.arg_parser.error('--workers greater than 1 cannot be combined with --smt-budget or --portfolio')
+        return args
+
 
 class Config(ProductConstructionConfig):
     """Class for storing program configurations passed as command line arguments."""
@@ -201,8 +356,27 @@ class Config(ProductConstructionConfig):
         super().__init__(args)
 
         self.reverse_lengths = not args.forward_lengths
-        self.use_z_constraints = not args.no_z_constraints
+        self.use_z_constraints = not args.no_z_constraints and not args.lazy_z_constraints and \
+            not args.scc_constraints
+        self.lazy_z_constraints = args.lazy_z_constraints
+        self.scc_constraints = args.scc_constraints
+        self.model_pool_size = args.model_pool_size
+        self.batch_size = args.batch_size
+        self.batch_split = args.batch_split
+        self.lp_relaxation = args.lp_relaxation
+        self.smt_budget = args.smt_budget
+        self.portfolio = args.portfolio
+        self.portfolio_stats = args.portfolio_stats
+        self.portfolio_timeout = args.portfolio_timeout or args.timeout or DEFAULT_PORTFOLIO_TIMEOUT
+        self.workers = args.workers
         self.timeout = args.timeout
+        self.strategy = args.strategy
+        self.bidirectional = args.bidirectional
+        self.antichain = args.antichain
+        self.prefilters = args.prefilters
+        self.trim = args.trim
+        self.store_formulae = args.store_formulae
+        self.load_formulae = args.load_formulae
 
 
 if __name__ == "__main__":
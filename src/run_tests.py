@@ -71,7 +71,7 @@ def load_automata(first_automaton, second_automaton, first_loaded, second_loaded
 
 def skip_pi(csv_data_file):
     with open(csv_data_file, "a") as data_file:
-        data_file.write(",,,,,,,,,,,,,,")
+        data_file.write(",,,,,,,,,,,,,,,,,,,,,,,,,,,,,,,,,,,")
 
 
 def print_automata_sizes(first_automaton, second_automaton, csv_data_file):
@@ -217,11 +217,11 @@ def process_experiment_result(abstraction, csv_data_file, csv_time_data_file, ou
             if abstraction == "basic":
                 data_file.write(",,,,,,,,,")
             elif abstraction == length_abstraction:
-                data_file.write(",,,,,,,,,,,,,,,,")
+                data_file.write(",,,,,,,,,,,,,,,,,,,,,,,,,,")
             elif abstraction == pi_abstraction:
-                data_file.write(",,,,,,,,,,,,,,")
+                data_file.write(",,,,,,,,,,,,,,,,,,,,,,,,,,,,,,,,,,,")
             elif abstraction == combined_abstraction:
-                data_file.write(",,,,,,,,,,,,,,,,,,,,")
+                data_file.write(",,,,,,,,,,,,,,,,,,,,,,,,,,,,,,,,,,,,,,,,,,,,,,")
 
     else:
         # print(out.returncode)
@@ -0,0 +1,244 @@
+# file name: automata.py
+#
+# Automata and helpers shared by the unit tests.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+import argparse
+import itertools
+import pathlib
+
+import symboliclib
+import z3
+
+from optifa.basic import add_persistent_formulae, add_scc_formulae, add_selector_formulae, \
+    check_parikh_image_satisfiability, make_compact_pairs
+from optifa.compact import CompactAutomaton, CompactProduct
+from optifa.parikh import ParikhVariables
+from optifa.work_set import PairWorkSet
+
+BASIC_DFAS_DIR = pathlib.Path(__file__).resolve().parent.parent / 'basicDFAs'
+
+SYMBOLS = ['a', 'b', 'c']
+
+# Basic automata in Timbuk format, see 'basicDFAs/fa_info.md'.
+BASIC_DFAS = ['DFA_4s1f_01', 'DFA_4s1f_noLoops', 'excelatfit_product2', 'excelatfit_product3',
+              'excelatfit_product3_selfloop', 'excelatfit_product4', 'excelatfit_product4_selfloop', 'fa_m1', 'fa_m2',
+              'fa_m3', 'fa_m4', 'fa_m5', 'fa_m6', 'fa_m7', 'fa_m8', 'fa_m9', 'fa_m10', 'fa_m11', 'fa_m12', 'fa_m13',
+              'minterm_automaton1', 'minterm_automaton2']
+
+# Pairs of the basic automata with empty and non-empty products of various sizes.
+BASIC_PAIRS = [('fa_m5', 'fa_m7'), ('fa_m3', 'fa_m4'), ('fa_m6', 'fa_m7'), ('fa_m4', 'fa_m10'), ('fa_m10', 'fa_m11'),
+               ('fa_m11', 'fa_m13'), ('excelatfit_product3_selfloop', 'fa_m7'),
+               ('excelatfit_product2', 'excelatfit_product3'), ('DFA_4s1f_01', 'minterm_automaton1'),
+               ('fa_m8', 'minterm_automaton1')]
+
+# Pairs small enough to check every pair of their states by the SMT solver.
+SMT_PAIRS = [pair for pair in BASIC_PAIRS if 'fa_m10' not in pair]
+
+# Unified final state added to the automata by the engines.
+ABSTRACT_FINAL_SYMBOL = 'abstract_final_symbol'
+ABSTRACT_FINAL_STATE = 'abstract_final_state'
+
+# Options of Parikh image formulae of the engines configurations, the full encoding with reversed lengths by default.
+CONFIG_DEFAULTS = {'reverse_lengths': True, 'use_z_constraints': True, 'lazy_z_constraints': False,
+                   'scc_constraints': False, 'load_formulae': None}
+
+
+def make_config(**options):
+    """Make configuration of Parikh image formulae with the given options changed from the defaults."""
+    return argparse.Namespace(**{**CONFIG_DEFAULTS, **options})
+
+
+# Configurations of the formulae by the options '--forward-lengths' and '--no-z-constraints' of the engines.
+VARIANTS = [make_config(reverse_lengths=reverse_lengths, use_z_constraints=use_z_constraints)
+            for reverse_lengths, use_z_constraints in itertools.product([True, False], repeat=2)]
+
+
+class KeptStates(set):
+    """Set of dead states which keeps no states, i.e., pruning product states by dead states turned off."""
+
+    def add(self, state):
+        pass
+
+
+def parse_basic(name):
+    """Parse the basic automaton, a new Symboliclib automaton on every call as the engines modify the automata."""
+    return symboliclib.parse(str(BASIC_DFAS_DIR / name))
+
+
+def parse_pair(fa_a_name, fa_b_name):
+    """Parse the pair of basic automata with the abstract final state added as the engines do."""
+    fa_a = parse_basic(fa_a_name)
+    fa_b = parse_basic(fa_b_name)
+    fa_a.add_abstract_final_state(ABSTRACT_FINAL_STATE, ABSTRACT_FINAL_SYMBOL)
+    fa_b.add_abstract_final_state(ABSTRACT_FINAL_STATE, ABSTRACT_FINAL_SYMBOL)
+
+    return fa_a, fa_b
+
+
+def get_variables(fa_a_name, fa_b_name, dead_states=True):
+    """Get Parikh image variables of the pair of basic automata, optionally never recording dead states."""
+    fa_a, fa_b = parse_pair(fa_a_name, fa_b_name)
+    fa_a_variables = ParikhVariables(fa_a, 'a')
+    fa_b_variables = ParikhVariables(fa_b, 'b')
+    if not dead_states:
+        fa_a_variables.dead_states = KeptStates()
+        fa_b_variables.dead_states = KeptStates()
+
+    return fa_a_variables, fa_b_variables
+
+
+def get_state_pairs(fa_a_variables, fa_b_variables):
+    """Get all pairs of states of the automata in a deterministic order."""
+    return list(itertools.product(sorted(fa_a_variables.states), sorted(fa_b_variables.states)))
+
+
+
+def make_solver(fa_a_variables, fa_b_variables, config):
+    """Make SMT solver with persistent and selector formulae as the engines do."""
+    smt = z3.Solver()
+    add_persistent_formulae(smt, fa_a_variables, fa_b_variables, config)
+    add_selector_formulae(smt, fa_a_variables, fa_b_variables, config)
+    if config.scc_constraints:
+        add_scc_formulae(smt, fa_a_variables, fa_b_variables)
+
+    return smt
+
+
+def check_by_selectors(fa_a_variables, fa_b_variables, config, state_pairs=None, model_pool=None):
+    """Check Parikh image satisfiability of the state pairs (all by default) with initial states chosen by selectors."""
+    if state_pairs is None:
+        state_pairs = get_state_pairs(fa_a_variables, fa_b_variables)
+    smt = make_solver(fa_a_variables, fa_b_variables, config)
+
+    return {(a_state, b_state): check_parikh_image_satisfiability(smt, fa_a_variables, fa_b_variables, a_state,
+                                                                  b_state, config, model_pool)
+            for a_state, b_state in state_pairs}
+
+
+def get_product_pairs(fa_a_variables, fa_b_variables):
+    """Get state pairs reachable in the product in BFS order, in which the model pool reuses models of predecessors."""
+    state_pairs = [(a_state, b_state) for a_state in fa_a_variables.start for b_state in fa_b_variables.start]
+    reached = set(state_pairs)
+    for a_state, b_state in state_pairs:
+        for a_transition in fa_a_variables.outgoing[a_state]:
+            for b_transition in fa_b_variables.outgoing[b_state]:
+                endstate = (fa_a_variables.targets[a_transition], fa_b_variables.targets[b_transition])
+                if fa_a_variables.transitions_symbols[a_transition] == \
+                        fa_b_variables.transitions_symbols[b_transition] and endstate not in reached:
+                    reached.add(endstate)
+                    state_pairs.append(endstate)
+
+    return [(fa_a_variables.states[a_state], fa_b_variables.states[b_state]) for a_state, b_state in state_pairs]
+
+
+def get_reachable_product(fa_a, fa_b):
+    """Get names of product states reachable in the product of Symboliclib automata and the final ones."""
+    reached = {(a_state, b_state) for a_state in fa_a.start for b_state in fa_b.start}
+    stack = list(reached)
+    while stack:
+        a_state, b_state = stack.pop()
+        for symbol, a_targets in fa_a.transitions.get(a_state, {}).items():
+            for endstate in itertools.product(a_targets, fa_b.transitions.get(b_state, {}).get(symbol, [])):
+                if endstate not in reached:
+                    reached.add(endstate)
+                    stack.append(endstate)
+
+    return ({a_state + ',' + b_state for a_state, b_state in reached},
+            {a_state + ',' + b_state for a_state, b_state in reached
+             if a_state in fa_a.final and b_state in fa_b.final})
+
+
+def make_automaton(states_cnt, start, final, transitions, symbols=SYMBOLS):
+    """
+    Make compact automaton with states 'q0' to 'q<states_cnt - 1>' from transitions '(source, symbol, target)'.
+
+    Symbols of the transitions are names from the shared symbol table.
+    """
+    state_transitions = [{} for _ in range(states_cnt)]
+    for source, symbol, target in transitions:
+        state_transitions[source].setdefault(symbols.index(symbol), []).append(target)
+
+    return CompactAutomaton([f"q{state}" for state in range(states_cnt)], symbols, start, final,
+                            [list(symbol_targets.items()) for symbol_targets in state_transitions])
+
+
+def get_transitions(fa):
+    """Get set of transitions '(source, symbol, target)' of the compact automaton by names."""
+    return {(fa.states[state], fa.symbols[symbol], fa.states[target])
+            for state in range(len(fa.states)) for symbol, targets in fa.get_transitions(state) for target in targets}
+
+
+def explore(fa_a, fa_b, check=None, break_when_final=False, antichain=None):
+    """Explore the product of compact automata sequentially in BFS order as the engines do."""
+    product = CompactProduct(fa_a, fa_b)
+    q_pair_states = PairWorkSet(PairWorkSet.BFS)
+    q_checked_pairs = {}
+    for a_state in fa_a.start:
+        for b_state in fa_b.start:
+            q_pair_states.push(a_state, b_state)
+            if antichain is not None:
+                antichain.add(a_state, b_state)
+
+    while q_pair_states:
+        curr_pair = q_pair_states.pop()
+        product_state = product.get_state(curr_pair[0], curr_pair[1])
+        q_checked_pairs[product_state] = True
+        if not curr_pair[2] and check is not None and not check(curr_pair[0], curr_pair[1]):
+            continue
+
+        product.add_state(product_state)
+        if curr_pair[0] in fa_a.final and curr_pair[1] in fa_b.final:
+            product.final.add(product_state)
+            if break_when_final:
+                break
+        make_compact_pairs(fa_a, fa_b, q_pair_states, q_checked_pairs, product, curr_pair, antichain=antichain)
+
+    return product
+
+
+def get_product_transitions(product):
+    """Get set of transitions '(source, symbol, target)' of the product."""
+    return {(state, transitions[i], transitions[i + 1])
+            for state, transitions in product.transitions.items() for i in range(0, len(transitions), 2)}
+
+
+def get_non_empty(fa_a, fa_b):
+    """Get product states with a final product state reachable, i.e., with non-empty intersection of languages."""
+    product = explore(fa_a, fa_b)
+    transitions = get_product_transitions(product)
+    non_empty = set(product.final)
+    changed = True
+    while changed:
+        changed = False
+        for state, _, target in transitions:
+            if target in non_empty and state not in non_empty:
+                non_empty.add(state)
+                changed = True
+
+    return non_empty
+
+
+# Example automata of the tests.
+
+# Words 'a^n b' for n >= 0, with a dead state 'q3' and an unreachable state 'q4'.
+A_STAR_B = make_automaton(5, [0], [1], [(0, 'a', 0), (0, 'b', 1), (0, 'c', 3), (3, 'a', 3), (4, 'b', 1)])
+
+# Words 'a b^n' for n >= 0.
+A_B_STAR = make_automaton(2, [0], [1], [(0, 'a', 1), (1, 'b', 1)])
+
+# Words over 'c' only, disjoint with both automata above.
+C_STAR = make_automaton(1, [0], [0], [(0, 'c', 0)])
+
+# The example automata and the basic automata as compact automata.
+COMPACT_AUTOMATA = [A_STAR_B, A_B_STAR, C_STAR] + [CompactAutomaton.from_lfa(parse_basic(name)) for name in BASIC_DFAS]
+
+# Pairs of the example automata and of the basic automata as compact automata with shared symbol tables.
+COMPACT_PAIRS = [(A_STAR_B, A_STAR_B), (A_STAR_B, A_B_STAR), (A_STAR_B, C_STAR)] + \
+    [CompactAutomaton.from_lfa_pair(parse_basic(fa_a_name), parse_basic(fa_b_name))
+     for fa_a_name, fa_b_name in BASIC_PAIRS]
+
+# End of file.
@@ -0,0 +1,15 @@
+# file name: conftest.py
+#
+# Configuration of unit tests of the optifa package.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+import pathlib
+import sys
+
+# The package and the scripts are run from the source directory.
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent / 'src'))
+
+# End of file.
@@ -0,0 +1,171 @@
+# file name: test_batch.py
+#
+# Tests of group testing of Parikh image satisfiability for batches of pending product states.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+import pytest
+import z3
+
+from automata import SMT_PAIRS, check_by_selectors, get_state_pairs, get_variables, make_config, make_solver, \
+    parse_pair
+from optifa.batch import ParikhBatchChecker
+from optifa.budget import SmtBudget
+from optifa.compact import CompactAutomaton
+from optifa.work_set import PairWorkSet
+
+
+class RecordingBudget(SmtBudget):
+    """Budget recording weights of the timeouts and counting solver calls made without a timeout of their own."""
+
+    def __init__(self, budget):
+        super().__init__(budget)
+        self.timeout_weights = []
+        self.timeout_set = False
+        self.reused_timeouts_cnt = 0
+
+    def get_timeout(self, weight):
+        self.timeout_weights.append(weight)
+        self.timeout_set = True
+        return super().get_timeout(weight)
+
+    def check(self, smt, *assumptions):
+        if not self.timeout_set:
+            self.reused_timeouts_cnt += 1
+        self.timeout_set = False
+        return super().check(smt, *assumptions)
+
+
+def make_checker(fa_a_name, fa_b_name, config, budget=None):
+    """
+    Make batch checker of the pair of automata with all the state pairs pushed to its work set.
+
+    Returns:
+        tuple: Batch checker and the compact automata of the work set.
+    """
+    fa_a_variables, fa_b_variables = get_variables(fa_a_name, fa_b_name)
+    fa_a, fa_b = CompactAutomaton.from_lfa_pair(*parse_pair(fa_a_name, fa_b_name))
+    q_pair_states = PairWorkSet(PairWorkSet.BFS)
+    for a_state, b_state in get_state_pairs(fa_a_variables, fa_b_variables):
+        q_pair_states.push(fa_a.state_ids[a_state], fa_b.state_ids[b_state])
+    checker = ParikhBatchChecker(make_solver(fa_a_variables, fa_b_variables, config), fa_a_variables,
+                                 fa_b_variables, config, q_pair_states, fa_a, fa_b, budget=budget)
+    return checker, fa_a, fa_b
+
+
+def check_in_batches(fa_a_name, fa_b_name, config, budget=None):
+    """
+    Check Parikh image satisfiability of all state pairs popped from a work set by the batch checker.
+
+    Returns:
+        tuple: Results of the state pairs and the batch checker.
+    """
+    checker, fa_a, fa_b = make_checker(fa_a_name, fa_b_name, config, budget)
+    q_pair_states = checker.q_pair_states
+    results = {}
+    while q_pair_states:
+        curr_pair = q_pair_states.pop()
+        state_pair = (fa_a.states[curr_pair[0]], fa_b.states[curr_pair[1]])
+        results[state_pair] = checker.check(*state_pair)
+
+    return results, checker
+
+
+def assert_decided_results_kept(results, expected):
+    """Assert the results match the expected ones, except for unknown results of checks after adaptive timeouts."""
+    assert results.keys() == expected.keys()
+    assert all(res == z3.unknown or res == expected[state_pair] for state_pair, res in results.items())
+
+
+@pytest.mark.parametrize('batch_split', ParikhBatchChecker.SPLITS)
+@pytest.mark.parametrize('batch_size', [1, 3, 8])
+@pytest.mark.parametrize('fa_a_name,fa_b_name', SMT_PAIRS)
+def test_batches_keep_results(fa_a_name, fa_b_name, batch_size, batch_split):
+    config = make_config(batch_size=batch_size, batch_split=batch_split)
+    results, checker = check_in_batches(fa_a_name, fa_b_name, config)
+
+    assert results == check_by_selectors(*get_variables(fa_a_name, fa_b_name), config)
+    assert not checker.decided
+    if batch_size == 1:
+        assert checker.batch_checks_cnt == 0
+
+
+@pytest.mark.parametrize('batch_split', ParikhBatchChecker.SPLITS)
+def test_unsatisfiable_batches_are_rejected_at_once(batch_split):
+    config = make_config(batch_size=8, batch_split=batch_split)
+    results, checker = check_in_batches('fa_m11', 'fa_m13', config)
+
+    assert checker.batch_rejected_cnt > 0
+    assert checker.batch_checks_cnt < len(results)
+    # Batch queries leave no formulae in the solver.
+    assert len(checker.smt.assertions()) == \
+        len(make_solver(*get_variables('fa_m11', 'fa_m13'), config).assertions())
+
+
+@pytest.mark.parametrize('fa_a_name,fa_b_name', SMT_PAIRS)
+def test_budget_keeps_results(fa_a_name, fa_b_name):
+    config = make_config(batch_size=4, batch_split=ParikhBatchChecker.BINARY)
+    budget = SmtBudget(10 ** 9)
+    results, checker = check_in_batches(fa_a_name, fa_b_name, config, budget)
+
+    assert_decided_results_kept(results, check_by_selectors(*get_variables(fa_a_name, fa_b_name), config))
+    assert checker.unknown_cnt == sum(res == z3.unknown for res in results.values())
+    # Every solver call is recorded, batch queries as well as checks of single product states.
+    assert len(budget.times) > checker.batch_checks_cnt
+
+
+@pytest.mark.parametrize('batch_split', ParikhBatchChecker.SPLITS)
+def test_every_solver_call_gets_timeout(batch_split):
+    config = make_config(batch_size=4, batch_split=batch_split)
+    budget = RecordingBudget(10 ** 9)
+    results, checker = check_in_batches('fa_m11', 'fa_m13', config, budget)
+
+    assert_decided_results_kept(results, check_by_selectors(*get_variables('fa_m11', 'fa_m13'), config))
+    assert checker.batch_checks_cnt > 0
+    assert budget.reused_timeouts_cnt == 0
+    # The first batch query is weighted by all the product states of the batch.
+    first_batch = get_state_pairs(*get_variables('fa_m11', 'fa_m13'))[:4]
+    assert budget.timeout_weights[0] == sum(checker.get_weight(*state_pair) for state_pair in first_batch)
+
+
+def test_stale_decisions_are_dropped():
+    config = make_config(batch_size=4, batch_split=ParikhBatchChecker.LINEAR)
+    checker, fa_a, fa_b = make_checker('fa_m5', 'fa_m7', config)
+    q_pair_states = checker.q_pair_states
+
+    def pop():
+        curr_pair = q_pair_states.pop()
+        return fa_a.states[curr_pair[0]], fa_b.states[curr_pair[1]]
+
+    checker.check(*pop())
+    decided = list(checker.decided)
+    assert len(decided) == 3
+
+    # The product states decided in advance get skipped and are popped without a check.
+    for a_state, b_state in decided:
+        q_pair_states.push(fa_a.state_ids[a_state], fa_b.state_ids[b_state], skip=True)
+    for _ in decided:
+        pop()
+    checker.check(*pop())
+    assert checker.decided
+    assert not set(decided) & set(checker.decided)
+
+
+def test_spent_budget_gives_unknown_results():
+    config = make_config(batch_size=1, batch_split=ParikhBatchChecker.BINARY)
+    results, checker = check_in_batches('fa_m5', 'fa_m7', config, SmtBudget(0))
+
+    assert all(res == z3.unknown for res in results.values())
+    assert checker.unknown_cnt == len(results)
+
+
+def test_unknown_batch_split():
+    fa_a_variables, fa_b_variables = get_variables('fa_m5', 'fa_m7')
+    config = make_config(batch_size=2, batch_split='ternary')
+    with pytest.raises(ValueError):
+        ParikhBatchChecker(make_solver(fa_a_variables, fa_b_variables, config), fa_a_variables, fa_b_variables,
+                           config, PairWorkSet(PairWorkSet.BFS), None, None)
+
+# End of file.
@@ -0,0 +1,76 @@
+# file name: test_bidirectional.py
+#
+# Tests of the bidirectional emptiness test and of reversed compact automata.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+import pytest
+
+from automata import A_STAR_B, COMPACT_PAIRS, explore, get_non_empty, get_product_transitions, get_transitions
+from optifa.bidirectional import BidirectionalSearch
+
+
+def test_reverse():
+    reversed_fa = A_STAR_B.reverse()
+
+    assert reversed_fa.start == [1]
+    assert reversed_fa.final == {0}
+    assert reversed_fa.symbols is A_STAR_B.symbols
+    assert get_transitions(reversed_fa) == {(target, symbol, source)
+                                            for source, symbol, target in get_transitions(A_STAR_B)}
+    assert get_transitions(reversed_fa.reverse()) == get_transitions(A_STAR_B)
+
+
+@pytest.mark.parametrize('fa_a,fa_b', COMPACT_PAIRS)
+def test_emptiness_matches_forward_exploration(fa_a, fa_b):
+    search = BidirectionalSearch(fa_a, fa_b)
+
+    assert search.run() == bool(explore(fa_a, fa_b).final)
+    assert search.processed_cnt == 0
+
+
+@pytest.mark.parametrize('fa_a,fa_b', COMPACT_PAIRS)
+def test_checks_only_forward_product_states_once(fa_a, fa_b):
+    non_empty = get_non_empty(fa_a, fa_b)
+    b_states_cnt = len(fa_b.states)
+    checked = []
+
+    def check(a_state, b_state):
+        checked.append(a_state * b_states_cnt + b_state)
+        return checked[-1] in non_empty
+
+    search = BidirectionalSearch(fa_a, fa_b, check)
+    found = search.run()
+
+    assert found == bool(non_empty)
+    assert len(checked) == len(set(checked)) == search.processed_cnt
+    # Product states reached backward reach a final product state, hence they are never checked.
+    assert search.backward.keys().isdisjoint(checked)
+    assert search.product.states == search.forward
+    assert search.product.final <= search.forward
+    assert bool(search.product.final) == found
+
+
+@pytest.mark.parametrize('fa_a,fa_b', COMPACT_PAIRS)
+def test_product_holds_accepting_run(fa_a, fa_b):
+    search = BidirectionalSearch(fa_a, fa_b)
+    if not search.run():
+        return
+
+    product = search.product
+    reached = {product.get_state(a_state, b_state) for a_state in fa_a.start for b_state in fa_b.start}
+    transitions = get_product_transitions(product)
+    changed = True
+    while changed:
+        changed = False
+        for state, _, target in transitions:
+            if state in reached and target not in reached:
+                reached.add(target)
+                changed = True
+
+    assert not reached.isdisjoint(product.final)
+    assert transitions <= get_product_transitions(explore(fa_a, fa_b))
+
+# End of file.
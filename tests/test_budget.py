@@ -0,0 +1,122 @@
+# file name: test_budget.py
+#
+# Tests of the budget of time for SMT checks with adaptive timeouts.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+import pytest
+import z3
+
+from optifa.budget import DEFAULT_ESCALATION, DEFAULT_INITIAL_TIMEOUT, HISTORY_SIZE, MIN_OBSERVATIONS, MIN_TIMEOUT, \
+    TIMEOUT_FACTOR, SmtBudget
+
+
+def record_times(budget, times):
+    """Record the check times in ms with the same weights, never escalating the timeouts."""
+    for elapsed in times:
+        budget.get_timeout(1)
+        budget.record(elapsed)
+
+
+def test_initial_timeout():
+    budget = SmtBudget(100000)
+    record_times(budget, [1] * (MIN_OBSERVATIONS - 1))
+
+    assert budget.get_timeout(1) == DEFAULT_INITIAL_TIMEOUT
+
+
+def test_timeout_by_90th_percentile():
+    budget = SmtBudget(100000)
+    record_times(budget, [10, 2, 9, 1, 8, 3, 7, 4, 6, 5])
+
+    # The 90th percentile of the times 1 to 10 is the ninth smallest time.
+    assert budget.get_timeout(1) == TIMEOUT_FACTOR * 9
+
+    budget = SmtBudget(100000)
+    record_times(budget, [0.1] * MIN_OBSERVATIONS)
+    assert budget.get_timeout(1) == MIN_TIMEOUT
+
+
+def test_timeout_by_recent_times():
+    budget = SmtBudget(100000)
+    record_times(budget, [100] * HISTORY_SIZE + [5] * HISTORY_SIZE)
+
+    assert len(budget.times) == HISTORY_SIZE
+    assert budget.get_timeout(1) == TIMEOUT_FACTOR * 5
+
+
+def test_sorted_times_follow_recent_times():
+    budget = SmtBudget(10 ** 9)
+    for index in range(3 * HISTORY_SIZE):
+        budget.get_timeout(index % 7)
+        budget.record((index * 37) % 101)
+        assert budget.sorted_times == sorted(budget.times)
+        assert budget.weights_sum == sum(budget.weights)
+
+    assert budget.get_timeout(0) == TIMEOUT_FACTOR * sorted(budget.times)[int(0.9 * (HISTORY_SIZE - 1))]
+
+
+def test_max_timeout():
+    budget = SmtBudget(100000, max_timeout=20)
+    record_times(budget, [10] * MIN_OBSERVATIONS)
+
+    assert budget.get_timeout(1) == 20
+
+
+def test_max_timeout_limits_escalated_timeouts():
+    budget = SmtBudget(100000, max_timeout=100)
+    record_times(budget, [5] * MIN_OBSERVATIONS)
+
+    assert budget.get_timeout(100) == 100
+    assert budget.escalations_cnt == 1
+
+
+def test_escalation():
+    budget = SmtBudget(100000)
+    record_times(budget, [5] * MIN_OBSERVATIONS)
+
+    # Weights over twice the average of the recent weights are escalated.
+    assert budget.get_timeout(2) == TIMEOUT_FACTOR * 5
+    assert budget.escalations_cnt == 0
+    assert budget.get_timeout(3) == DEFAULT_ESCALATION * TIMEOUT_FACTOR * 5
+    assert budget.escalations_cnt == 1
+
+
+def test_remaining_budget():
+    budget = SmtBudget(100)
+    record_times(budget, [11] * MIN_OBSERVATIONS)
+
+    assert budget.get_remaining() == 12
+    assert budget.get_timeout(1) == 12
+    # Escalated timeouts are limited by the remaining budget as well.
+    assert budget.get_timeout(100) == 12
+
+    budget.record(10.5)
+    assert budget.get_timeout(1) == 1
+    budget.record(2)
+    assert budget.get_remaining() == 0
+    assert budget.get_timeout(1) == 0
+
+
+def test_check_records_solver_time():
+    budget = SmtBudget(100000)
+    smt = z3.Solver()
+    x = z3.Int('x')
+    smt.add(x > 0)
+
+    assert budget.check(smt, x < 0) == z3.unsat
+    assert budget.check(smt) == z3.sat
+    assert len(budget.times) == 2
+    assert budget.spent == pytest.approx(sum(budget.times))
+
+
+def test_spend_keeps_check_times():
+    budget = SmtBudget(100)
+    budget.spend(60)
+
+    assert budget.get_remaining() == 40
+    assert not budget.times
+
+# End of file.
@@ -0,0 +1,133 @@
+# file name: test_cascade.py
+#
+# Tests of the adaptive cascade of abstraction checks.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+import argparse
+
+from optifa.cascade import MIN_CALLS, AbstractionCascade
+
+
+def make_counters():
+    """Make counters of the cascade."""
+    return argparse.Namespace(cascade_reorders=0, cascade_disabled_stages=0)
+
+
+def make_stage(name, rejected, calls):
+    """Make stage rejecting the product states '(a_state, b_state)' in 'rejected' and recording its calls."""
+    def check(a_state, b_state):
+        calls.append((name, a_state, b_state))
+        return (a_state, b_state) not in rejected
+
+    return name, check
+
+
+def test_first_rejecting_stage_decides():
+    calls = []
+    cascade = AbstractionCascade([make_stage('first', {(0, 0)}, calls), make_stage('second', {(0, 1)}, calls)],
+                                 make_counters())
+
+    assert not cascade.check(0, 0)
+    assert calls == [('first', 0, 0)]
+    assert not cascade.check(0, 1)
+    assert cascade.check(1, 1)
+    assert [stage.rejects_cnt for stage in cascade.stages] == [1, 1]
+    assert [stage.calls_cnt for stage in cascade.stages] == [3, 2]
+    assert cascade.get_order() == 'first|second'
+
+
+def test_static_cascade_keeps_stages():
+    calls = []
+    counters = make_counters()
+    cascade = AbstractionCascade([make_stage('never', set(), calls), make_stage('always', {(0, 0)}, calls)],
+                                 counters, reorder_interval=1)
+    for _ in range(2 * MIN_CALLS):
+        assert not cascade.check(0, 0)
+
+    assert cascade.get_order() == 'never|always'
+    assert counters == make_counters()
+
+
+def test_adaptive_cascade_disables_stages_never_rejecting():
+    calls = []
+    counters = make_counters()
+    cascade = AbstractionCascade([make_stage('never', set(), calls), make_stage('always', {(0, 0)}, calls)],
+                                 counters, adaptive=True, reorder_interval=4)
+    for _ in range(2 * MIN_CALLS):
+        assert not cascade.check(0, 0)
+
+    assert cascade.get_order() == 'always'
+    assert counters.cascade_disabled_stages == 1
+    # The disabled stage is not called any more.
+    never_calls_cnt = calls.count(('never', 0, 0))
+    assert MIN_CALLS <= never_calls_cnt < MIN_CALLS + 4
+    cascade.check(0, 0)
+    assert calls.count(('never', 0, 0)) == never_calls_cnt
+
+
+def test_adaptive_cascade_probes_disabled_stages():
+    calls = []
+    rejected = set()
+    counters = make_counters()
+    cascade = AbstractionCascade([make_stage('late', rejected, calls), make_stage('always', {(0, 0)}, calls)],
+                                 counters, adaptive=True, reorder_interval=10 ** 6, probe_interval=2)
+    for _ in range(MIN_CALLS):
+        cascade.check(0, 0)
+    cascade.reorder()
+    assert cascade.get_order() == 'always'
+
+    cascade.reorder()
+    assert cascade.get_order() == 'always'
+    cascade.reorder()
+    assert cascade.get_order() == 'late|always'
+    late = cascade.stages[0]
+    assert (late.calls_cnt, late.rejects_cnt, late.time) == (0, 0, 0.0)
+
+    # The probed stage rejects product states now, hence it stays enabled.
+    rejected.add((0, 1))
+    for _ in range(MIN_CALLS):
+        assert not cascade.check(0, 1)
+    cascade.reorder()
+    assert late.enabled
+    assert late.rejects_cnt == MIN_CALLS
+    assert counters.cascade_disabled_stages == 1
+
+
+def test_adaptive_cascade_disables_probed_stages_never_rejecting():
+    calls = []
+    counters = make_counters()
+    cascade = AbstractionCascade([make_stage('never', set(), calls), make_stage('always', {(0, 0)}, calls)],
+                                 counters, adaptive=True, reorder_interval=4, probe_interval=2)
+    for _ in range(8 * MIN_CALLS):
+        assert not cascade.check(0, 0)
+
+    # The stage is disabled after enough calls, probed after two more reorderings and disabled again.
+    assert counters.cascade_disabled_stages > 1
+    assert calls.count(('never', 0, 0)) < 8 * MIN_CALLS
+
+
+def test_adaptive_cascade_reorders_stages_by_rank():
+    calls = []
+    counters = make_counters()
+    cascade = AbstractionCascade([make_stage('slow', {(0, 0)}, calls), make_stage('fast', {(0, 1)}, calls)],
+                                 counters, adaptive=True)
+    for stage, time in zip(cascade.stages, (1.0, 0.1)):
+        stage.calls_cnt = MIN_CALLS
+        stage.rejects_cnt = 1
+        stage.time = time
+
+    cascade.reorder()
+    assert cascade.get_order() == 'fast|slow'
+    assert counters.cascade_reorders == 1
+
+    # Stages without enough calls are not reordered.
+    cascade.stages[1].calls_cnt = MIN_CALLS - 1
+    cascade.stages[1].time = 0.01
+    cascade.reorder()
+    assert cascade.get_order() == 'fast|slow'
+    assert counters.cascade_reorders == 1
+
+# End of file.
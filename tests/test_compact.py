@@ -0,0 +1,164 @@
+# file name: test_compact.py
+#
+# Tests of compact integer-indexed automata and of products of them.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+import pytest
+
+from automata import A_B_STAR, A_STAR_B, BASIC_DFAS, BASIC_PAIRS, C_STAR, COMPACT_AUTOMATA, COMPACT_PAIRS, \
+    explore, get_reachable_product, get_transitions, make_automaton, parse_basic
+from optifa.compact import CompactAutomaton
+
+
+def get_lfa_transitions(fa):
+    """Get set of transitions '(source, symbol, target)' of the Symboliclib automaton."""
+    return {(state, symbol, target) for state, state_dict in fa.transitions.items()
+            for symbol, targets in state_dict.items() for target in targets}
+
+
+@pytest.mark.parametrize('name', BASIC_DFAS)
+def test_from_lfa_round_trip(name):
+    fa = parse_basic(name)
+    compact = CompactAutomaton.from_lfa(fa)
+
+    assert get_transitions(compact) == get_lfa_transitions(fa)
+    assert compact.count_transitions() == len(get_lfa_transitions(fa))
+    assert {compact.states[state] for state in compact.start} == set(fa.start)
+    assert {compact.states[state] for state in compact.final} == set(fa.final)
+
+    converted = compact.to_lfa()
+    assert converted.states == set(fa.states)
+    assert (converted.start, converted.final) == (set(fa.start), set(fa.final))
+    assert get_lfa_transitions(converted) == get_lfa_transitions(fa)
+
+
+def test_from_lfa_pair_shares_symbol_table():
+    fa_a, fa_b = CompactAutomaton.from_lfa_pair(parse_basic('fa_m5'), parse_basic('fa_m7'))
+
+    assert fa_a.symbols is fa_b.symbols
+    assert len(set(fa_a.symbols)) == len(fa_a.symbols)
+
+
+def test_find_entry():
+    # Symbols 'a', 'b' and 'c' are the identifiers 0, 1 and 2, transitions of 'q0' are stored in this order.
+    assert A_STAR_B.find_entry(0, 0) == 0
+    assert list(A_STAR_B.get_targets(A_STAR_B.find_entry(0, 2))) == [3]
+    assert A_STAR_B.find_entry(3, 1) == -1
+    assert A_STAR_B.find_entry(1, 0) == -1
+    assert list(A_B_STAR.get_targets(A_B_STAR.find_entry(1, 1))) == [1]
+
+
+def test_product_of_known_automata():
+    product = explore(A_STAR_B, A_B_STAR)
+
+    # The only common word is 'ab'.
+    assert product.states == {product.get_state(0, 0), product.get_state(0, 1), product.get_state(1, 1)}
+    assert product.final == {product.get_state(1, 1)}
+    assert product.get_state_name(product.get_state(0, 1)) == 'q0,q1'
+    assert product.get_pair(product.get_state(3, 1)) == (3, 1)
+
+    product = explore(A_STAR_B, C_STAR)
+    assert product.states == {product.get_state(0, 0), product.get_state(3, 0)}
+    assert list(product.transitions[product.get_state(0, 0)]) == [2, product.get_state(3, 0)]
+    assert not product.final
+
+
+@pytest.mark.parametrize('fa_a_name,fa_b_name', BASIC_PAIRS)
+def test_compact_product_matches_product_of_lfa(fa_a_name, fa_b_name):
+    fa_a = parse_basic(fa_a_name)
+    fa_b = parse_basic(fa_b_name)
+    product = explore(*CompactAutomaton.from_lfa_pair(fa_a, fa_b)).to_lfa()
+    states, final = get_reachable_product(fa_a, fa_b)
+
+    assert (product.states, product.final) == (states, final)
+    assert get_lfa_transitions(product) == {
+        (a_state + ',' + b_state, symbol, a_target + ',' + b_target)
+        for a_state, b_state in (state.split(',') for state in states)
+        for symbol, a_targets in fa_a.transitions.get(a_state, {}).items()
+        for a_target in a_targets for b_target in fa_b.transitions.get(b_state, {}).get(symbol, [])}
+
+
+def test_get_final_distances():
+    assert A_STAR_B.get_final_distances() == [1, 0, None, None, 1]
+    # Shortest paths 'q0 -a-> q1 -a-> q3' and 'q2 -b-> q3', the path over 'q4' is longer.
+    fa = make_automaton(5, [0], [3], [(0, 'a', 1), (1, 'a', 3), (0, 'b', 4), (4, 'b', 2), (2, 'b', 3)])
+    assert fa.get_final_distances() == [2, 1, 1, 0, 2]
+
+
+@pytest.mark.parametrize('fa', COMPACT_AUTOMATA)
+def test_get_final_distances_are_shortest(fa):
+    # Relax the distances over the transitions until no distance is shortened.
+    distances = [0 if state in fa.final else None for state in range(len(fa.states))]
+    changed = True
+    while changed:
+        changed = False
+        for state, _, target in get_transitions(fa):
+            state = fa.states.index(state)
+            target = fa.states.index(target)
+            if distances[target] is not None and (distances[state] is None or distances[target] + 1 < distances[state]):
+                distances[state] = distances[target] + 1
+                changed = True
+
+    assert fa.get_final_distances() == distances
+
+
+def get_reachable(fa, states):
+    """Get states reachable from the given states."""
+    reachable = set(states)
+    stack = list(states)
+    while stack:
+        for _, targets in fa.get_transitions(stack.pop()):
+            for target in targets:
+                if target not in reachable:
+                    reachable.add(target)
+                    stack.append(target)
+
+    return reachable
+
+
+def test_trim_known_automaton():
+    trimmed = A_STAR_B.trim()
+
+    assert trimmed.states == ['q0', 'q1']
+    assert trimmed.start == [0]
+    assert trimmed.final == {1}
+    assert trimmed.symbols is A_STAR_B.symbols
+    assert get_transitions(trimmed) == {('q0', 'a', 'q0'), ('q0', 'b', 'q1')}
+
+
+def test_trim_empty_language():
+    trimmed = make_automaton(2, [0], [], [(0, 'a', 1)]).trim()
+
+    assert trimmed.states == []
+    assert trimmed.start == []
+    assert not trimmed.final
+
+
+@pytest.mark.parametrize('fa', COMPACT_AUTOMATA)
+def test_trim_keeps_useful_states_and_their_transitions(fa):
+    trimmed = fa.trim()
+    reachable = get_reachable(fa, fa.start)
+    useful = [state for state in range(len(fa.states))
+              if state in reachable and not get_reachable(fa, [state]).isdisjoint(fa.final)]
+
+    assert trimmed.states == [fa.states[state] for state in useful]
+    assert get_transitions(trimmed) == {transition for transition in get_transitions(fa)
+                                        if transition[0] in trimmed.states and transition[2] in trimmed.states}
+    assert bool(explore(trimmed, trimmed).final) == bool(explore(fa, fa).final)
+
+
+@pytest.mark.parametrize('fa_a,fa_b', COMPACT_PAIRS)
+def test_trimmed_product_keeps_final_product_states(fa_a, fa_b):
+    product = explore(fa_a, fa_b)
+    trimmed_fa_a = fa_a.trim()
+    trimmed_fa_b = fa_b.trim()
+    trimmed_product = explore(trimmed_fa_a, trimmed_fa_b)
+
+    assert {(trimmed_fa_a.states[a_state], trimmed_fa_b.states[b_state])
+            for a_state, b_state in map(trimmed_product.get_pair, trimmed_product.final)} == \
+        {(fa_a.states[a_state], fa_b.states[b_state]) for a_state, b_state in map(product.get_pair, product.final)}
+
+# End of file.
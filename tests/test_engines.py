@@ -0,0 +1,225 @@
+# file name: test_engines.py
+#
+# Tests of the product construction engines run on the basic automata.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+import importlib
+import sys
+
+import pytest
+
+from automata import BASIC_DFAS_DIR, BASIC_PAIRS, KeptStates, parse_basic
+from optifa.parikh import ParikhVariables
+from optifa.reduction import reduce_automaton
+
+# Number of leading CSV columns of the engines with results of the checks and sizes of the product.
+RESULT_COLUMNS = {'parikh_image': 7, 'combined': 13}
+
+# CSV columns of the engines with the number of final product states.
+FINAL_COLUMNS = {'length_abstraction': 8, 'parikh_image': 6, 'combined': 12}
+
+
+class ParikhVariablesWithoutDeadStates(ParikhVariables):
+    """Parikh image variables never recording dead states."""
+
+    def __init__(self, fa, prefix):
+        super().__init__(fa, prefix)
+        self.dead_states = KeptStates()
+
+
+def is_non_empty(engine, columns):
+    """Check whether the product of the engine has a final product state by the CSV columns."""
+    return int(columns[FINAL_COLUMNS[engine]]) > 0
+
+
+@pytest.fixture
+def run_engine(monkeypatch, capsys, tmp_path):
+    """
+    Get function running the engine on the pair of basic automata with the options.
+
+    The function returns the result CSV columns printed by the engine, all the columns for engines without Parikh image
+    formulae, and the stored product, None if the engine does not store it. With 'dead_states' set to False, the
+    engine runs with pruning by dead states turned off. With 'all_columns' set to True, all the columns are returned.
+    """
+    runs = []
+
+    def run(engine, fa_a_name, fa_b_name, *options, dead_states=True, all_columns=False):
+        module = importlib.import_module(f"resolve_satisfiability_{engine}")
+        product_file = tmp_path / f"product_{len(runs)}"
+        runs.append(product_file)
+        with monkeypatch.context() as patch:
+            patch.setattr(sys, 'argv', [module.__file__, '--path', '--fa-a', str(BASIC_DFAS_DIR / fa_a_name),
+                                        '--fa-b', str(BASIC_DFAS_DIR / fa_b_name), '--store-result',
+                                        str(product_file), *options])
+            if not dead_states:
+                patch.setattr(module, 'ParikhVariables', ParikhVariablesWithoutDeadStates)
+            module.main()
+
+        columns = capsys.readouterr().out.strip().rstrip(',').split(',')
+        if not all_columns:
+            columns = columns[:RESULT_COLUMNS.get(engine)]
+        return columns, product_file.read_text() if product_file.exists() else None
+
+    return run
+
+
+@pytest.mark.parametrize('engine', RESULT_COLUMNS)
+@pytest.mark.parametrize('fa_a_name,fa_b_name', BASIC_PAIRS)
+def test_model_pool_keeps_results_and_product(run_engine, engine, fa_a_name, fa_b_name):
+    assert run_engine(engine, fa_a_name, fa_b_name, '--model-pool-size', '16') == \
+        run_engine(engine, fa_a_name, fa_b_name, '--model-pool-size', '0')
+
+
+@pytest.mark.parametrize('engine', RESULT_COLUMNS)
+@pytest.mark.parametrize('fa_a_name,fa_b_name', BASIC_PAIRS)
+def test_dead_states_keep_results_and_product(run_engine, engine, fa_a_name, fa_b_name):
+    assert run_engine(engine, fa_a_name, fa_b_name, '--model-pool-size', '16') == \
+        run_engine(engine, fa_a_name, fa_b_name, '--model-pool-size', '0', dead_states=False)
+
+
+@pytest.mark.parametrize('engine', RESULT_COLUMNS)
+@pytest.mark.parametrize('fa_a_name,fa_b_name', BASIC_PAIRS)
+def test_loaded_formulae_keep_results_and_product(run_engine, engine, fa_a_name, fa_b_name, tmp_path):
+    formulae_file = str(tmp_path / 'formulae.smt2')
+    assert run_engine(engine, fa_a_name, fa_b_name, '--store-formulae', formulae_file) == \
+        run_engine(engine, fa_a_name, fa_b_name, '--load-formulae', formulae_file)
+
+
+@pytest.mark.parametrize('batch_split', ['binary', 'linear'])
+@pytest.mark.parametrize('engine', RESULT_COLUMNS)
+@pytest.mark.parametrize('fa_a_name,fa_b_name', BASIC_PAIRS)
+def test_batches_keep_results_and_product(run_engine, engine, fa_a_name, fa_b_name, batch_split):
+    assert run_engine(engine, fa_a_name, fa_b_name, '--batch-size', '4', '--batch-split', batch_split) == \
+        run_engine(engine, fa_a_name, fa_b_name)
+
+
+@pytest.mark.parametrize('engine', RESULT_COLUMNS)
+@pytest.mark.parametrize('fa_a_name,fa_b_name', BASIC_PAIRS)
+def test_relaxation_keeps_results_and_product(run_engine, engine, fa_a_name, fa_b_name):
+    columns, product = run_engine(engine, fa_a_name, fa_b_name, '--lp-relaxation')
+    expected_columns, expected_product = run_engine(engine, fa_a_name, fa_b_name)
+
+    # The combined engine checks the relaxation before the Parikh image formulae and counts its rejects apart, hence
+    # only the counters of all checks are the same.
+    assert (columns[:5], product) == (expected_columns[:5], expected_product)
+
+
+@pytest.mark.parametrize('engine', RESULT_COLUMNS)
+@pytest.mark.parametrize('fa_a_name,fa_b_name', BASIC_PAIRS)
+def test_budget_keeps_results_and_product(run_engine, engine, fa_a_name, fa_b_name):
+    assert run_engine(engine, fa_a_name, fa_b_name, '--smt-budget', '1000000') == \
+        run_engine(engine, fa_a_name, fa_b_name)
+
+
+@pytest.mark.parametrize('fa_a_name,fa_b_name', [('fa_m3', 'fa_m4'), ('excelatfit_product2', 'excelatfit_product3')])
+def test_portfolio_keeps_results_and_product(run_engine, fa_a_name, fa_b_name):
+    # The solver gives up at once, hence the portfolio decides the formulae.
+    assert run_engine('parikh_image', fa_a_name, fa_b_name, '--timeout', '1', '--portfolio', '2',
+                      '--portfolio-timeout', '60000') == \
+        run_engine('parikh_image', fa_a_name, fa_b_name)
+
+
+@pytest.mark.parametrize('engine', RESULT_COLUMNS)
+@pytest.mark.parametrize('fa_a_name,fa_b_name', BASIC_PAIRS)
+def test_workers_keep_results_and_product(run_engine, engine, fa_a_name, fa_b_name):
+    assert run_engine(engine, fa_a_name, fa_b_name, '--workers', '2', '--batch-size', '2') == \
+        run_engine(engine, fa_a_name, fa_b_name)
+
+
+@pytest.mark.parametrize('engine', [*RESULT_COLUMNS, 'variable_length_abstraction'])
+@pytest.mark.parametrize('options', [('--smt-budget', '1000'), ('--portfolio', '2')])
+def test_workers_reject_budget_and_portfolio(run_engine, engine, options):
+    with pytest.raises(SystemExit):
+        run_engine(engine, 'fa_m5', 'fa_m7', '--workers', '2', *options)
+
+
+@pytest.mark.parametrize('fa_a_name,fa_b_name', BASIC_PAIRS)
+def test_partitions_keep_emptiness(run_engine, fa_a_name, fa_b_name):
+    columns, _ = run_engine('length_abstraction', fa_a_name, fa_b_name, '--partitions', '3')
+    expected, _ = run_engine('length_abstraction', fa_a_name, fa_b_name)
+
+    # Skip flags depend on the order of exploration, hence only the reached product states and emptiness of the
+    # products are the same.
+    assert columns[0] == expected[0]
+    assert is_non_empty('length_abstraction', columns) == is_non_empty('length_abstraction', expected)
+
+
+@pytest.mark.parametrize('engine', FINAL_COLUMNS)
+@pytest.mark.parametrize('fa_a_name,fa_b_name', BASIC_PAIRS)
+def test_bidirectional_search_keeps_emptiness(run_engine, engine, fa_a_name, fa_b_name):
+    columns, _ = run_engine(engine, fa_a_name, fa_b_name, '--bidirectional')
+    expected, _ = run_engine(engine, fa_a_name, fa_b_name, '--break-when-final')
+
+    assert is_non_empty(engine, columns) == is_non_empty(engine, expected)
+
+
+@pytest.mark.parametrize('engine', FINAL_COLUMNS)
+@pytest.mark.parametrize('fa_a_name,fa_b_name', BASIC_PAIRS)
+def test_antichain_keeps_emptiness(run_engine, engine, fa_a_name, fa_b_name):
+    columns, _ = run_engine(engine, fa_a_name, fa_b_name, '--antichain', '--break-when-final')
+    expected, _ = run_engine(engine, fa_a_name, fa_b_name, '--break-when-final')
+
+    assert is_non_empty(engine, columns) == is_non_empty(engine, expected)
+
+
+@pytest.mark.parametrize('strategy', ['bfs', 'best-first'])
+@pytest.mark.parametrize('engine', FINAL_COLUMNS)
+@pytest.mark.parametrize('fa_a_name,fa_b_name', BASIC_PAIRS)
+def test_strategies_keep_emptiness(run_engine, engine, fa_a_name, fa_b_name, strategy):
+    columns, _ = run_engine(engine, fa_a_name, fa_b_name, '--strategy', strategy, '--break-when-final')
+    expected, _ = run_engine(engine, fa_a_name, fa_b_name, '--break-when-final')
+
+    assert is_non_empty(engine, columns) == is_non_empty(engine, expected)
+
+
+@pytest.mark.parametrize('engine', FINAL_COLUMNS)
+@pytest.mark.parametrize('fa_a_name,fa_b_name', BASIC_PAIRS)
+def test_prefilters_keep_emptiness(run_engine, engine, fa_a_name, fa_b_name):
+    columns, _ = run_engine(engine, fa_a_name, fa_b_name, '--prefilters')
+    expected, _ = run_engine(engine, fa_a_name, fa_b_name)
+
+    assert is_non_empty(engine, columns) == is_non_empty(engine, expected)
+
+
+@pytest.mark.parametrize('fa_a_name,fa_b_name', BASIC_PAIRS)
+def test_adaptive_cascade_keeps_sound_results(run_engine, fa_a_name, fa_b_name):
+    options = ('--lp-relaxation', '--prefilters')
+    columns, _ = run_engine('combined', fa_a_name, fa_b_name, *options, '--adaptive-cascade', '--cascade-interval', '2')
+    expected, _ = run_engine('combined', fa_a_name, fa_b_name, *options)
+
+    # Disabled stages reject no product states, hence the product may only grow.
+    assert int(columns[11]) >= int(expected[11])
+    assert is_non_empty('combined', columns) or not is_non_empty('combined', expected)
+
+
+@pytest.mark.parametrize('engine', FINAL_COLUMNS)
+@pytest.mark.parametrize('fa_a_name,fa_b_name', BASIC_PAIRS)
+def test_trimming_keeps_emptiness(run_engine, engine, fa_a_name, fa_b_name):
+    columns, _ = run_engine(engine, fa_a_name, fa_b_name, '--trim')
+    expected, _ = run_engine(engine, fa_a_name, fa_b_name)
+
+    assert is_non_empty(engine, columns) == is_non_empty(engine, expected)
+
+
+@pytest.mark.parametrize('reduction', ['bisimulation', 'simulation'])
+@pytest.mark.parametrize('engine', FINAL_COLUMNS)
+@pytest.mark.parametrize('fa_a_name,fa_b_name', BASIC_PAIRS)
+def test_reductions_keep_emptiness(run_engine, engine, fa_a_name, fa_b_name, reduction):
+    columns, _ = run_engine(engine, fa_a_name, fa_b_name, '--reduction', reduction)
+    expected, _ = run_engine(engine, fa_a_name, fa_b_name)
+
+    assert is_non_empty(engine, columns) == is_non_empty(engine, expected)
+
+
+@pytest.mark.parametrize('engine', [*FINAL_COLUMNS, 'variable_length_abstraction'])
+@pytest.mark.parametrize('reduction', [None, 'bisimulation', 'simulation'])
+def test_reduction_ratios_are_last_columns(run_engine, engine, reduction):
+    options = ('--reduction', reduction) if reduction else ()
+    columns, _ = run_engine(engine, 'fa_m5', 'fa_m7', *options, all_columns=True)
+
+    ratios = [reduce_automaton(parse_basic(name), reduction) if reduction else 1.0 for name in ('fa_m5', 'fa_m7')]
+    assert columns[-2:] == [f"{ratio:.4f}" for ratio in ratios]
+
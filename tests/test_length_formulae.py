@@ -0,0 +1,64 @@
+# file name: test_length_formulae.py
+#
+# Tests of the per-state table of length abstraction formulae.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+import pytest
+
+from automata import BASIC_DFAS, parse_basic
+from lfa import LFA
+from optifa.length_formulae import LengthFormulaeTable
+
+
+def get_unified(name):
+    """Get the basic automaton with unified transition symbols as the length engines use it."""
+    fa_unified = parse_basic(name)
+    fa_unified.unify_transition_symbols()
+    return fa_unified
+
+
+@pytest.mark.parametrize('name', BASIC_DFAS)
+def test_formulae_match_handle_and_loop_automata(name):
+    table = LengthFormulaeTable(get_unified(name))
+    fa_unified = get_unified(name)
+    for state in sorted(fa_unified.states):
+        handle_and_loop = LFA.get_new()
+        fa_unified.start = {state}
+        fa_unified.determinize_check(handle_and_loop)
+        expected = handle_and_loop.count_formulae_for_lfa() if handle_and_loop.final else None
+
+        assert table.get_formulae(state) == expected
+        assert table.handle_and_loop_states_cnt == len(handle_and_loop.states)
+
+
+def test_formulae_are_computed_once_per_state():
+    table = LengthFormulaeTable(get_unified('fa_m5'))
+    sizes = {}
+    for state in ('q0', 'q3', 'q0', 'q7', 'q3', 'q0'):
+        formulae_dict = table.get_formulae(state)
+        sizes.setdefault(state, table.handle_and_loop_states_cnt)
+
+        # A hit restores the size of the handle and loop automaton of the requested state.
+        assert table.handle_and_loop_states_cnt == sizes[state]
+        assert formulae_dict is table.get_formulae(state)
+
+    assert len(table) == 3
+    assert table.misses == 3
+    assert table.hits == 9
+
+
+def test_formulae_of_state_without_final_state_reachable():
+    fa_unified = LFA.get_new()
+    fa_unified.states = {'p', 'q', 'r'}
+    fa_unified.start = {'p'}
+    fa_unified.final = {'q'}
+    fa_unified.transitions = {'p': {'a': ['q', 'r']}, 'r': {'a': ['r']}}
+    table = LengthFormulaeTable(fa_unified)
+
+    assert table.get_formulae('r') is None
+    assert table.get_formulae('p') is not None
+
+# End of file.
@@ -0,0 +1,94 @@
+# file name: test_length_satisfiability.py
+#
+# Tests of arithmetic checks of length formulae against the SMT solver.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+import argparse
+import itertools
+
+import pytest
+
+from optifa.basic import check_length_formulae_smt, check_length_satisfiability
+from optifa.length_satisfiability import LengthSatisfiabilityCache, check_length_formulae, \
+    check_length_formulae_vectorized, get_length_formulae, solve_length_formulae
+
+# Length formulae '(handle, loop)' covering no loops, a single loop and two loops with shorter and longer handles.
+FORMULAE = [(0, 0), (3, 0), (5, 0), (0, 1), (2, 2), (1, 3), (4, 3), (7, 4), (6, 6), (2, 9)]
+
+
+@pytest.mark.parametrize('fa_a_formula,fa_b_formula', list(itertools.product(FORMULAE, repeat=2)))
+def test_solve_length_formulae_matches_smt(fa_a_formula, fa_b_formula):
+    assert solve_length_formulae(fa_a_formula, fa_b_formula) == \
+        check_length_formulae_smt([fa_a_formula], [fa_b_formula])
+
+
+@pytest.mark.parametrize('fa_a_formulae,fa_b_formulae,satisfiable', [
+    (((3, 0), (5, 0)), ((4, 0), (6, 0)), False),
+    (((3, 0), (5, 0)), ((4, 0), (5, 0)), True),
+    (((1, 2),), ((0, 2), (2, 4)), False),
+    (((1, 2),), ((0, 2), (3, 4)), True),
+    (((9, 0),), ((2, 3),), False),
+    (((8, 0),), ((2, 3),), True),
+    ((), ((0, 1),), False),
+])
+def test_check_length_formulae(fa_a_formulae, fa_b_formulae, satisfiable):
+    assert check_length_formulae(fa_a_formulae, fa_b_formulae) == satisfiable
+    assert check_length_formulae_smt(fa_a_formulae, fa_b_formulae) == satisfiable
+
+
+def test_check_length_formulae_vectorized_matches_pairwise():
+    pytest.importorskip('numpy')
+    for size in range(1, 4):
+        for fa_a_formulae, fa_b_formulae in itertools.combinations(itertools.combinations(FORMULAE, size), 2):
+            assert check_length_formulae_vectorized(fa_a_formulae, fa_b_formulae) == \
+                any(solve_length_formulae(fa_a_formula, fa_b_formula)
+                    for fa_a_formula in fa_a_formulae for fa_b_formula in fa_b_formulae)
+
+
+def test_get_length_formulae_is_canonical():
+    # Formulae of accepting states are tuples '(formula, handle)' or '(formula, handle, loop)'.
+    assert get_length_formulae({'q1': ('', 4, 3), 'q2': ('', 1), 'q3': ('', 4, 3)}) == ((1, 0), (4, 3))
+    assert get_length_formulae({'r': ('', 4, 3), 's': ('', 1)}) == ((1, 0), (4, 3))
+
+
+def test_cache_counts_hits_and_evicts_least_recently_used():
+    calls = []
+
+    def check_formulae(fa_a_formulae, fa_b_formulae):
+        calls.append((fa_a_formulae, fa_b_formulae))
+        return check_length_formulae(fa_a_formulae, fa_b_formulae)
+
+    cache = LengthSatisfiabilityCache(max_size=2)
+    first, second, third = ((3, 0),), ((1, 2),), ((2, 3),)
+    assert cache.check(first, second, check_formulae)
+    assert cache.check(first, second, check_formulae)
+    assert not cache.check(first, third, check_formulae)
+    assert cache.check(first, second, check_formulae)  # Moves the first key to the end.
+    assert cache.check(second, third, check_formulae)  # Evicts the key '(first, third)'.
+    assert not cache.check(first, third, check_formulae)
+
+    assert len(calls) == 4
+    assert (cache.hits, cache.misses) == (2, 4)
+    assert cache.get_hit_rate() == pytest.approx(1 / 3)
+
+
+@pytest.mark.parametrize('smt_free', [False, True])
+def test_check_length_satisfiability_with_cache(smt_free):
+    config = argparse.Namespace(smt_free=smt_free)
+    cache = LengthSatisfiabilityCache()
+    formulae_dicts = [{f"q{i}": ('', handle, loop) for i, (handle, loop) in enumerate(formulae)}
+                      for formulae in itertools.combinations(FORMULAE[::3], 2)]
+    for fa_a_formulae_dict, fa_b_formulae_dict in itertools.product(formulae_dicts, repeat=2):
+        # Formulae sets are keyed by the lengths only, regardless of names of accepting states.
+        renamed_dict = {'r' + state: formula for state, formula in fa_b_formulae_dict.items()}
+        for formulae_dict in (fa_b_formulae_dict, renamed_dict):
+            assert check_length_satisfiability(config, fa_a_formulae_dict, formulae_dict, cache) == \
+                check_length_satisfiability(config, fa_a_formulae_dict, formulae_dict)
+
+    assert cache.misses == len(formulae_dicts) ** 2
+    assert cache.hits == len(formulae_dicts) ** 2
+
+# End of file.
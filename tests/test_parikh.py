@@ -0,0 +1,197 @@
+# file name: test_parikh.py
+#
+# Tests of Parikh image formulae checked for product states.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+import pytest
+import z3
+
+from automata import BASIC_DFAS, BASIC_PAIRS, SMT_PAIRS, VARIANTS, check_by_selectors, get_product_pairs, \
+    get_state_pairs, get_variables, make_automaton, make_config, parse_basic
+from optifa.basic import add_persistent_formulae, add_selector_formulae, check_parikh_image_satisfiability
+from optifa.parikh import ParikhModelPool, ParikhVariables
+
+
+def add_state_specific_formulae(smt, variables, initial_state, config):
+    """
+    Add formulae for the automaton starting in the state with identifier 'initial_state', i.e., the per-state encoding
+    of the initial and final states which the selector formulae replaced.
+    """
+    y = variables.y
+    z = variables.z
+    for state in range(len(variables.states)):
+        if state == initial_state:
+            smt.add(variables.u[state] == 1)
+        elif state in variables.final:
+            smt.add(variables.u[state] == -1)
+        else:
+            smt.add(variables.u[state] == 0)
+
+    if not config.reverse_lengths and config.use_z_constraints:
+        for state in range(len(variables.states)):
+            if state == initial_state:
+                smt.add(z[state] == 1)
+            else:
+                unreached = z3.And([y[transition] == 0 for transition in variables.ingoing[state]])
+                smt.add(z3.Or(z3.And(z[state] == 0, unreached),
+                              z3.Or([z3.And(y[transition] > 0, z[variables.sources[transition]] > 0,
+                                            z[state] == z[variables.sources[transition]] + 1)
+                                     for transition in variables.ingoing[state]])))
+
+
+def check_per_state(fa_a_variables, fa_b_variables, config):
+    """Check Parikh image satisfiability of all state pairs with the state-specific formulae added per check."""
+    smt = z3.Solver()
+    add_persistent_formulae(smt, fa_a_variables, fa_b_variables, config)
+    results = {}
+    for a_state, b_state in get_state_pairs(fa_a_variables, fa_b_variables):
+        smt.push()
+        add_state_specific_formulae(smt, fa_a_variables, fa_a_variables.state_ids[a_state], config)
+        add_state_specific_formulae(smt, fa_b_variables, fa_b_variables.state_ids[b_state], config)
+        results[a_state, b_state] = smt.check()
+        smt.pop()
+
+    return results
+
+
+@pytest.mark.parametrize('name', BASIC_DFAS)
+def test_variables_index_transitions(name):
+    fa = parse_basic(name)
+    variables = ParikhVariables(fa, 'a')
+
+    assert len(variables.y) == len(variables.transitions_names) == len(fa.get_transitions_names())
+    assert str(variables.get_selector(variables.states[0])) == 'a_s_' + variables.states[0]
+    for state_id, state in enumerate(variables.states):
+        assert str(variables.u[state_id]) == 'a_u_' + state
+        assert sorted(str(y) for y in variables.get_ingoing_y(state_id)) == \
+            sorted('a_y_' + transition for transition in fa.get_ingoing_transitions_names(state))
+        assert sorted(str(y) for y in variables.get_outgoing_y(state_id)) == \
+            sorted('a_y_' + transition for transition in fa.get_outgoing_transitions_names(state))
+    for symbol in fa.alphabet:
+        assert sorted(variables.transitions_names[transition] for transition in variables.with_symbol[symbol]) == \
+            sorted(fa.get_transitions_names_with_symbol(symbol))
+
+
+@pytest.mark.parametrize('config', VARIANTS)
+@pytest.mark.parametrize('fa_a_name,fa_b_name', SMT_PAIRS)
+def test_selector_formulae_match_state_specific_formulae(fa_a_name, fa_b_name, config):
+    fa_a_variables, fa_b_variables = get_variables(fa_a_name, fa_b_name)
+
+    assert check_by_selectors(fa_a_variables, fa_b_variables, config) == \
+        check_per_state(fa_a_variables, fa_b_variables, config)
+
+
+@pytest.mark.parametrize('reverse_lengths', [True, False])
+@pytest.mark.parametrize('fa_a_name,fa_b_name', SMT_PAIRS)
+def test_lazy_connectivity_constraints_match_full_encoding(fa_a_name, fa_b_name, reverse_lengths):
+    fa_a_variables, fa_b_variables = get_variables(fa_a_name, fa_b_name)
+    config = make_config(reverse_lengths=reverse_lengths, use_z_constraints=False, lazy_z_constraints=True)
+    # The forward lengths 'z' are exact for the selected initial states, unlike the reversed ones.
+    full_config = make_config(reverse_lengths=False)
+
+    assert check_by_selectors(fa_a_variables, fa_b_variables, config) == \
+        check_by_selectors(fa_a_variables, fa_b_variables, full_config)
+
+
+def test_lazy_connectivity_constraints_cut_disconnected_loop():
+    # Parikh image of the word 'ab' is satisfied by the transition over 'a' and the unreachable loop over 'b'.
+    fa_a = make_automaton(3, [0], [1], [(0, 'a', 1), (2, 'b', 2)]).to_lfa()
+    fa_b = make_automaton(3, [0], [2], [(0, 'a', 1), (1, 'b', 2)]).to_lfa()
+    fa_a_variables = ParikhVariables(fa_a, 'a')
+    fa_b_variables = ParikhVariables(fa_b, 'b')
+    config = make_config(use_z_constraints=False)
+    smt = z3.Solver()
+    add_persistent_formulae(smt, fa_a_variables, fa_b_variables, config)
+    add_selector_formulae(smt, fa_a_variables, fa_b_variables, config)
+
+    assert check_parikh_image_satisfiability(smt, fa_a_variables, fa_b_variables, 'q0', 'q0', config) == z3.sat
+    config.lazy_z_constraints = True
+    assert check_parikh_image_satisfiability(smt, fa_a_variables, fa_b_variables, 'q0', 'q0', config) == z3.unsat
+    assert (fa_a_variables.cuts_cnt, fa_b_variables.cuts_cnt) == (1, 0)
+
+
+@pytest.mark.parametrize('fa_a_name,fa_b_name', SMT_PAIRS)
+def test_scc_constraints_are_between_no_and_full_connectivity_constraints(fa_a_name, fa_b_name):
+    fa_a_variables, fa_b_variables = get_variables(fa_a_name, fa_b_name)
+    config = make_config(use_z_constraints=False, scc_constraints=True)
+    results = check_by_selectors(fa_a_variables, fa_b_variables, config)
+    no_z_results = check_by_selectors(fa_a_variables, fa_b_variables, make_config(use_z_constraints=False))
+    full_results = check_by_selectors(fa_a_variables, fa_b_variables, make_config(reverse_lengths=False))
+
+    assert all(results[state_pair] == z3.unsat for state_pair, res in no_z_results.items() if res == z3.unsat)
+    assert all(res == z3.sat for state_pair, res in results.items() if full_results[state_pair] == z3.sat)
+    # With lazy connectivity cuts inside the components, the formulae are exact.
+    config.lazy_z_constraints = True
+    assert check_by_selectors(fa_a_variables, fa_b_variables, config) == full_results
+
+
+def test_scc_constraints_cut_unreachable_component():
+    # The loop over 'b' is a component not entered from the component of the initial state.
+    fa_a = make_automaton(3, [0], [1], [(0, 'a', 1), (2, 'b', 2)]).to_lfa()
+    fa_b = make_automaton(3, [0], [2], [(0, 'a', 1), (1, 'b', 2)]).to_lfa()
+    fa_a_variables = ParikhVariables(fa_a, 'a')
+    fa_b_variables = ParikhVariables(fa_b, 'b')
+
+    config = make_config(use_z_constraints=False, scc_constraints=True)
+
+    assert sorted(sorted(scc) for scc in fa_a_variables.get_sccs()) == [[0], [1], [2]]
+    assert check_by_selectors(fa_a_variables, fa_b_variables, config)[('q0', 'q0')] == z3.unsat
+
+
+@pytest.mark.parametrize('config', VARIANTS + [make_config(use_z_constraints=False, lazy_z_constraints=True)])
+@pytest.mark.parametrize('fa_a_name,fa_b_name', BASIC_PAIRS)
+def test_model_pool_keeps_results(fa_a_name, fa_b_name, config):
+    fa_a_variables, fa_b_variables = get_variables(fa_a_name, fa_b_name)
+    state_pairs = get_product_pairs(fa_a_variables, fa_b_variables)
+    model_pool = ParikhModelPool(fa_a_variables, fa_b_variables, config, 16)
+
+    assert check_by_selectors(fa_a_variables, fa_b_variables, config, state_pairs, model_pool) == \
+        check_by_selectors(fa_a_variables, fa_b_variables, config, state_pairs)
+    assert model_pool.hits + model_pool.misses <= len(state_pairs)
+
+
+@pytest.mark.parametrize('config', VARIANTS)
+def test_model_pool_reuses_shifted_models(config):
+    fa_a_variables, fa_b_variables = get_variables('excelatfit_product2', 'excelatfit_product3')
+    model_pool = ParikhModelPool(fa_a_variables, fa_b_variables, config, 16)
+    check_by_selectors(fa_a_variables, fa_b_variables, config, get_product_pairs(fa_a_variables, fa_b_variables),
+                       model_pool)
+
+    assert model_pool.hits > 0
+
+    model_pool = ParikhModelPool(fa_a_variables, fa_b_variables, config, 0)
+    check_by_selectors(fa_a_variables, fa_b_variables, config, get_product_pairs(fa_a_variables, fa_b_variables),
+                       model_pool)
+    assert (model_pool.hits, model_pool.misses) == (0, 0)
+
+
+@pytest.mark.parametrize('config', VARIANTS)
+@pytest.mark.parametrize('fa_a_name,fa_b_name', SMT_PAIRS)
+def test_dead_states_keep_results(fa_a_name, fa_b_name, config):
+    fa_a_variables, fa_b_variables = get_variables(fa_a_name, fa_b_name)
+    results = check_by_selectors(fa_a_variables, fa_b_variables, config)
+
+    assert results == check_by_selectors(*get_variables(fa_a_name, fa_b_name, dead_states=False), config)
+    # A dead state makes the formulae unsatisfiable with all states of the other automaton.
+    for a_state in fa_a_variables.dead_states:
+        assert all(results[a_state, b_state] == z3.unsat for b_state in fa_b_variables.states)
+    for b_state in fa_b_variables.dead_states:
+        assert all(results[a_state, b_state] == z3.unsat for a_state in fa_a_variables.states)
+
+
+def test_dead_states_prune_checks():
+    fa_a_variables, fa_b_variables = get_variables('fa_m11', 'fa_m13')
+    check_by_selectors(fa_a_variables, fa_b_variables, VARIANTS[0])
+
+    assert fa_a_variables.dead_states
+    assert fa_a_variables.dead_hits > 0
+
+    fa_a_variables, fa_b_variables = get_variables('fa_m11', 'fa_m13', dead_states=False)
+    check_by_selectors(fa_a_variables, fa_b_variables, VARIANTS[0])
+    assert not fa_a_variables.dead_states
+    assert fa_a_variables.dead_hits == 0
+
+# End of file.
@@ -0,0 +1,63 @@
+# file name: test_partition.py
+#
+# Tests of hash-partitioned exploration of products against the sequential exploration.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+import pytest
+
+from automata import COMPACT_PAIRS, explore, get_non_empty, get_product_transitions
+from optifa.partition import PartitionedExploration, get_owner, get_pending
+
+
+@pytest.mark.parametrize('partitions', [1, 2, 3])
+@pytest.mark.parametrize('fa_a,fa_b', COMPACT_PAIRS)
+def test_full_product_matches_sequential(fa_a, fa_b, partitions):
+    expected = explore(fa_a, fa_b)
+    exploration = PartitionedExploration(fa_a, fa_b, partitions)
+    product = exploration.run()
+
+    assert product.states == expected.states
+    assert product.final == expected.final
+    assert get_product_transitions(product) == get_product_transitions(expected)
+    assert exploration.counters['checked'] == len(expected.states)
+
+
+@pytest.mark.parametrize('fa_a,fa_b', COMPACT_PAIRS)
+def test_emptiness_matches_sequential(fa_a, fa_b):
+    # A sound check rejects only product states with empty intersection, hence emptiness does not depend on the order
+    # of exploration and skip flags.
+    non_empty = get_non_empty(fa_a, fa_b)
+    b_states_cnt = len(fa_b.states)
+
+    def check(a_state, b_state):
+        return a_state * b_states_cnt + b_state in non_empty
+
+    expected = explore(fa_a, fa_b, check, True)
+    product = PartitionedExploration(fa_a, fa_b, 2, True, check).run()
+
+    assert bool(product.final) == bool(expected.final) == bool(non_empty)
+    assert product.final <= non_empty
+
+
+def test_get_owner():
+    owners = [get_owner(product_state, 3) for product_state in range(300)]
+
+    assert set(owners) == {0, 1, 2}
+    assert owners == [get_owner(product_state, 3) for product_state in range(300)]
+    assert {get_owner(product_state, 1) for product_state in range(300)} == {0}
+
+
+def test_get_pending_merges_arrivals_and_upgrades_skip_flags():
+    q_checked_pairs = {4}
+    # Product states of 'b_states_cnt = 3': '(1, 1)' is 4, '(1, 2)' is 5 and '(2, 0)' is 6.
+    pending = get_pending([(1, 2, False), (2, 0, True), (1, 1, True), (1, 2, True), (2, 0, False)], 3,
+                          q_checked_pairs)
+
+    assert pending == {5: [1, 2, True], 6: [2, 0, True]}
+    assert q_checked_pairs == {4, 5, 6}
+    assert get_pending([(1, 2, False)], 3, q_checked_pairs) == {}
+
+# End of file.
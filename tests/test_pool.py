@@ -0,0 +1,98 @@
+# file name: test_pool.py
+#
+# Tests of the pool of worker processes checking Parikh image satisfiability.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+import pytest
+import z3
+
+from automata import SMT_PAIRS, VARIANTS, check_by_selectors, get_state_pairs, get_variables, make_config, \
+    parse_pair
+from optifa.batch import ParikhBatchChecker
+from optifa.compact import CompactAutomaton
+from optifa.pool import ParikhWorkerPool, check_pairs, init_worker, worker
+from optifa.work_set import PairWorkSet
+
+
+@pytest.mark.parametrize('config', VARIANTS[:1] + [make_config(lazy_z_constraints=True, reverse_lengths=False)])
+@pytest.mark.parametrize('fa_a_name,fa_b_name', SMT_PAIRS)
+def test_workers_keep_results(fa_a_name, fa_b_name, config):
+    config = make_config(**vars(config), timeout=None, model_pool_size=0)
+    fa_a_variables, fa_b_variables = get_variables(fa_a_name, fa_b_name)
+    state_pairs = get_state_pairs(fa_a_variables, fa_b_variables)
+    pool = ParikhWorkerPool(*parse_pair(fa_a_name, fa_b_name), config, 3)
+    try:
+        results = pool.check(state_pairs)
+    finally:
+        pool.shutdown()
+
+    expected = check_by_selectors(fa_a_variables, fa_b_variables, config)
+    assert results == expected
+    assert pool.checks_cnt == len(state_pairs)
+    # Dead states found by the workers make the formulae unsatisfiable with every state of the other automaton.
+    assert all(expected[a_state, b_state] == z3.unsat for a_state, b_state in state_pairs
+               if a_state in pool.fa_a_dead_states or b_state in pool.fa_b_dead_states)
+
+
+def test_workers_collect_dead_states():
+    config = make_config(timeout=None, model_pool_size=0)
+    pool = ParikhWorkerPool(*parse_pair('fa_m11', 'fa_m13'), config, 2)
+    state_pairs = get_state_pairs(*get_variables('fa_m11', 'fa_m13'))
+    try:
+        for start in range(0, len(state_pairs), 4):
+            pool.check(state_pairs[start:start + 4])
+    finally:
+        pool.shutdown()
+
+    assert pool.fa_a_dead_states
+
+
+def test_check_pairs_uses_dead_states_of_other_workers():
+    config = make_config(timeout=None, model_pool_size=0)
+    fa_a_variables, fa_b_variables = get_variables('fa_m11', 'fa_m13')
+    expected = check_by_selectors(fa_a_variables, fa_b_variables, config)
+    init_worker(*parse_pair('fa_m11', 'fa_m13'), config)
+    # 'q2' makes the formulae unsatisfiable with every state of the second automaton.
+    state_pairs = [('q2', b_state) for b_state in fa_b_variables.states]
+    assert all(expected[state_pair] == z3.unsat for state_pair in state_pairs)
+
+    results, fa_a_dead_states, fa_b_dead_states = check_pairs(state_pairs, {'q2'}, set())
+    assert results == ['unsat'] * len(state_pairs)
+    assert worker['fa_a_variables'].dead_hits == len(state_pairs)
+    assert 'q2' in fa_a_dead_states
+    assert not fa_b_dead_states
+
+
+def test_batch_checker_gets_dead_states_of_workers():
+    config = make_config(timeout=None, model_pool_size=0, batch_size=2, batch_split=ParikhBatchChecker.BINARY)
+    expected = check_by_selectors(*get_variables('fa_m11', 'fa_m13'), config)
+    fa_a_variables, fa_b_variables = get_variables('fa_m11', 'fa_m13')
+    fa_a, fa_b = CompactAutomaton.from_lfa_pair(*parse_pair('fa_m11', 'fa_m13'))
+    # States of the second automaton are iterated first, hence a dead state of the first automaton found in a batch
+    # is in product states of the following batches.
+    q_pair_states = PairWorkSet(PairWorkSet.BFS)
+    for b_state in fa_b_variables.states:
+        for a_state in fa_a_variables.states:
+            q_pair_states.push(fa_a.state_ids[a_state], fa_b.state_ids[b_state])
+    pool = ParikhWorkerPool(*parse_pair('fa_m11', 'fa_m13'), config, 2)
+    checker = ParikhBatchChecker(None, fa_a_variables, fa_b_variables, config, q_pair_states, fa_a, fa_b, pool=pool)
+
+    results = {}
+    try:
+        while q_pair_states:
+            curr_pair = q_pair_states.pop()
+            state_pair = (fa_a.states[curr_pair[0]], fa_b.states[curr_pair[1]])
+            results[state_pair] = checker.check(*state_pair)
+    finally:
+        pool.shutdown()
+
+    assert results == expected
+    assert fa_a_variables.dead_states == pool.fa_a_dead_states
+    # Product states with dead states found by the workers are rejected without the workers.
+    assert fa_a_variables.dead_hits > 0
+    assert pool.checks_cnt < len(results)
+
+# End of file.
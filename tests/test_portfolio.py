@@ -0,0 +1,151 @@
+# file name: test_portfolio.py
+#
+# Tests of the portfolio of SMT solver configurations for undecided Parikh image queries.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+import json
+
+import pytest
+import z3
+
+from automata import check_by_selectors, get_state_pairs, get_variables, make_config, make_solver
+from optifa.basic import check_parikh_image_satisfiability
+from optifa.budget import SmtBudget
+from optifa.portfolio import CONFIGURATIONS, ParikhPortfolio, get_solver
+
+# Pairs of automata with satisfiable and unsatisfiable product states, small enough to run the portfolio for all
+# pairs of their states.
+PORTFOLIO_PAIRS = [('fa_m5', 'fa_m7'), ('fa_m3', 'fa_m4')]
+
+
+class RecordingPortfolio(ParikhPortfolio):
+    """Portfolio recording timeouts of its queries."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.timeouts = []
+
+    def check(self, a_state, b_state, timeout=None):
+        self.timeouts.append(timeout)
+        return super().check(a_state, b_state, timeout)
+
+
+def make_giving_up_solver(fa_a_variables, fa_b_variables, config):
+    """Make solver with the formulae which gives up every check, the portfolio workers solve them without the limit."""
+    smt = make_solver(fa_a_variables, fa_b_variables, config)
+    smt.set('rlimit', 1)
+    return smt
+
+
+@pytest.mark.parametrize('name', CONFIGURATIONS)
+def test_get_solver(name):
+    smt = get_solver(name)
+    x = z3.Int('x')
+    smt.add(x > 1, x < 3)
+
+    assert smt.check() == z3.sat
+    assert smt.model()[x] == 2
+
+
+def test_get_solver_unknown_configuration():
+    with pytest.raises(ValueError):
+        get_solver('minisat')
+
+
+@pytest.mark.parametrize('fa_a_name,fa_b_name', PORTFOLIO_PAIRS)
+def test_portfolio_matches_solver(fa_a_name, fa_b_name):
+    fa_a_variables, fa_b_variables = get_variables(fa_a_name, fa_b_name, dead_states=False)
+    config = make_config()
+    portfolio = ParikhPortfolio(make_solver(fa_a_variables, fa_b_variables, config), fa_a_variables, fa_b_variables,
+                                size=2)
+    results = check_by_selectors(fa_a_variables, fa_b_variables, config)
+
+    for state_pair in get_state_pairs(fa_a_variables, fa_b_variables):
+        assert portfolio.check(*state_pair) == results[state_pair]
+    portfolio.shutdown()
+    assert portfolio.decided_cnt == portfolio.checks_cnt == len(results)
+    assert sum(portfolio.wins.values()) == len(results)
+
+
+def test_portfolio_workers_get_new_assertions():
+    fa_a_variables, fa_b_variables = get_variables('fa_m5', 'fa_m7', dead_states=False)
+    config = make_config()
+    smt = make_solver(fa_a_variables, fa_b_variables, config)
+    portfolio = ParikhPortfolio(smt, fa_a_variables, fa_b_variables, size=2)
+    results = check_by_selectors(fa_a_variables, fa_b_variables, config)
+    state_pair = next(state_pair for state_pair, res in results.items() if res == z3.sat)
+
+    assert portfolio.check(*state_pair) == z3.sat
+    workers = dict(portfolio.workers)
+    assert all(worker.synced_cnt == len(smt.assertions()) for worker in workers.values())
+
+    # Formulae asserted by the incremental solver later are passed to the running workers.
+    smt.add(z3.Bool('cut'), z3.Not(z3.Bool('cut')))
+    assert portfolio.check(*state_pair) == z3.unsat
+    assert portfolio.workers == workers
+    # Workers still solving the previous query skip the query and get the new formulae with a later query.
+    assert any(worker.synced_cnt == len(smt.assertions()) for worker in workers.values())
+
+    portfolio.shutdown()
+    assert not portfolio.workers
+    assert not any(worker.process.is_alive() for worker in workers.values())
+
+
+@pytest.mark.parametrize('budget', [None, SmtBudget(10**9)])
+def test_portfolio_decides_undecided_formulae(budget):
+    fa_a_variables, fa_b_variables = get_variables('fa_m5', 'fa_m7', dead_states=False)
+    config = make_config()
+    smt = make_giving_up_solver(fa_a_variables, fa_b_variables, config)
+    portfolio = ParikhPortfolio(smt, fa_a_variables, fa_b_variables, size=2)
+    results = check_by_selectors(fa_a_variables, fa_b_variables, config)
+
+    for a_state, b_state in list(results)[:4]:
+        assert check_parikh_image_satisfiability(smt, fa_a_variables, fa_b_variables, a_state, b_state, config,
+                                                 portfolio=portfolio, budget=budget) == results[a_state, b_state]
+    portfolio.shutdown()
+    assert portfolio.checks_cnt == 4
+    if budget is not None:
+        assert budget.spent > 0
+
+
+def test_portfolio_timeout_limited_by_remaining_budget():
+    fa_a_variables, fa_b_variables = get_variables('fa_m5', 'fa_m7', dead_states=False)
+    config = make_config()
+    smt = make_giving_up_solver(fa_a_variables, fa_b_variables, config)
+    portfolio = RecordingPortfolio(smt, fa_a_variables, fa_b_variables, size=2)
+    budget = SmtBudget(5000)
+    state_pair = get_state_pairs(fa_a_variables, fa_b_variables)[0]
+
+    check_parikh_image_satisfiability(smt, fa_a_variables, fa_b_variables, *state_pair, config, portfolio=portfolio,
+                                      budget=budget)
+    assert 0 < portfolio.timeouts[0] <= 5000
+
+    # The portfolio is not run when the budget is spent.
+    budget.spend(5000)
+    assert check_parikh_image_satisfiability(smt, fa_a_variables, fa_b_variables, *state_pair, config,
+                                             portfolio=portfolio, budget=budget) == z3.unknown
+    portfolio.shutdown()
+    assert portfolio.checks_cnt == len(portfolio.timeouts) == 1
+
+
+def test_portfolio_runs_configurations_winning_most_often(tmp_path):
+    stats_file = tmp_path / 'portfolio.json'
+    stats_file.write_text(json.dumps({'pair': {'simplex': 3, 'qflia': 1}, 'other': {'lia2card': 5}}))
+    fa_a_variables, fa_b_variables = get_variables('fa_m5', 'fa_m7', dead_states=False)
+    portfolio = ParikhPortfolio(make_solver(fa_a_variables, fa_b_variables, make_config()), fa_a_variables,
+                                fa_b_variables, 2, str(stats_file), 'pair')
+
+    assert portfolio.configurations == ['simplex', 'qflia']
+
+    portfolio.check(*get_state_pairs(fa_a_variables, fa_b_variables)[0])
+    portfolio.shutdown()
+    portfolio.store_stats()
+    stats = json.loads(stats_file.read_text())
+    assert stats['other'] == {'lia2card': 5}
+    assert stats['pair']['simplex'] + stats['pair']['qflia'] == 5
+    assert sum(stats['pair'].values()) == 5
+
+# End of file.
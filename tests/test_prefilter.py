@@ -0,0 +1,83 @@
+# file name: test_prefilter.py
+#
+# Tests of summaries of states and pre-filters of product states.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+import itertools
+import math
+
+import pytest
+
+from automata import A_STAR_B, C_STAR, COMPACT_PAIRS, make_automaton
+from optifa.prefilter import PairPrefilter, StateSummaries
+
+# Word 'aa' only.
+A_A = make_automaton(3, [0], [2], [(0, 'a', 1), (1, 'a', 2)])
+
+PAIRS = [(A_A, A_STAR_B)] + COMPACT_PAIRS
+
+
+def get_non_empty_pairs(fa_a, fa_b):
+    """Get all pairs of states '(a_state, b_state)' with non-empty intersection of languages of the states."""
+    a_successors = [dict(fa_a.get_transitions(state)) for state in range(len(fa_a.states))]
+    b_successors = [dict(fa_b.get_transitions(state)) for state in range(len(fa_b.states))]
+    non_empty = set(itertools.product(fa_a.final, fa_b.final))
+    changed = True
+    while changed:
+        changed = False
+        for pair in itertools.product(range(len(fa_a.states)), range(len(fa_b.states))):
+            if pair not in non_empty and any(
+                    (a_target, b_target) in non_empty
+                    for symbol, a_targets in a_successors[pair[0]].items()
+                    for a_target in a_targets for b_target in b_successors[pair[1]].get(symbol, ())):
+                non_empty.add(pair)
+                changed = True
+
+    return non_empty
+
+
+def test_state_summaries():
+    summaries = StateSummaries(A_STAR_B)
+
+    assert summaries.live == [True, True, False, False, True]
+    assert summaries.min_lengths == [1, 0, None, None, 1]
+    assert summaries.max_lengths == [math.inf, 0, None, None, 1]
+    # Symbols 'a', 'b' and 'c' are the bits 1, 2 and 4.
+    assert summaries.may_symbols == [0b011, 0, 0, 0, 0b010]
+    assert summaries.must_symbols == [0b010, 0, 0, 0, 0b010]
+
+    summaries = StateSummaries(A_A)
+    assert summaries.max_lengths == [2, 1, 0]
+    assert summaries.must_symbols == [0b001, 0b001, 0]
+
+
+def test_prefilter_rejects():
+    prefilter = PairPrefilter(A_STAR_B, A_STAR_B)
+    assert not prefilter.check(0, 3)
+    assert not prefilter.check(2, 0)
+    assert prefilter.check(0, 4)
+    assert prefilter.dead_rejected_cnt == 2
+
+    prefilter = PairPrefilter(A_A, A_STAR_B)
+    assert not prefilter.check(0, 4)
+    assert prefilter.check(2, 1)
+    assert prefilter.length_rejected_cnt == 1
+
+    prefilter = PairPrefilter(A_STAR_B, C_STAR)
+    assert not prefilter.check(0, 0)
+    assert prefilter.symbols_rejected_cnt == 1
+    assert prefilter.checks_cnt == 1
+
+
+@pytest.mark.parametrize('fa_a,fa_b', PAIRS)
+def test_prefilter_rejects_only_empty_intersections(fa_a, fa_b):
+    prefilter = PairPrefilter(fa_a, fa_b)
+    non_empty = get_non_empty_pairs(fa_a, fa_b)
+    for a_state, b_state in itertools.product(range(len(fa_a.states)), range(len(fa_b.states))):
+        if (a_state, b_state) in non_empty:
+            assert prefilter.check(a_state, b_state)
+
+# End of file.
@@ -0,0 +1,118 @@
+# file name: test_reduction.py
+#
+# Tests of bisimulation and simulation equivalence of compact automata and of quotients by them.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+import pytest
+
+from automata import A_STAR_B, COMPACT_AUTOMATA, get_transitions, make_automaton
+from optifa.compact import CompactAutomaton
+from optifa.reduction import BISIMULATION, SIMULATION, compute_bisimulation, compute_simulation_equivalence, \
+    get_quotient, reduce_automaton
+
+# Both 'q0' and 'q3' read 'ab' and 'ac', 'q0' also by a branch reading 'ab' only. Hence 'q0' and 'q3' simulate each
+# other, but they are not bisimilar.
+BRANCHING = make_automaton(6, [0], [5], [(0, 'a', 1), (0, 'a', 2), (1, 'b', 5), (2, 'b', 5), (2, 'c', 5),
+                                         (3, 'a', 4), (4, 'b', 5), (4, 'c', 5)])
+
+AUTOMATA = [BRANCHING] + COMPACT_AUTOMATA
+
+
+def get_words(fa, max_length):
+    """Get words of at most the given length accepted by the automaton, as tuples of symbols."""
+    words = set()
+    configurations = {((), state) for state in fa.start}
+    for _ in range(max_length + 1):
+        words.update(word for word, state in configurations if state in fa.final)
+        configurations = {(word + (fa.symbols[symbol],), target) for word, state in configurations
+                          for symbol, targets in fa.get_transitions(state) for target in targets}
+
+    return words
+
+
+def get_partition(blocks):
+    """Get the partition of states by their blocks as a set of blocks of states."""
+    partition = {}
+    for state, block in enumerate(blocks):
+        partition.setdefault(block, set()).add(state)
+
+    return {frozenset(block_states) for block_states in partition.values()}
+
+
+def compute_bisimulation_naively(fa):
+    """Compute the coarsest forward bisimulation by refining the blocks by signatures until they are stable."""
+    blocks = [int(state in fa.final) for state in range(len(fa.states))]
+    while True:
+        signatures = [(blocks[state], frozenset((symbol, blocks[target])
+                                                for symbol, targets in fa.get_transitions(state) for target in targets))
+                      for state in range(len(fa.states))]
+        signature_ids = {}
+        refined = [signature_ids.setdefault(signature, len(signature_ids)) for signature in signatures]
+        if len(signature_ids) == len(set(blocks)):
+            return refined
+        blocks = refined
+
+
+def test_compute_bisimulation_of_known_automaton():
+    assert get_partition(compute_bisimulation(BRANCHING)) == {frozenset({0}), frozenset({1}), frozenset({2, 4}),
+                                                              frozenset({3}), frozenset({5})}
+    # Dead states 'q2' and 'q3' differ by the loop of 'q3', 'q4' does not read 'a' as 'q0' does.
+    assert get_partition(compute_bisimulation(A_STAR_B)) == {frozenset({state}) for state in range(5)}
+
+
+def test_compute_simulation_equivalence_of_known_automaton():
+    assert get_partition(compute_simulation_equivalence(BRANCHING)) == {frozenset({0, 3}), frozenset({1}),
+                                                                        frozenset({2, 4}), frozenset({5})}
+
+
+@pytest.mark.parametrize('fa', AUTOMATA)
+def test_compute_bisimulation_matches_signature_refinement(fa):
+    blocks = compute_bisimulation(fa)
+
+    assert get_partition(blocks) == get_partition(compute_bisimulation_naively(fa))
+    # Simulation equivalence is coarser than bisimulation.
+    equivalence = compute_simulation_equivalence(fa)
+    assert all(equivalence[state] == equivalence[other] for state in range(len(fa.states))
+               for other in range(len(fa.states)) if blocks[state] == blocks[other])
+
+
+def test_get_quotient():
+    quotient = get_quotient(BRANCHING, compute_bisimulation(BRANCHING))
+
+    assert quotient.states == ['q0', 'q1', 'q2', 'q3', 'q5']
+    assert quotient.start == [0]
+    assert quotient.final == {4}
+    assert get_transitions(quotient) == {('q0', 'a', 'q1'), ('q0', 'a', 'q2'), ('q1', 'b', 'q5'), ('q2', 'b', 'q5'),
+                                         ('q2', 'c', 'q5'), ('q3', 'a', 'q2')}
+
+
+@pytest.mark.parametrize('fa', AUTOMATA)
+@pytest.mark.parametrize('reduction', [compute_bisimulation, compute_simulation_equivalence])
+def test_quotient_preserves_language(fa, reduction):
+    assert get_words(get_quotient(fa, reduction(fa)), 6) == get_words(fa, 6)
+
+
+@pytest.mark.parametrize('reduction', [BISIMULATION, SIMULATION])
+def test_reduce_automaton(reduction):
+    fa = BRANCHING.to_lfa()
+    fa.alphabet.add('d')  # Symbols not used by the transitions are dropped from the alphabet.
+    ratio = reduce_automaton(fa, reduction)
+    states_cnt = 5 if reduction == BISIMULATION else 4
+
+    assert ratio == pytest.approx(states_cnt / 6)
+    assert len(fa.states) == states_cnt
+    assert get_words(CompactAutomaton.from_lfa(fa), 3) == get_words(BRANCHING, 3)
+    assert fa.alphabet == {'a', 'b', 'c'}
+    # Blocks are named by their first states in the order of the states of the Symboliclib automaton.
+    assert len(fa.start) == 1
+    assert fa.final == {'q5'}
+
+
+def test_reduce_automaton_unknown_reduction():
+    with pytest.raises(ValueError):
+        reduce_automaton(BRANCHING.to_lfa(), 'minimization')
+
+# End of file.
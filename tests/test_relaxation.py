@@ -0,0 +1,38 @@
+# file name: test_relaxation.py
+#
+# Tests of the linear relaxation of Parikh image formulae over rationals.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+import pytest
+import z3
+
+from automata import SMT_PAIRS, check_by_selectors, get_state_pairs, get_variables, make_config
+from optifa.relaxation import ParikhRelaxation
+
+
+@pytest.mark.parametrize('fa_a_name,fa_b_name', SMT_PAIRS)
+def test_infeasible_relaxation_implies_unsatisfiable_formulae(fa_a_name, fa_b_name):
+    fa_a_variables, fa_b_variables = get_variables(fa_a_name, fa_b_name, dead_states=False)
+    relaxation = ParikhRelaxation(fa_a_variables, fa_b_variables)
+    # The encoding without 'z' variables is the weakest one, all the other variants imply it.
+    results = check_by_selectors(fa_a_variables, fa_b_variables, make_config(use_z_constraints=False))
+
+    for state_pair in get_state_pairs(fa_a_variables, fa_b_variables):
+        if relaxation.check(*state_pair) == z3.unsat:
+            assert results[state_pair] == z3.unsat
+
+    assert relaxation.checks_cnt == len(results)
+
+
+def test_relaxation_rejects_product_states():
+    fa_a_variables, fa_b_variables = get_variables('fa_m11', 'fa_m13', dead_states=False)
+    relaxation = ParikhRelaxation(fa_a_variables, fa_b_variables)
+    for state_pair in get_state_pairs(fa_a_variables, fa_b_variables):
+        relaxation.check(*state_pair)
+
+    assert 0 < relaxation.rejected_cnt < relaxation.checks_cnt
+
+# End of file.
@@ -0,0 +1,34 @@
+# file name: test_scc.py
+#
+# Tests of search of strongly connected components.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+from optifa.scc import find_sccs
+
+
+def test_find_sccs_in_reverse_topological_order():
+    # 0 -> {1, 2} -> 3 <-> 4, 5 is isolated with a self loop.
+    successors = [[1], [2], [1, 3], [4], [3], [5]]
+    sccs = find_sccs(6, successors)
+
+    assert sorted(sorted(scc) for scc in sccs) == [[0], [1, 2], [3, 4], [5]]
+    positions = {state: position for position, scc in enumerate(sccs) for state in scc}
+    for state, state_successors in enumerate(successors):
+        for successor in state_successors:
+            assert positions[successor] <= positions[state]
+
+
+def test_find_sccs_of_cycle_and_chain():
+    assert sorted(sorted(scc) for scc in find_sccs(4, [[1], [2], [0], []])) == [[0, 1, 2], [3]]
+    assert find_sccs(3, [[1], [2], []]) == [[2], [1], [0]]
+
+
+def test_find_sccs_deep_chain_without_recursion():
+    states_cnt = 100000
+    successors = [[state + 1] for state in range(states_cnt - 1)] + [[0]]
+    assert len(find_sccs(states_cnt, successors)) == 1
+
+# End of file.
@@ -0,0 +1,103 @@
+# file name: test_simulation.py
+#
+# Tests of forward simulation of compact automata and antichains of product states.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+import pytest
+
+from automata import A_B_STAR, A_STAR_B, COMPACT_AUTOMATA, COMPACT_PAIRS, explore, get_non_empty, make_automaton
+from optifa.simulation import ProductAntichain, compute_simulation, get_simulated
+
+# The dead state 'q3' is reached from both 'q1' and 'q2' and it is simulated by the initial state.
+DIAMOND = make_automaton(5, [0], [], [(0, 'a', 1), (0, 'b', 2), (1, 'c', 3), (2, 'c', 3), (2, 'a', 4)])
+
+
+def get_bit_sets(state_sets):
+    """Get bit sets of the sets of states."""
+    return [sum(1 << state for state in states) for states in state_sets]
+
+
+def compute_simulation_naively(fa):
+    """Compute the maximal forward simulation as a set of pairs '(simulated, simulator)' by its definition."""
+    states = range(len(fa.states))
+    successors = [dict(fa.get_transitions(state)) for state in states]
+    relation = {(state, simulator) for state in states for simulator in states
+                if state not in fa.final or simulator in fa.final}
+    changed = True
+    while changed:
+        changed = False
+        for state, simulator in list(relation):
+            if any(not any((target, simulator_target) in relation
+                           for simulator_target in successors[simulator].get(symbol, ()))
+                   for symbol, targets in successors[state].items() for target in targets):
+                relation.discard((state, simulator))
+                changed = True
+
+    return get_bit_sets([{simulator for simulator in states if (state, simulator) in relation} for state in states])
+
+
+def test_compute_simulation_of_known_automaton():
+    # 'q2' has no transitions, 'q3' only loops over 'a' like 'q0' and 'q4' moves over 'b' to the final state like 'q0'.
+    assert compute_simulation(A_STAR_B) == get_bit_sets([{0}, {1}, {0, 1, 2, 3, 4}, {0, 3}, {0, 4}])
+    assert compute_simulation(A_B_STAR) == get_bit_sets([{0}, {1}])
+
+
+@pytest.mark.parametrize('fa', COMPACT_AUTOMATA)
+def test_compute_simulation_matches_definition(fa):
+    assert compute_simulation(fa) == compute_simulation_naively(fa)
+
+
+def test_get_simulated():
+    assert get_simulated(get_bit_sets([{0}, {1}, {0, 1, 2, 3, 4}, {0, 3}, {0, 4}])) == \
+        get_bit_sets([{0, 2, 3, 4}, {1, 2}, {2}, {2, 3}, {2, 4}])
+
+
+def test_antichain_subsumes_simulated_product_states():
+    antichain = ProductAntichain(A_STAR_B, A_STAR_B)
+    antichain.add(3, 4)
+
+    assert antichain.is_subsumed(3, 4)
+    assert antichain.is_subsumed(2, 2)
+    assert not antichain.is_subsumed(0, 4)
+    assert antichain.subsumed_cnt == 2
+
+    # The larger product state replaces the subsumed ones.
+    antichain.add(0, 0)
+    assert antichain.explored == get_bit_sets([{0}, set(), set(), set(), set()])
+    assert antichain.is_subsumed(3, 4)
+    assert not antichain.is_subsumed(1, 1)
+
+
+@pytest.mark.parametrize('fa_a,fa_b', COMPACT_PAIRS)
+def test_antichain_preserves_emptiness(fa_a, fa_b):
+    non_empty = get_non_empty(fa_a, fa_b)
+    b_states_cnt = len(fa_b.states)
+
+    def check(a_state, b_state):
+        return a_state * b_states_cnt + b_state in non_empty
+
+    for exploration_check in (None, check):
+        antichain = ProductAntichain(fa_a, fa_b)
+        product = explore(fa_a, fa_b, exploration_check, True, antichain)
+        assert bool(product.final) == bool(explore(fa_a, fa_b, exploration_check, True).final)
+
+
+@pytest.mark.parametrize('fa_a,fa_b', [(DIAMOND, DIAMOND)] + COMPACT_PAIRS)
+def test_antichain_tests_product_states_once(fa_a, fa_b):
+    tested = []
+
+    class RecordingAntichain(ProductAntichain):
+        def is_subsumed(self, a_state, b_state):
+            tested.append((a_state, b_state))
+            return super().is_subsumed(a_state, b_state)
+
+    antichain = RecordingAntichain(fa_a, fa_b)
+    explore(fa_a, fa_b, None, True, antichain)
+
+    assert len(tested) == len(set(tested))
+    assert antichain.subsumed_cnt <= len(tested)
+
+# End of file.
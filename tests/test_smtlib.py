@@ -0,0 +1,97 @@
+# file name: test_smtlib.py
+#
+# Tests of persistent Parikh image formulae rendered in SMT-LIB format.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+import pytest
+import z3
+
+from automata import SMT_PAIRS, VARIANTS, get_variables
+from optifa.basic import add_persistent_formulae
+from optifa.smtlib import KEY_PREFIX, add_persistent_formulae_smtlib, get_persistent_formulae_smtlib, get_symbol
+
+
+def get_persistent_formulae(fa_a_variables, fa_b_variables, config):
+    """Get conjunction of the persistent formulae built through Z3 Python API."""
+    smt = z3.Solver()
+    add_persistent_formulae(smt, fa_a_variables, fa_b_variables, config)
+    return z3.And(smt.assertions())
+
+
+@pytest.mark.parametrize('config', VARIANTS)
+@pytest.mark.parametrize('fa_a_name,fa_b_name', SMT_PAIRS)
+def test_smtlib_formulae_are_equivalent(fa_a_name, fa_b_name, config, tmp_path):
+    fa_a_variables, fa_b_variables = get_variables(fa_a_name, fa_b_name)
+    filename = str(tmp_path / 'formulae.smt2')
+    smt = z3.Solver()
+    add_persistent_formulae_smtlib(smt, fa_a_variables, fa_b_variables, config, filename)
+
+    # No assignment of the shared variables satisfies exactly one of the encodings.
+    smt_check = z3.Solver()
+    smt_check.add(z3.And(smt.assertions()) != get_persistent_formulae(fa_a_variables, fa_b_variables, config))
+    assert smt_check.check() == z3.unsat
+
+    with open(filename) as script_file:
+        assert script_file.read() == get_persistent_formulae_smtlib(fa_a_variables, fa_b_variables, config)
+
+
+@pytest.mark.parametrize('config', VARIANTS)
+def test_load_stored_formulae(config, tmp_path):
+    fa_a_variables, fa_b_variables = get_variables('fa_m5', 'fa_m7')
+    filename = str(tmp_path / 'formulae.smt2')
+    add_persistent_formulae_smtlib(z3.Solver(), fa_a_variables, fa_b_variables, config, filename)
+    smt = z3.Solver()
+    add_persistent_formulae_smtlib(smt, fa_a_variables, fa_b_variables, config, load_filename=filename)
+
+    smt.add(z3.Not(get_persistent_formulae(fa_a_variables, fa_b_variables, config)))
+    assert smt.check() == z3.unsat
+
+
+def test_load_formulae_with_mismatched_key(tmp_path):
+    fa_a_variables, fa_b_variables = get_variables('fa_m5', 'fa_m7')
+    filename = str(tmp_path / 'formulae.smt2')
+    add_persistent_formulae_smtlib(z3.Solver(), fa_a_variables, fa_b_variables, VARIANTS[0], filename)
+
+    # Formulae stored for other options or other automata are refused.
+    with pytest.raises(ValueError):
+        add_persistent_formulae_smtlib(z3.Solver(), fa_a_variables, fa_b_variables, VARIANTS[1],
+                                       load_filename=filename)
+    other_a_variables, other_b_variables = get_variables('fa_m3', 'fa_m4')
+    with pytest.raises(ValueError):
+        add_persistent_formulae_smtlib(z3.Solver(), other_a_variables, other_b_variables, VARIANTS[0],
+                                       load_filename=filename)
+
+    # A tampered key is refused as well.
+    with open(filename) as script_file:
+        lines = script_file.readlines()
+    lines[0] = KEY_PREFIX + '0' * 64 + '\n'
+    with open(filename, 'w') as script_file:
+        script_file.writelines(lines)
+    with pytest.raises(ValueError):
+        add_persistent_formulae_smtlib(z3.Solver(), fa_a_variables, fa_b_variables, VARIANTS[0],
+                                       load_filename=filename)
+
+
+def test_smtlib_formulae_differ_between_variants():
+    fa_a_variables, fa_b_variables = get_variables('fa_m5', 'fa_m7')
+    smt = z3.Solver()
+    add_persistent_formulae_smtlib(smt, fa_a_variables, fa_b_variables, VARIANTS[0])
+
+    # Connectivity constraints of the reversed lengths are missing without the 'z' constraints.
+    smt.add(z3.Not(get_persistent_formulae(fa_a_variables, fa_b_variables, VARIANTS[1])))
+    assert smt.check() == z3.unsat
+    smt = z3.Solver()
+    add_persistent_formulae_smtlib(smt, fa_a_variables, fa_b_variables, VARIANTS[1])
+    smt.add(z3.Not(get_persistent_formulae(fa_a_variables, fa_b_variables, VARIANTS[0])))
+    assert smt.check() == z3.sat
+
+
+def test_get_symbol():
+    assert get_symbol('a_y_q0_a_q1') == '|a_y_q0_a_q1|'
+    with pytest.raises(ValueError):
+        get_symbol('a_u_|q0|')
+
+# End of file.
@@ -0,0 +1,118 @@
+# file name: test_work_set.py
+#
+# Tests of the indexed work set of product states.
+#
+# project: Abstraction of State Languages in Automata Algorithms
+#
+# author: David Chocholatý (xchoch08), FIT BUT
+
+import pytest
+
+from automata import A_B_STAR, A_STAR_B, BASIC_PAIRS, get_reachable_product, parse_basic
+from lfa import LFA
+from optifa.basic import make_pairs
+from optifa.work_set import PairWorkSet
+
+PAIRS = [('q0', 'p0'), ('q1', 'p0'), ('q0', 'p1'), ('q2', 'p2')]
+
+
+def pop_all(work_set):
+    """Pop all work set entries as tuples."""
+    entries = []
+    while work_set:
+        entries.append(tuple(work_set.pop()))
+    return entries
+
+
+def test_orders():
+    for order, expected in ((PairWorkSet.DFS, PAIRS[::-1]), (PairWorkSet.BFS, PAIRS)):
+        work_set = PairWorkSet(order)
+        for pair in PAIRS:
+            work_set.push(*pair)
+        assert [entry[:2] for entry in pop_all(work_set)] == expected
+
+    # Pairs with equal priority are popped in the order of pushing.
+    work_set = PairWorkSet(PairWorkSet.PRIORITY, lambda a_state, b_state: -int(b_state[1]))
+    for pair in PAIRS:
+        work_set.push(*pair)
+    assert [entry[:2] for entry in pop_all(work_set)] == [PAIRS[3], PAIRS[2], PAIRS[0], PAIRS[1]]
+
+
+def test_push_upgrades_skip_flag_of_pending_pair():
+    work_set = PairWorkSet(PairWorkSet.BFS)
+    assert work_set.push('q0', 'p0')
+    assert work_set.push('q1', 'p0', True)
+    assert not work_set.push('q0', 'p0', True)
+    assert not work_set.push('q1', 'p0', False)  # A skippable pair stays skippable.
+
+    assert ('q0', 'p0') in work_set
+    assert ('q0', 'p1') not in work_set
+    assert len(work_set) == 2
+    assert pop_all(work_set) == [('q0', 'p0', True), ('q1', 'p0', True)]
+    assert not work_set
+    assert ('q0', 'p0') not in work_set
+    assert work_set.push('q0', 'p0')  # A popped pair can be pushed again.
+
+
+def test_peek_keeps_pairs_in_order_of_popping():
+    for order in (PairWorkSet.DFS, PairWorkSet.BFS):
+        work_set = PairWorkSet(order)
+        for pair in PAIRS:
+            work_set.push(*pair)
+        peeked = [tuple(entry) for entry in work_set.peek(3)]
+        assert work_set.peek(0) == []
+        assert len(work_set) == len(PAIRS)
+        assert peeked == pop_all(work_set)[:3]
+
+    work_set = PairWorkSet(PairWorkSet.PRIORITY, lambda a_state, b_state: -int(b_state[1]))
+    for pair in PAIRS:
+        work_set.push(*pair)
+    assert [tuple(entry) for entry in work_set.peek(10)] == pop_all(work_set)
+
+
+def test_invalid_orders():
+    with pytest.raises(ValueError):
+        PairWorkSet('random')
+    with pytest.raises(ValueError):
+        PairWorkSet(PairWorkSet.PRIORITY)
+
+
+def test_for_strategy():
+    for strategy in (PairWorkSet.DFS, PairWorkSet.BFS):
+        assert PairWorkSet.for_strategy(strategy, A_STAR_B, A_B_STAR).order == strategy
+
+    # Product states with the lowest of the larger distances of their states to final states are popped first.
+    work_set = PairWorkSet.for_strategy(PairWorkSet.BEST_FIRST, A_STAR_B, A_B_STAR)
+    for pair in [(2, 0), (0, 0), (1, 1), (0, 1), (4, 0)]:
+        work_set.push(*pair)
+    assert [entry[:2] for entry in pop_all(work_set)] == [(1, 1), (0, 0), (0, 1), (4, 0), (2, 0)]
+
+    with pytest.raises(ValueError):
+        PairWorkSet.for_strategy(PairWorkSet.PRIORITY, A_STAR_B, A_B_STAR)
+
+
+@pytest.mark.parametrize('order', [PairWorkSet.DFS, PairWorkSet.BFS])
+@pytest.mark.parametrize('fa_a_name,fa_b_name', BASIC_PAIRS)
+def test_make_pairs_generates_reachable_product(fa_a_name, fa_b_name, order):
+    fa_a = parse_basic(fa_a_name)
+    fa_b = parse_basic(fa_b_name)
+    intersect = LFA.get_new()
+    q_pair_states = PairWorkSet(order)
+    q_checked_pairs = {}
+    for a_state in fa_a.start:
+        for b_state in fa_b.start:
+            q_pair_states.push(a_state, b_state)
+
+    while q_pair_states:
+        curr_pair = q_pair_states.pop()
+        product_state_name = curr_pair[0] + ',' + curr_pair[1]
+        q_checked_pairs[product_state_name] = True
+        intersect.states.add(product_state_name)
+        intersect.transitions[product_state_name] = {}
+        if curr_pair[0] in fa_a.final and curr_pair[1] in fa_b.final:
+            intersect.final.add(product_state_name)
+        make_pairs(fa_a, fa_b, q_pair_states, q_checked_pairs, intersect, curr_pair)
+
+    assert (intersect.states, intersect.final) == get_reachable_product(fa_a, fa_b)
+
+# End of file.